@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Ollama settings autotuner
+Restarts Ollama through scripts/start-ollama.sh and stop-ollama.sh across a grid or adaptive
+search of server settings and request options, runs a fixed workload at each point, and reports
+the Pareto front of tokens/sec vs. p95 latency vs. RSS with a recommended env file
+"""
+
+import argparse
+import asyncio
+import itertools
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark_common import (
+    BENCHMARK_DIR, DEFAULT_OLLAMA_API, DEFAULT_PROMPT_NAMES, load_prompts, session_dir, write_csv,
+)
+from load_generator import closed_loop, summarize
+from ollama_client import OllamaClient
+from resource_sampler import ResourceSampler
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'scripts')
+
+RESULTS_FILE = 'autotune_results.csv'
+ENV_FILE = 'autotune_recommended.env'
+
+# Search dimensions: server settings need an Ollama restart, request options do not
+SERVER_SETTINGS = {'num_parallel': 'OLLAMA_NUM_PARALLEL', 'max_loaded_models': 'OLLAMA_MAX_LOADED_MODELS'}
+REQUEST_OPTIONS = ('num_ctx', 'num_thread', 'num_batch')
+DIMENSIONS = tuple(SERVER_SETTINGS) + REQUEST_OPTIONS
+
+RESULTS_HEADER = [
+    'Num Parallel', 'Max Loaded Models', 'Num Ctx', 'Num Thread', 'Num Batch', 'Requests', 'Errors',
+    'Tokens/sec', 'Requests/sec', 'Latency p50 (s)', 'Latency p95 (s)', 'Peak RSS (MB)', 'Pareto', 'Recommended',
+]
+
+def parse_values(text):
+    """Parse a comma-separated list of ints where 'default' means leave the setting unset."""
+    return [None if value == 'default' else int(value) for value in text.split(',') if value]
+
+def label(point):
+    return ' '.join(f"{name}={'default' if point[name] is None else point[name]}" for name in DIMENSIONS)
+
+def env_lines(point, include_context=True):
+    """Environment lines for the server settings (and default context length) of a point."""
+    lines = [f"export {var}={point[name]}" for name, var in SERVER_SETTINGS.items() if point[name] is not None]
+    if include_context and point['num_ctx'] is not None:
+        lines.append(f"export OLLAMA_CONTEXT_LENGTH={point['num_ctx']}")
+    return lines
+
+def tail(completed, lines=3):
+    """Last lines of a finished script's output, for error messages."""
+    output = (completed.stdout or '') + (completed.stderr or '')
+    return ' / '.join(output.strip().splitlines()[-lines:]) or f"exit code {completed.returncode}"
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class OllamaController:
+    """Restarts Ollama with a given set of server settings using the stack scripts."""
+
+    def __init__(self, api, start_script, stop_script, restart=True, ready_timeout=120.0):
+        self.api = api
+        self.start_script = start_script
+        self.stop_script = stop_script
+        self.restart = restart
+        self.ready_timeout = ready_timeout
+        self.current = None
+        self.restarted = False
+
+    async def wait_ready(self):
+        deadline = time.perf_counter() + self.ready_timeout
+        delay = 0.1
+        while True:
+            try:
+                async with OllamaClient(self.api, max_connections=1, timeout=5) as client:
+                    await client.tags()
+                    return
+            except Exception:
+                if time.perf_counter() >= deadline:
+                    raise RuntimeError(f"Ollama did not become ready within {self.ready_timeout:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2.0)
+
+    async def apply(self, point):
+        """Restart Ollama if the point's server settings differ from the running ones."""
+        settings = tuple(point[name] for name in SERVER_SETTINGS)
+        if not self.restart or settings == self.current:
+            return
+        # num_ctx is sent per request while tuning, so only server settings force a restart
+        await self.restart_with(env_lines(point, include_context=False))
+        self.current = settings
+
+    async def restore(self, point=None):
+        """After a search that restarted Ollama, leave it on the point's settings (with its default
+        context length), or on the environment it was started with when there's no point."""
+        if not self.restarted:
+            return
+        await self.restart_with(env_lines(point) if point else None)
+
+    async def restart_with(self, lines):
+        """Stop Ollama and start it with only these env lines, or with the caller's environment if None."""
+        env = dict(os.environ)
+        env_file = None
+        if lines is not None:
+            with tempfile.NamedTemporaryFile('w', suffix='.env', delete=False) as f:
+                f.write('\n'.join(lines) + '\n')
+                env_file = f.name
+            # start-ollama.sh sources OLLAMA_ENV_FILE, the same path the recommended file takes
+            env['OLLAMA_ENV_FILE'] = env_file
+            for var in list(SERVER_SETTINGS.values()) + ['OLLAMA_CONTEXT_LENGTH']:
+                env.pop(var, None)
+        # Until the new server is confirmed, the running settings are unknown
+        self.current = None
+        self.restarted = True
+        try:
+            stopped = subprocess.run(['bash', self.stop_script], capture_output=True, text=True)
+            if stopped.returncode != 0:
+                raise RuntimeError(f"{os.path.basename(self.stop_script)} failed: {tail(stopped)}")
+            started = subprocess.run(['bash', self.start_script], env=env, capture_output=True, text=True)
+            # start-ollama.sh exits 0 without starting anything if a server still answers on the port
+            # (e.g. Ollama.app respawned it), which would measure the old settings under a new label
+            match = re.search(r'Ollama started with PID: (\d+)', started.stdout)
+            if started.returncode != 0 or not match:
+                raise RuntimeError(f"{os.path.basename(self.start_script)} did not start a new server: "
+                                   f"{tail(started)}")
+            await self.wait_ready()
+            if not process_alive(int(match.group(1))):
+                raise RuntimeError(f"the new server (PID {match.group(1)}) exited; another Ollama is "
+                                   f"answering on {self.api}")
+        finally:
+            if env_file:
+                os.unlink(env_file)
+
+async def run_workload(api, models, prompts, point, concurrency, requests, num_predict, sample_rate):
+    """Warm up each model with the point's options, then run the fixed closed-loop workload."""
+    options = {'num_predict': num_predict}
+    options.update({name: point[name] for name in REQUEST_OPTIONS if point[name] is not None})
+    async with OllamaClient(api, max_connections=concurrency * len(models) + 1) as client:
+        for model in models:
+            # Changing num_ctx/num_batch reloads the runner; keep that out of the measurement
+            await client.generate(model, 'Hello', options=dict(options, num_predict=1))
+        sampler = ResourceSampler(rate=sample_rate).start() if sample_rate > 0 else None
+        start = time.time()
+        try:
+            batches = await asyncio.gather(*(
+                closed_loop(client, model, prompts, concurrency, 3600, requests, options) for model in models))
+        finally:
+            if sampler:
+                sampler.stop()
+        resources = sampler.summary(start, time.time()) if sampler else {}
+    stats = summarize([record for batch in batches for record in batch])
+    return {
+        'requests': stats['requests'],
+        'errors': stats['errors'],
+        'tps': stats['tokens_per_sec'] or 0.0,
+        'rps': stats['requests_per_sec'],
+        'p50': stats['latency_p50'],
+        'p95': stats['latency_p95'],
+        'rss_mb': resources.get('peak_rss_mb', math.nan),
+    }
+
+def dominates(a, b):
+    """True if a is at least as good as b on every objective and strictly better on one."""
+    def objectives(result):
+        # An unmeasured RSS must not beat a measured one, so it counts as the worst possible
+        rss = result['rss_mb'] if result['rss_mb'] == result['rss_mb'] else math.inf
+        p95 = result['p95'] if result['p95'] == result['p95'] else math.inf
+        return (-result['tps'], p95, rss)
+    oa, ob = objectives(a), objectives(b)
+    return all(x <= y for x, y in zip(oa, ob)) and oa != ob
+
+def pareto_front(results):
+    valid = [r for r in results if not r['errors'] and r['tps'] > 0]
+    return [r for r in valid if not any(dominates(other, r) for other in valid if other is not r)]
+
+def recommend(front, max_p95=None, max_rss_mb=None):
+    """Highest-throughput Pareto point that meets the latency and memory limits (None if none does)."""
+    def fits(r):
+        return ((max_p95 is None or r['p95'] <= max_p95)
+                and (max_rss_mb is None or not r['rss_mb'] == r['rss_mb'] or r['rss_mb'] <= max_rss_mb))
+    candidates = [r for r in front if fits(r)]
+    return max(candidates, key=lambda r: r['tps']) if candidates else None
+
+def score(result, max_p95, max_rss_mb):
+    """Objective for the adaptive search: throughput, with constraint violations ranked last."""
+    if result['errors'] or not result['tps']:
+        return -math.inf
+    penalty = 0
+    if max_p95 is not None and result['p95'] > max_p95:
+        penalty += 1
+    if max_rss_mb is not None and result['rss_mb'] == result['rss_mb'] and result['rss_mb'] > max_rss_mb:
+        penalty += 1
+    return result['tps'] - penalty * 1e9
+
+def grid_points(space):
+    """Every combination, ordered so server settings (restarts) change as rarely as possible."""
+    for values in itertools.product(*(space[name] for name in DIMENSIONS)):
+        yield dict(zip(DIMENSIONS, values))
+
+async def search(args, space, evaluate):
+    """Evaluate the grid, or coordinate-descend one dimension at a time for --search adaptive."""
+    if args.search == 'grid':
+        for point in grid_points(space):
+            await evaluate(point)
+        return
+
+    best = {name: values[len(values) // 2] for name, values in space.items()}
+    best_score = score(await evaluate(best), args.max_p95, args.max_rss_mb)
+    for _ in range(args.max_passes):
+        improved = False
+        for name in DIMENSIONS:
+            for value in space[name]:
+                if value == best[name]:
+                    continue
+                candidate = dict(best, **{name: value})
+                candidate_score = score(await evaluate(candidate), args.max_p95, args.max_rss_mb)
+                if candidate_score > best_score:
+                    best, best_score, improved = candidate, candidate_score, True
+        if not improved:
+            break
+
+def write_env_file(path, result, session):
+    point = result['point']
+    with open(path, 'w') as f:
+        f.write(f"# Ollama settings recommended by benchmarking/autotune.py ({session})\n")
+        f.write(f"# {result['tps']:.1f} tokens/sec, p95 latency {result['p95']:.2f}s, "
+                f"peak RSS {result['rss_mb']:.0f} MB\n")
+        for line in env_lines(point):
+            f.write(line + '\n')
+        options = [f"{name} {point[name]}" for name in ('num_thread', 'num_batch') if point[name] is not None]
+        if options:
+            f.write(f"# Request options (per request, or PARAMETER lines in a Modelfile): {', '.join(options)}\n")
+
+async def autotune(args):
+    prompts = load_prompts(args.prompts)
+    output_dir = session_dir(args.session, args.output_dir)
+    space = {
+        'num_parallel': parse_values(args.num_parallel),
+        'max_loaded_models': parse_values(args.max_loaded_models),
+        'num_ctx': parse_values(args.num_ctx),
+        'num_thread': parse_values(args.num_thread),
+        'num_batch': parse_values(args.num_batch),
+    }
+    controller = OllamaController(args.api, args.start_script, args.stop_script, not args.no_restart)
+    async with OllamaClient(args.api, max_connections=1) as client:
+        models = args.models or [m['name'] for m in (await client.tags()).get('models', [])][:1]
+
+    results = {}
+
+    async def evaluate(point):
+        key = tuple(point[name] for name in DIMENSIONS)
+        if key in results:
+            return results[key]
+        print(f"\n[{len(results) + 1}] {label(point)}")
+        try:
+            await controller.apply(point)
+            result = await run_workload(args.api, models, prompts, point, args.concurrency, args.requests,
+                                        args.num_predict, args.sample_rate)
+        except Exception as e:
+            print(f"  Failed: {e}")
+            result = {'requests': 0, 'errors': 1, 'tps': 0.0, 'rps': None, 'p50': None, 'p95': math.inf,
+                      'rss_mb': math.nan}
+        result['point'] = dict(point)
+        results[key] = result
+        print(f"  {result['tps']:.1f} tokens/sec, p95 {result['p95']:.2f}s, peak RSS {result['rss_mb']:.0f} MB, "
+              f"{result['errors']} errors")
+        return result
+
+    print(f"Autotuning {', '.join(models)} ({args.search} search, {args.requests} requests x "
+          f"{args.concurrency} users per model at each point)")
+    await search(args, space, evaluate)
+
+    front = pareto_front(list(results.values()))
+    best = recommend(front, args.max_p95, args.max_rss_mb)
+    if controller.restarted:
+        # Don't leave Ollama on whichever point the search happened to evaluate last
+        target = f"the recommended settings ({label(best['point'])})" if best else "its original settings"
+        print(f"\nRestarting Ollama with {target}")
+        try:
+            await controller.restore(best['point'] if best else None)
+        except Exception as e:
+            print(f"Warning: could not restart Ollama ({e}); restart it manually with scripts/start-ollama.sh",
+                  file=sys.stderr)
+    rows = []
+    for result in sorted(results.values(), key=lambda r: -r['tps']):
+        point = result['point']
+        rows.append([point['num_parallel'], point['max_loaded_models'], point['num_ctx'], point['num_thread'],
+                     point['num_batch'], result['requests'], result['errors'], result['tps'], result['rps'],
+                     result['p50'], result['p95'], result['rss_mb'],
+                     'yes' if result in front else 'no', 'yes' if result is best else 'no'])
+    write_csv(f"{output_dir}/{RESULTS_FILE}", RESULTS_HEADER, rows)
+
+    print(f"\nPareto front (tokens/sec vs. p95 latency vs. RSS): {len(front)} of {len(results)} points")
+    for result in sorted(front, key=lambda r: -r['tps']):
+        marker = '*' if result is best else ' '
+        print(f" {marker} {label(result['point'])}: {result['tps']:.1f} tok/s, p95 {result['p95']:.2f}s, "
+              f"RSS {result['rss_mb']:.0f} MB")
+    print(f"\nAutotune results saved to: {output_dir}/{RESULTS_FILE}")
+    if not front:
+        print("No configuration completed without errors; no recommendation written.")
+        return 1
+    if not best:
+        print(f"Warning: no configuration met the limits (--max-p95 {args.max_p95}, --max-rss-mb "
+              f"{args.max_rss_mb}); no recommendation written. Relax the limits or widen the search.")
+        return 1
+
+    session = os.path.basename(os.path.normpath(output_dir))
+    env_path = f"{output_dir}/{ENV_FILE}"
+    write_env_file(env_path, best, session)
+    print(f"Recommended settings saved to: {env_path}")
+    if args.write_env:
+        write_env_file(args.write_env, best, session)
+        print(f"Installed recommended settings to: {args.write_env}")
+    else:
+        print(f"To use them: cp '{env_path}' '{os.path.join(SCRIPTS_DIR, 'ollama.env')}'"
+              + (" so they survive the next restart" if controller.restarted else " and restart Ollama"))
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Search Ollama server settings and request options for the best throughput.')
+    parser.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+    parser.add_argument('--models', type=lambda s: [m for m in s.split(',') if m],
+                        help='Comma-separated models for the workload (default: first installed model)')
+    parser.add_argument('--prompts', type=lambda s: [p for p in s.split(',') if p], default=DEFAULT_PROMPT_NAMES,
+                        help='Comma-separated prompt names from benchmark-models.sh')
+    parser.add_argument('--search', choices=['grid', 'adaptive'], default='adaptive',
+                        help='grid: every combination; adaptive: coordinate descent on tokens/sec')
+    parser.add_argument('--max-passes', type=int, default=2, help='Coordinate-descent passes for adaptive search')
+    parser.add_argument('--num-parallel', default='1,2,4', help="OLLAMA_NUM_PARALLEL values ('default' = unset)")
+    parser.add_argument('--max-loaded-models', default='default', help='OLLAMA_MAX_LOADED_MODELS values')
+    parser.add_argument('--num-ctx', default='2048,4096,8192', help='num_ctx values')
+    parser.add_argument('--num-thread', default='default', help='num_thread values')
+    parser.add_argument('--num-batch', default='default,256,1024', help='num_batch values')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent users per model in the workload')
+    parser.add_argument('--requests', type=int, default=16, help='Requests per model at each point')
+    parser.add_argument('--num-predict', type=int, default=128, help='Tokens generated per request')
+    parser.add_argument('--max-p95', type=float, help='Latency limit (s) for the recommendation')
+    parser.add_argument('--max-rss-mb', type=float, help='Memory limit (MB) for the recommendation')
+    parser.add_argument('--sample-rate', type=float, default=10, help='RSS samples per second (0 disables)')
+    parser.add_argument('--no-restart', action='store_true',
+                        help='Only sweep request options against the running server')
+    parser.add_argument('--start-script', default=os.path.join(SCRIPTS_DIR, 'start-ollama.sh'))
+    parser.add_argument('--stop-script', default=os.path.join(SCRIPTS_DIR, 'stop-ollama.sh'))
+    parser.add_argument('--write-env', help='Also write the recommended env file here (e.g. scripts/ollama.env)')
+    parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    args = parser.parse_args()
+
+    if args.no_restart:
+        args.num_parallel = args.max_loaded_models = 'default'
+    return asyncio.run(autotune(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
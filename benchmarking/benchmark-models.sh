@@ -21,29 +21,147 @@ BENCHMARK_DIR="$(dirname "$0")"
 SCRIPT_DIR="$BENCHMARK_DIR/../scripts"
 
 
-# Ollama API endpoint
-OLLAMA_API="http://127.0.0.1:11434"
+# Ollama API endpoint (override with OLLAMA_API=http://host:port)
+OLLAMA_API="${OLLAMA_API:-http://127.0.0.1:11434}"
 
 # Generate timestamp for this benchmark session (YYYY-mm-dd_HH:MM:SS)
 SESSION_TIMESTAMP=$(date +"%Y-%m-%d_%H:%M:%S")
 
-# Reports directory and result file
-REPORTS_DIR="$BENCHMARK_DIR/benchmark-reports/$SESSION_TIMESTAMP"
+# Reports directory and result file (REPORTS_DIR can be overridden from the environment)
+REPORTS_DIR="${REPORTS_DIR:-$BENCHMARK_DIR/benchmark-reports/$SESSION_TIMESTAMP}"
 mkdir -p "$REPORTS_DIR"
 
 RESULT_FILE="${REPORTS_DIR}/model_benchmark_results.csv"
 
 # NEW: Check for GPU metrics flag
 enable_gpu_metrics=false
+# Resource sampling: use the in-process /proc sampler when Python is available
+# (without /proc, e.g. on macOS, it falls back to one ps call per sample and caps itself at 2 Hz)
+USE_PY_SAMPLER=false
+if command -v python3 &> /dev/null; then
+    USE_PY_SAMPLER=true
+fi
+SAMPLE_RATE=50
+
+# Comma-separated list of models to benchmark instead of every installed model
+MODELS_OVERRIDE=""
+
+# Number of times each model/prompt pair is run (repeats feed regression_gate.py)
+RUNS=1
+
+# Streaming mode: measure TTFT and inter-token latency (see stream_benchmark.py)
+STREAM_MODE=false
+# Concurrent load test options (see load_generator.py)
+enable_load_test=false
+LOAD_MODE="closed"
+LOAD_CONCURRENCY="1,2,4,8"
+LOAD_RATES="0.5,1,2"
+LOAD_DURATION=60
+# Cold/warm/hot model load benchmark (see model_load_benchmark.py)
+enable_model_load=false
+MODEL_LOAD_REPEATS=1
+# Embeddings benchmark (see embeddings_benchmark.py); embedding models are listed separately
+enable_embeddings=false
+EMBED_MODELS=""
+# Memory vs context length profile (see memory_profile.py)
+enable_memory_profile=false
+MEMORY_CONTEXTS="2048,4096,8192,16384"
+# Order models by residency and warm the next one early (see residency_scheduler.py)
+SCHEDULE_MODE=false
+# Fleet coordinator mode: benchmark every endpoint in an inventory (see fleet_benchmark.py)
+FLEET_INVENTORY=""
+FLEET_MODE="concurrent"
 for arg in "$@"; do
     case $arg in
         --gpu-metrics)
             enable_gpu_metrics=true
             echo -e "\033[1;34mGPU metrics gathering ENABLED (requires sudo)\033[0m"
             ;;
+        --stream)
+            STREAM_MODE=true
+            echo -e "\033[1;34mStreaming mode ENABLED (TTFT and inter-token latency)\033[0m"
+            ;;
+        --load-test)
+            enable_load_test=true
+            ;;
+        --load-mode=*)
+            enable_load_test=true
+            LOAD_MODE="${arg#*=}"
+            ;;
+        --concurrency=*)
+            enable_load_test=true
+            LOAD_CONCURRENCY="${arg#*=}"
+            ;;
+        --rates=*)
+            enable_load_test=true
+            LOAD_RATES="${arg#*=}"
+            ;;
+        --load-duration=*)
+            LOAD_DURATION="${arg#*=}"
+            ;;
+        --models=*)
+            MODELS_OVERRIDE="${arg#*=}"
+            ;;
+        --sample-rate=*)
+            SAMPLE_RATE="${arg#*=}"
+            ;;
+        --legacy-sampler)
+            USE_PY_SAMPLER=false
+            ;;
+        --runs=*)
+            RUNS="${arg#*=}"
+            ;;
+        --model-load)
+            enable_model_load=true
+            ;;
+        --model-load-repeats=*)
+            enable_model_load=true
+            MODEL_LOAD_REPEATS="${arg#*=}"
+            ;;
+        --embeddings)
+            enable_embeddings=true
+            ;;
+        --embed-models=*)
+            enable_embeddings=true
+            EMBED_MODELS="${arg#*=}"
+            ;;
+        --memory-profile)
+            enable_memory_profile=true
+            ;;
+        --memory-contexts=*)
+            enable_memory_profile=true
+            MEMORY_CONTEXTS="${arg#*=}"
+            ;;
+        --schedule)
+            SCHEDULE_MODE=true
+            ;;
+        --fleet=*)
+            FLEET_INVENTORY="${arg#*=}"
+            ;;
+        --fleet-mode=*)
+            FLEET_MODE="${arg#*=}"
+            ;;
     esac
 done
 
+# Add this session to the cross-session results store (results.db) that trends and the
+# regression gate read. Only real sessions directly under benchmark-reports are added: a
+# REPORTS_DIR overridden elsewhere, BENCHMARK_NO_STORE=1 or a mock server skip the import.
+store_session() {
+    local base_dir=$(cd "$BENCHMARK_DIR/benchmark-reports" 2>/dev/null && pwd -P)
+    local parent_dir=$(cd "$REPORTS_DIR/.." 2>/dev/null && pwd -P)
+    if [ -n "$BENCHMARK_NO_STORE" ] || [ -z "$base_dir" ] || [ "$parent_dir" != "$base_dir" ]; then
+        echo "Not adding $REPORTS_DIR to the results store (outside benchmark-reports or BENCHMARK_NO_STORE set)"
+        return
+    fi
+    if curl -s "${OLLAMA_API}/api/version" | grep -q -- '-mock'; then
+        echo "Not adding $REPORTS_DIR to the results store (mock Ollama server)"
+        return
+    fi
+    python3 "$BENCHMARK_DIR/results_store.py" import "$REPORTS_DIR" || \
+        echo -e "${YELLOW}Could not add session to the results store${NC}"
+}
+
 # Function to safely extract values from JSON with fallback
 safe_jq_extract() {
     local json=$1
@@ -198,6 +316,7 @@ get_gpu_power() {
 # Function to get hardware information with Apple Silicon support
 get_hardware_info() {
     echo "Collecting system hardware information..."
+    echo "Hostname: $(hostname)"
     
     # CPU info
     echo "CPU Model: $(sysctl -n machdep.cpu.brand_string 2>/dev/null || echo 'Unknown')"
@@ -268,67 +387,113 @@ benchmark_model_prompt() {
     
     # Get baseline metrics
     sleep 2
+    # ps only sees `ollama serve`; with the Python sampler both baseline and peak are replaced
+    # by its whole-tree readings (runners included) so Memory Used compares like with like
     local baseline_memory=$(get_memory_usage)
     local baseline_cpu=$(get_cpu_usage)
-    echo "Baseline memory usage: ${baseline_memory}MB"
-    echo "Baseline CPU usage: ${baseline_cpu}%"
     
     # Start timing
     local start_time=$(date +%s.%N)
     
-    # Start CPU sampling in background
-    local cpu_samples=()
-    # Create pid file in the benchmarking tmp directory
     mkdir -p "$BENCHMARK_DIR/tmp"
     # Sanitize model and prompt name for safe filename
     local safe_model_name=$(echo "$model" | tr -dc '[:alnum:]._-')
     local safe_prompt_name=$(echo "$prompt_name" | tr -dc '[:alnum:]._-')
-    local pid_file="$BENCHMARK_DIR/tmp/cpu_samples_${safe_model_name}_${safe_prompt_name}.txt"
-    
-    # Function to sample CPU in background
-    (
-        while true; do
-            local cpu=$(get_cpu_usage)
-            echo "$cpu" >> "$pid_file"
-            sleep 0.5
-        done
-    ) &
-    local sampler_pid=$!
-    
-    # Make the actual request (no streaming for accurate timing)
-    local response=$(curl -s -X POST "${OLLAMA_API}/api/generate" \
-        -H "Content-Type: application/json" \
-        -d "{\"model\": \"$model\", \"prompt\": \"$prompt\", \"stream\": false}")
-    
-    # End timing and CPU sampling
-    local end_time=$(date +%s.%N)
-    kill $sampler_pid 2>/dev/null
-    wait $sampler_pid 2>/dev/null
-    
-    # Process CPU samples
+    
+    # Make the actual request (no streaming for accurate timing unless streaming mode is enabled)
+    local request_cmd
+    if [ "$STREAM_MODE" = true ]; then
+        # The probe consumes the NDJSON stream and prints the final chunk plus latency metrics
+        request_cmd=(python3 "$BENCHMARK_DIR/stream_benchmark.py" --api "$OLLAMA_API" \
+            --model "$model" --prompt "$prompt")
+    else
+        request_cmd=(curl -s -X POST "${OLLAMA_API}/api/generate" \
+            -H "Content-Type: application/json" \
+            -d "{\"model\": \"$model\", \"prompt\": \"$prompt\", \"stream\": false}")
+    fi
+    
+    local response
     local max_cpu=0
-    local sum_cpu=0
-    local count=0
-    
-    while IFS= read -r cpu_value; do
-        if [[ "$cpu_value" =~ ^[0-9]+(\.[0-9]+)?$ ]]; then
-            sum_cpu=$(echo "$sum_cpu + $cpu_value" | bc)
-            count=$((count + 1))
-            if (( $(echo "$cpu_value > $max_cpu" | bc -l) )); then
-                max_cpu=$cpu_value
+    local avg_cpu="N/A"
+    local sampled_peak_memory=""
+    if [ "$USE_PY_SAMPLER" = true ]; then
+        # Sample the Ollama process tree from /proc while the request runs (no fork per sample)
+        local sampler_summary="$BENCHMARK_DIR/tmp/sampler_${safe_model_name}_${safe_prompt_name}.json"
+        local series_name="${safe_model_name}_${safe_prompt_name}"
+        if [ "$RUNS" -gt 1 ]; then
+            series_name="${series_name}_run${run}"
+        fi
+        mkdir -p "$REPORTS_DIR/resource_samples"
+        response=$(python3 "$BENCHMARK_DIR/resource_sampler.py" --rate "$SAMPLE_RATE" \
+            --series-out "$REPORTS_DIR/resource_samples/${series_name}.csv" \
+            --summary-out "$sampler_summary" -- "${request_cmd[@]}")
+        local end_time=$(date +%s.%N)
+        
+        if [ -s "$sampler_summary" ]; then
+            # Time only the request itself, not interpreter start-up
+            start_time=$(jq -r '.request_start' "$sampler_summary")
+            end_time=$(jq -r '.request_end' "$sampler_summary")
+            if [[ "$(jq -r '.samples' "$sampler_summary")" -gt 0 ]]; then
+                max_cpu=$(jq -r '.max_cpu * 100 | round / 100' "$sampler_summary")
+                avg_cpu=$(jq -r '.avg_cpu * 100 | round / 100' "$sampler_summary")
+                sampled_peak_memory=$(jq -r '.peak_rss_mb * 10 | round / 10' "$sampler_summary")
+                baseline_memory=$(jq -r '.baseline_rss_mb * 10 | round / 10' "$sampler_summary")
+                baseline_cpu=$(jq -r '.baseline_cpu // .avg_cpu | . * 100 | round / 100' "$sampler_summary")
             fi
         fi
-    done < "$pid_file"
-    
-    local avg_cpu="N/A"
-    if [[ $count -gt 0 ]]; then
-        avg_cpu=$(echo "scale=2; $sum_cpu / $count" | bc)
+        rm -f "$sampler_summary"
+    else
+        # Start CPU sampling in background
+        local pid_file="$BENCHMARK_DIR/tmp/cpu_samples_${safe_model_name}_${safe_prompt_name}.txt"
+        
+        # Function to sample CPU in background
+        (
+            while true; do
+                local cpu=$(get_cpu_usage)
+                echo "$cpu" >> "$pid_file"
+                sleep 0.5
+            done
+        ) &
+        local sampler_pid=$!
+        
+        response=$("${request_cmd[@]}")
+        
+        # End timing and CPU sampling
+        local end_time=$(date +%s.%N)
+        kill $sampler_pid 2>/dev/null
+        wait $sampler_pid 2>/dev/null
+        
+        # Process CPU samples
+        local sum_cpu=0
+        local count=0
+        
+        while IFS= read -r cpu_value; do
+            if [[ "$cpu_value" =~ ^[0-9]+(\.[0-9]+)?$ ]]; then
+                sum_cpu=$(echo "$sum_cpu + $cpu_value" | bc)
+                count=$((count + 1))
+                if (( $(echo "$cpu_value > $max_cpu" | bc -l) )); then
+                    max_cpu=$cpu_value
+                fi
+            fi
+        done < "$pid_file"
+        
+        if [[ $count -gt 0 ]]; then
+            avg_cpu=$(echo "scale=2; $sum_cpu / $count" | bc)
+        fi
+        
+        rm -f "$pid_file"
     fi
     
-    rm -f "$pid_file"
-    
     # Calculate time metrics
     local total_time=$(echo "$end_time - $start_time" | bc)
+
+    # In stream mode the wrapper above also times interpreter start-up; use the probe's own request time
+    if [ "$STREAM_MODE" = true ]; then
+        local stream_wall_time=$(echo "$response" | jq -r '.wall_time // empty | . * 1000000 | round / 1000000' 2>/dev/null)
+        if [[ "$stream_wall_time" =~ ^[0-9]+(\.[0-9]+)?$ ]]; then
+            total_time=$stream_wall_time
+        fi
+    fi
     
     # Check if response is valid JSON
     if ! echo "$response" | jq '.' &>/dev/null; then
@@ -431,8 +596,26 @@ benchmark_model_prompt() {
         fi
     fi
     
-    # Get peak memory during generation
-    local peak_memory=$(get_memory_usage)
+    # Latency breakdown from Ollama's counters (TTFT and inter-token latency need streaming mode)
+    local latency_metrics="N/A,N/A,N/A,N/A,N/A,N/A,N/A"
+    if echo "$response" | jq '.' &>/dev/null; then
+        latency_metrics=$(echo "$response" | jq -r '
+            def fmt(scale): if . == null then "N/A" else (. * scale | round / scale | tostring) end;
+            [
+                (.ttft | fmt(1000)),
+                (.itl_p50_ms | fmt(100)),
+                (.itl_p90_ms | fmt(100)),
+                (.itl_p99_ms | fmt(100)),
+                (if (.prompt_eval_duration // 0) > 0 then .prompt_eval_count / (.prompt_eval_duration / 1e9) else null end | fmt(100)),
+                (if (.eval_duration // 0) > 0 then .eval_count / (.eval_duration / 1e9) else null end | fmt(100)),
+                (if .load_duration then .load_duration / 1e9 else null end | fmt(1000))
+            ] | join(",")')
+    fi
+
+    # Get peak memory during generation (sampled peak when available, otherwise read after the request)
+    local peak_memory=${sampled_peak_memory:-$(get_memory_usage)}
+    echo "Baseline memory usage: ${baseline_memory}MB"
+    echo "Baseline CPU usage: ${baseline_cpu}%"
     local memory_used=$(echo "$peak_memory - $baseline_memory" | bc)
 
     # Gather GPU power after benchmark (if enabled)
@@ -445,7 +628,7 @@ benchmark_model_prompt() {
     fi
 
     # Append results to the result file with new metrics
-    echo "$model,$prompt_name,$baseline_memory,$peak_memory,$memory_used,$baseline_cpu,$max_cpu,$avg_cpu,$total_tokens,$generated_tokens,$tokens_per_second,$tokens_per_mb,$throughput_score,$metal_boost,$total_time,$avg_gpu_power" >> $result_file
+    echo "$model,$prompt_name,$baseline_memory,$peak_memory,$memory_used,$baseline_cpu,$max_cpu,$avg_cpu,$total_tokens,$generated_tokens,$tokens_per_second,$tokens_per_mb,$throughput_score,$metal_boost,$total_time,$avg_gpu_power,$latency_metrics" >> $result_file
     
     # Format output
     echo -e "${GREEN}Completed in ${BOLD}$(printf "%.2f" $total_time)s${NC}"
@@ -464,6 +647,12 @@ benchmark_model_prompt() {
         echo -e "GPU Power (avg): \033[1m${avg_gpu_power} W\033[0m"
     fi
 
+    local ttft=$(echo "$latency_metrics" | cut -d, -f1)
+    if [[ "$ttft" != "N/A" ]]; then
+        echo -e "Time to first token: ${BOLD}${ttft}s${NC}, inter-token p50/p90/p99: ${BOLD}$(echo "$latency_metrics" | cut -d, -f2-4 | tr ',' '/')ms${NC}"
+    fi
+    echo -e "Prefill: ${BOLD}$(echo "$latency_metrics" | cut -d, -f5)${NC} tokens/sec, Decode: ${BOLD}$(echo "$latency_metrics" | cut -d, -f6)${NC} tokens/sec, Load time: ${BOLD}$(echo "$latency_metrics" | cut -d, -f7)s${NC}"
+
     if [[ "$throughput_score" != "N/A" ]]; then
         echo -e "Efficiency score: ${BOLD}$(printf "%.2f" $throughput_score)${NC} (tokens/sec per CPU%)"
     fi
@@ -485,6 +674,7 @@ benchmark_model_prompt() {
 # Function to benchmark a single model
 benchmark_single_model() {
     local model=$1
+    local warm_model=$2
     # Use a sanitized filename with no special characters or color codes
     local safe_model_name=$(echo "$model" | tr -dc '[:alnum:]._-')
     local temp_result_file="${safe_model_name}-benchmark.csv"
@@ -502,17 +692,34 @@ benchmark_single_model() {
     # Clean up any stray temp files older than 1 day
     find "$BENCHMARK_TEMP" -name "*.csv" -type f -mtime +1 -delete 2>/dev/null || true
     
-    # Run tests with different prompt types
-    benchmark_model_prompt "$model" "$SHORT_PROMPT" "Short" "$TEMP_RESULT"
-    benchmark_model_prompt "$model" "$MEDIUM_PROMPT" "Medium" "$TEMP_RESULT"
-    benchmark_model_prompt "$model" "$CODE_PROMPT" "Code" "$TEMP_RESULT"
+    # Run tests with different prompt types (repeated --runs times)
+    local run
+    for ((run = 1; run <= RUNS; run++)); do
+        if [ "$RUNS" -gt 1 ]; then
+            echo -e "\n${BLUE}Run $run of $RUNS for $model${NC}"
+        fi
+        benchmark_model_prompt "$model" "$SHORT_PROMPT" "Short" "$TEMP_RESULT"
+        benchmark_model_prompt "$model" "$MEDIUM_PROMPT" "Medium" "$TEMP_RESULT"
+        benchmark_model_prompt "$model" "$CODE_PROMPT" "Code" "$TEMP_RESULT"
+    done
+
+    # Load the next scheduled model once this one's prompts are done. It loads while the results
+    # are written below and is waited on before returning, so the next model's baseline and first
+    # prompt never overlap the load
+    local warm_pid=""
+    if [ -n "$warm_model" ]; then
+        echo -e "${BLUE}Warming $warm_model for the next benchmark...${NC}"
+        curl -s -f -X POST "${OLLAMA_API}/api/generate" -H "Content-Type: application/json" \
+            -d "{\"model\": \"$warm_model\", \"keep_alive\": \"10m\"}" -o /dev/null &
+        warm_pid=$!
+    fi
     
     echo -e "\n${BLUE}Completed all tests for $model${NC}"
     echo "============================================================"
     
     # Add header to the combined result file if it doesn't exist
     if [ ! -f "$RESULT_FILE" ]; then
-        echo "Model,Prompt,Baseline Memory (MB),Peak Memory (MB),Memory Used (MB),Baseline CPU (%),Peak CPU (%),Avg CPU (%),Total Tokens,Generated Tokens,Tokens per Second,Tokens per MB,Throughput Score,Metal Acceleration,Total Time (s),Avg GPU Power (W)" > "$RESULT_FILE"
+        echo "Model,Prompt,Baseline Memory (MB),Peak Memory (MB),Memory Used (MB),Baseline CPU (%),Peak CPU (%),Avg CPU (%),Total Tokens,Generated Tokens,Tokens per Second,Tokens per MB,Throughput Score,Metal Acceleration,Total Time (s),Avg GPU Power (W),TTFT (s),ITL p50 (ms),ITL p90 (ms),ITL p99 (ms),Prefill Tokens/sec,Decode Tokens/sec,Load Time (s)" > "$RESULT_FILE"
     fi
     
     # Check if temp file exists and has content before appending
@@ -527,6 +734,10 @@ benchmark_single_model() {
     else
         echo "Warning: No benchmark results collected for $model"
     fi
+
+    if [ -n "$warm_pid" ] && ! wait "$warm_pid"; then
+        echo -e "${YELLOW}Warming $warm_model failed; it will load on its first prompt${NC}"
+    fi
 }
 
 # Process command line arguments
@@ -561,7 +772,7 @@ run_benchmarks() {
     echo "------------------------------------------------------------"
     
     # Create/overwrite results file with enhanced header
-    echo "Model,Prompt,Baseline Memory (MB),Peak Memory (MB),Memory Used (MB),Baseline CPU (%),Peak CPU (%),Avg CPU (%),Total Tokens,Generated Tokens,Tokens per Second,Tokens per MB,Throughput Score,Metal Acceleration,Total Time (s),Avg GPU Power (W)" > "$RESULT_FILE"
+    echo "Model,Prompt,Baseline Memory (MB),Peak Memory (MB),Memory Used (MB),Baseline CPU (%),Peak CPU (%),Avg CPU (%),Total Tokens,Generated Tokens,Tokens per Second,Tokens per MB,Throughput Score,Metal Acceleration,Total Time (s),Avg GPU Power (W),TTFT (s),ITL p50 (ms),ITL p90 (ms),ITL p99 (ms),Prefill Tokens/sec,Decode Tokens/sec,Load Time (s)" > "$RESULT_FILE"
     
     # Check if Ollama is running
     if ! curl -s "${OLLAMA_API}/api/tags" > /dev/null; then
@@ -603,8 +814,12 @@ run_benchmarks() {
         echo -e "${YELLOW}For better performance, restart Ollama with METAL_DEVICE_WRAPPER_ENABLED=1${NC}"
     fi
     
-    # Get available models
-    get_available_models
+    # Get available models (or the ones requested with --models=)
+    if [ -n "$MODELS_OVERRIDE" ]; then
+        IFS=, read -r -a models <<< "$MODELS_OVERRIDE"
+    else
+        get_available_models
+    fi
     
     # If no models were found, use a fallback
     if [ ${#models[@]} -eq 0 ]; then
@@ -612,18 +827,49 @@ run_benchmarks() {
         models=("mistral:7b-instruct")
     fi
     
+    # Start with models that are already loaded, then an order that fits the memory budget.
+    # The plan prints the predicted loads and time saved; prefetch[i] says whether the next model
+    # fits alongside model i and can be warmed as soon as model i is done
+    local prefetch=()
+    if [ "$SCHEDULE_MODE" = true ]; then
+        local model_list=$(IFS=,; echo "${models[*]}")
+        local plan_file="$REPORTS_DIR/residency_plan.csv"
+        if python3 "$BENCHMARK_DIR/residency_scheduler.py" plan --api "$OLLAMA_API" \
+                --models "$model_list" --prompts Short,Medium,Code --runs "$RUNS" \
+                --output-dir "$REPORTS_DIR" && [ -s "$plan_file" ]; then
+            models=()
+            local position planned requests size state warm
+            while IFS=, read -r position planned requests size state warm; do
+                models+=("$planned")
+                prefetch+=("$warm")
+            done < <(tail -n +2 "$plan_file" | tr -d '\r')
+            echo -e "${BLUE}Scheduled model order: ${models[*]}${NC}"
+        else
+            echo -e "${YELLOW}Residency scheduler failed; keeping the original model order${NC}"
+        fi
+    fi
+
+    # List installed models once rather than once per model
+    local installed_models=$(curl -s "${OLLAMA_API}/api/tags" | jq -r '.models[].name')
+
     # Benchmark each model
-    for model in "${models[@]}"; do
+    local index
+    for index in "${!models[@]}"; do
+        local model=${models[$index]}
+        local warm_model=""
+        if [ "${prefetch[$index]}" = "yes" ] && [ "$SEQUENTIAL_MODE" != true ]; then
+            warm_model=${models[$((index + 1))]}
+        fi
         echo -e "\n${BOLD}${GREEN}Starting benchmark for: $model${NC}"
         
         # Verify model is available
-        if ! curl -s "${OLLAMA_API}/api/tags" | jq -r '.models[].name' | grep -q "^$model\$"; then
+        if ! grep -Fqx -- "$model" <<< "$installed_models"; then
             echo -e "${YELLOW}Model $model not found, pulling it now...${NC}"
             ollama pull "$model"
         fi
         
         # Run benchmarks for this model
-        benchmark_single_model "$model"
+        benchmark_single_model "$model" "$warm_model"
         
         echo "Completed benchmarks for $model"
         
@@ -637,6 +883,101 @@ run_benchmarks() {
     
     # Process and display summary
     display_results "$RESULT_FILE" "$REPORTS_DIR"
+
+    # Measure aggregate throughput under concurrency if requested
+    if [ "$enable_load_test" = true ]; then
+        run_load_test
+    fi
+
+    # Separate cold, warm and hot load times if requested
+    if [ "$enable_model_load" = true ]; then
+        run_model_load_benchmark
+    fi
+
+    # Measure RAG-style embedding throughput if requested
+    if [ "$enable_embeddings" = true ]; then
+        run_embeddings_benchmark
+    fi
+
+    # Fit memory growth against context length if requested
+    if [ "$enable_memory_profile" = true ]; then
+        run_memory_profile
+    fi
+
+    # Append this session to the cross-session results store
+    if command -v python3 &> /dev/null; then
+        store_session
+    fi
+}
+
+# Function to run the concurrent load test for all benchmarked models
+run_load_test() {
+    echo -e "\n${BOLD}${GREEN}CONCURRENT LOAD TEST (${LOAD_MODE} loop)${NC}"
+    echo "============================================================"
+
+    local model_list=$(IFS=,; echo "${models[*]}")
+    python3 "$BENCHMARK_DIR/load_generator.py" \
+        --api "$OLLAMA_API" \
+        --models "$model_list" \
+        --mode "$LOAD_MODE" \
+        --concurrency "$LOAD_CONCURRENCY" \
+        --rates "$LOAD_RATES" \
+        --duration "$LOAD_DURATION" \
+        --output-dir "$REPORTS_DIR"
+
+    if [ $? -ne 0 ]; then
+        echo -e "${RED}Load test failed. See output above for details.${NC}"
+    fi
+}
+
+# Function to run the cold/warm/hot model load benchmark for all benchmarked models
+run_model_load_benchmark() {
+    echo -e "\n${BOLD}${GREEN}MODEL LOAD BENCHMARK (cold / warm / hot)${NC}"
+    echo "============================================================"
+
+    local model_list=$(IFS=,; echo "${models[*]}")
+    python3 "$BENCHMARK_DIR/model_load_benchmark.py" \
+        --api "$OLLAMA_API" \
+        --models "$model_list" \
+        --repeats "$MODEL_LOAD_REPEATS" \
+        --output-dir "$REPORTS_DIR"
+
+    if [ $? -ne 0 ]; then
+        echo -e "${RED}Model load benchmark failed. See output above for details.${NC}"
+    fi
+}
+
+# Function to run the embeddings benchmark (batch size x document length x concurrency)
+run_embeddings_benchmark() {
+    echo -e "\n${BOLD}${GREEN}EMBEDDINGS BENCHMARK${NC}"
+    echo "============================================================"
+
+    local embed_args=(--api "$OLLAMA_API" --output-dir "$REPORTS_DIR")
+    if [ -n "$EMBED_MODELS" ]; then
+        embed_args+=(--models "$EMBED_MODELS")
+    fi
+    python3 "$BENCHMARK_DIR/embeddings_benchmark.py" "${embed_args[@]}"
+
+    if [ $? -ne 0 ]; then
+        echo -e "${RED}Embeddings benchmark failed. See output above for details.${NC}"
+    fi
+}
+
+# Function to profile memory against context length and predict capacity
+run_memory_profile() {
+    echo -e "\n${BOLD}${GREEN}MEMORY PROFILE (context length sweep)${NC}"
+    echo "============================================================"
+
+    local model_list=$(IFS=,; echo "${models[*]}")
+    python3 "$BENCHMARK_DIR/memory_profile.py" \
+        --api "$OLLAMA_API" \
+        --models "$model_list" \
+        --contexts "$MEMORY_CONTEXTS" \
+        --output-dir "$REPORTS_DIR"
+
+    if [ $? -ne 0 ]; then
+        echo -e "${RED}Memory profile failed. See output above for details.${NC}"
+    fi
 }
 
 # Function to display results in a readable format
@@ -650,52 +991,67 @@ display_results() {
     # Calculate averages for each model with enhanced metrics
     echo -e "${BOLD}Models Performance Analysis (with Metal):${NC}"
     
-    # Use awk to calculate averages from the CSV with enhanced metrics
-    awk -F, 'NR>1 {
-        sum_memory[$1] += $5; 
-        sum_peak_cpu[$1] += $7;
-        sum_avg_cpu[$1] += $8;
-        sum_tokens[$1] += $11; 
-        sum_tokens_per_mb[$1] += $12;
-        sum_throughput[$1] += $13;
-        sum_time[$1] += $15;
-        if ($16 ~ /^[0-9.]+$/) sum_gpu_power[$1] += $16;
-        count[$1]++
-    } 
-    END {
-        print "Model,Avg Memory (MB),Avg Peak CPU (%),Avg CPU (%),Avg Tokens/sec,Avg Tokens/MB,Avg Throughput Score,Metal Acceleration,Avg Time (s),Avg GPU Power (W)";
-        for (model in count) {
-            printf "%s,%.1f,%.2f,%.2f,%.2f,%.2f,%.2f,%s,%.2f,%.2f\n", 
-                model, 
-                sum_memory[model]/count[model],
-                sum_peak_cpu[model]/count[model],
-                sum_avg_cpu[model]/count[model],
-                sum_tokens[model]/count[model],
-                sum_tokens_per_mb[model]/count[model],
-                sum_throughput[model]/count[model],
-                "Enabled",
-                sum_time[model]/count[model],
-                (model in sum_gpu_power && count[model] > 0) ? sum_gpu_power[model]/count[model] : 0
-        }
-    }' "$result_file" > "${reports_dir}/summary.csv"
-    
-    # Sort by memory usage (highest to lowest)
-    echo -e "\n${BOLD}By Memory Usage (Highest to Lowest):${NC}"
-    sort -t, -k2 -nr "${reports_dir}/summary.csv" | column -t -s, | head -n 1
-    echo "--------------------------------------------------------------"
-    sort -t, -k2 -nr "${reports_dir}/summary.csv" | tail -n +2 | column -t -s,
-    
-    # Sort by tokens per second (highest to lowest)
-    echo -e "\n${BOLD}By Inference Speed (Fastest to Slowest):${NC}"
-    sort -t, -k5 -nr "${reports_dir}/summary.csv" | column -t -s, | head -n 1
-    echo "--------------------------------------------------------------"
-    sort -t, -k5 -nr "${reports_dir}/summary.csv" | tail -n +2 | column -t -s,
-    
-    # Sort by efficiency (throughput score - highest to lowest)
-    echo -e "\n${BOLD}By Hardware Efficiency (Best to Worst):${NC}"
-    sort -t, -k7 -nr "${reports_dir}/summary.csv" | column -t -s, | head -n 1
-    echo "--------------------------------------------------------------"
-    sort -t, -k7 -nr "${reports_dir}/summary.csv" | tail -n +2 | column -t -s,
+    # Aggregate with the pandas summary engine (mean/std/percentiles per model x prompt, plus the
+    # legacy summary.csv); fall back to the awk averages when pandas isn't installed
+    if command -v python3 &> /dev/null && python3 -c "import pandas" &> /dev/null && \
+        python3 "$BENCHMARK_DIR/summarize_results.py" "$reports_dir" --print; then
+        echo -e "${BLUE}Per-prompt statistics saved to: ${reports_dir}/summary_detailed.csv${NC}"
+    else
+        # Use awk to calculate averages from the CSV with enhanced metrics
+        awk -F, 'NR>1 {
+            sum_memory[$1] += $5; 
+            sum_peak_cpu[$1] += $7;
+            sum_avg_cpu[$1] += $8;
+            sum_tokens[$1] += $11; 
+            sum_tokens_per_mb[$1] += $12;
+            sum_throughput[$1] += $13;
+            sum_time[$1] += $15;
+            if ($16 ~ /^[0-9.]+$/) sum_gpu_power[$1] += $16;
+            # Latency breakdown columns are N/A when not available (e.g. TTFT without --stream)
+            for (i = 17; i <= 23; i++) {
+                if ($i ~ /^[0-9.]+$/) { sum_latency[$1, i] += $i; count_latency[$1, i]++ }
+            }
+            count[$1]++
+        } 
+        END {
+            print "Model,Avg Memory (MB),Avg Peak CPU (%),Avg CPU (%),Avg Tokens/sec,Avg Tokens/MB,Avg Throughput Score,Metal Acceleration,Avg Time (s),Avg GPU Power (W),Avg TTFT (s),Avg ITL p50 (ms),Avg ITL p90 (ms),Avg ITL p99 (ms),Avg Prefill Tokens/sec,Avg Decode Tokens/sec,Avg Load Time (s)";
+            for (model in count) {
+                line = sprintf("%s,%.1f,%.2f,%.2f,%.2f,%.2f,%.2f,%s,%.2f,%.2f", 
+                    model, 
+                    sum_memory[model]/count[model],
+                    sum_peak_cpu[model]/count[model],
+                    sum_avg_cpu[model]/count[model],
+                    sum_tokens[model]/count[model],
+                    sum_tokens_per_mb[model]/count[model],
+                    sum_throughput[model]/count[model],
+                    "Enabled",
+                    sum_time[model]/count[model],
+                    (model in sum_gpu_power && count[model] > 0) ? sum_gpu_power[model]/count[model] : 0)
+                for (i = 17; i <= 23; i++) {
+                    line = line "," (((model, i) in count_latency) ? sprintf("%.3f", sum_latency[model, i]/count_latency[model, i]) : "N/A")
+                }
+                print line
+            }
+        }' "$result_file" > "${reports_dir}/summary.csv"
+        
+        # Sort by memory usage (highest to lowest)
+        echo -e "\n${BOLD}By Memory Usage (Highest to Lowest):${NC}"
+        sort -t, -k2 -nr "${reports_dir}/summary.csv" | column -t -s, | head -n 1
+        echo "--------------------------------------------------------------"
+        sort -t, -k2 -nr "${reports_dir}/summary.csv" | tail -n +2 | column -t -s,
+    
+        # Sort by tokens per second (highest to lowest)
+        echo -e "\n${BOLD}By Inference Speed (Fastest to Slowest):${NC}"
+        sort -t, -k5 -nr "${reports_dir}/summary.csv" | column -t -s, | head -n 1
+        echo "--------------------------------------------------------------"
+        sort -t, -k5 -nr "${reports_dir}/summary.csv" | tail -n +2 | column -t -s,
+    
+        # Sort by efficiency (throughput score - highest to lowest)
+        echo -e "\n${BOLD}By Hardware Efficiency (Best to Worst):${NC}"
+        sort -t, -k7 -nr "${reports_dir}/summary.csv" | column -t -s, | head -n 1
+        echo "--------------------------------------------------------------"
+        sort -t, -k7 -nr "${reports_dir}/summary.csv" | tail -n +2 | column -t -s,
+    fi
     
     # Create performance summary text file
     echo -e "${BOLD}${GREEN}PERFORMANCE METRICS EXPLAINED${NC}" > "${reports_dir}/performance_metrics.txt"
@@ -745,7 +1101,12 @@ display_results() {
 
 # Check for required tools
 check_requirements() {
-    for cmd in curl jq bc awk column; do
+    local required=(curl jq bc awk column)
+    if [ "$enable_load_test" = true ] || [ "$STREAM_MODE" = true ] || [ "$enable_model_load" = true ] || \
+        [ "$enable_embeddings" = true ] || [ "$enable_memory_profile" = true ] || [ "$SCHEDULE_MODE" = true ]; then
+        required+=(python3)
+    fi
+    for cmd in "${required[@]}"; do
         if ! command -v $cmd &> /dev/null; then
             echo "Error: Required tool '$cmd' is not installed"
             exit 1
@@ -765,6 +1126,25 @@ echo -e "${BOLD}${GREEN}LLM Model Benchmarking Tool with Metal Acceleration${NC}
 echo -e "${BLUE}Optimized for Apple Silicon GPUs${NC}"
 echo "============================================================"
 
+# Fleet mode runs the workload on remote endpoints, so no local Ollama is needed
+if [ -n "$FLEET_INVENTORY" ]; then
+    if ! command -v python3 &> /dev/null; then
+        echo "Error: Required tool 'python3' is not installed"
+        exit 1
+    fi
+    fleet_args=(--inventory "$FLEET_INVENTORY" --mode "$FLEET_MODE" --duration "$LOAD_DURATION" --output-dir "$REPORTS_DIR")
+    if [ -n "$MODELS_OVERRIDE" ]; then
+        fleet_args+=(--models "$MODELS_OVERRIDE")
+    fi
+    if [ "$STREAM_MODE" = true ]; then
+        fleet_args+=(--stream)
+    fi
+    python3 "$BENCHMARK_DIR/fleet_benchmark.py" "${fleet_args[@]}" || exit 1
+    store_session
+    echo -e "\n${GREEN}Fleet benchmark completed!${NC}"
+    exit 0
+fi
+
 check_requirements
 run_benchmarks
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Python benchmarking tools
+Session directories, the standard prompts and small statistics helpers
+"""
+
+import csv
+import math
+import os
+import re
+from datetime import datetime
+
+# Benchmark directory (where this file and benchmark-models.sh live)
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Reports base directory shared with the shell scripts
+REPORTS_BASE_DIR = os.path.join(BENCHMARK_DIR, 'benchmark-reports')
+
+# Session directory names use the same timestamp as benchmark-models.sh
+SESSION_FORMAT = '%Y-%m-%d_%H:%M:%S'
+SESSION_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}_\d{2}:\d{2}:\d{2}')
+
+# Ollama API endpoint (same default as benchmark-models.sh)
+DEFAULT_OLLAMA_API = os.environ.get('OLLAMA_API', 'http://127.0.0.1:11434')
+
+# Prompts used by benchmark_single_model, in the order they are run
+DEFAULT_PROMPT_NAMES = ['Short', 'Medium', 'Code']
+
+def session_dir(session=None, output_dir=None, base_dir=REPORTS_BASE_DIR):
+    """Return (and create) the report directory for a session, starting a new one if needed.
+
+    An explicit output_dir takes precedence over the session timestamp.
+    """
+    if output_dir:
+        path = output_dir
+    else:
+        path = os.path.join(base_dir, session or datetime.now().strftime(SESSION_FORMAT))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def load_prompts(names=None, script_path=None):
+    """Read the standardized prompts from benchmark-models.sh so both harnesses stay in sync."""
+    script_path = script_path or os.path.join(BENCHMARK_DIR, 'benchmark-models.sh')
+    prompts = {}
+    with open(script_path, 'r') as f:
+        for line in f:
+            match = re.match(r'^([A-Z]+)_PROMPT="(.*)"\s*$', line)
+            if match:
+                prompts[match.group(1).capitalize()] = match.group(2)
+
+    names = names or DEFAULT_PROMPT_NAMES
+    missing = [name for name in names if name not in prompts]
+    if missing:
+        raise ValueError(f"Prompts not found in {script_path}: {missing}")
+    return [(name, prompts[name]) for name in names]
+
+def percentile(values, pct):
+    """Linear-interpolated percentile (same definition as numpy's default)."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return ordered[int(rank)]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def format_value(value, precision=2):
+    """Format a metric for CSV output, using N/A for missing values like the shell harness."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'N/A'
+    if isinstance(value, float):
+        return f"{value:.{precision}f}"
+    return value
+
+def write_csv(path, header, rows):
+    """Write rows to a CSV file with a header line."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow([format_value(value) for value in row])
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Embeddings benchmark for Ollama
+Sweeps batch size, document length and client concurrency against /api/embed (and the
+single-text /api/embeddings endpoint), the traffic pattern of RAG ingestion through Open WebUI
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+from benchmark_common import DEFAULT_OLLAMA_API, format_value, load_prompts, percentile, session_dir, write_csv
+from load_generator import parse_list
+from ollama_client import OllamaClient
+from resource_sampler import ResourceSampler
+
+RESULTS_FILE = 'embeddings_results.csv'
+SUMMARY_FILE = 'embeddings_summary.csv'
+ENDPOINTS = {'embed': '/api/embed', 'embeddings': '/api/embeddings'}
+EMBEDDING_FAMILIES = {'bert', 'nomic-bert'}
+
+RESULTS_HEADER = [
+    'Model', 'Endpoint', 'Batch Size', 'Doc Length (tokens)', 'Concurrency', 'Start Offset (s)',
+    'Latency (s)', 'Status', 'Docs', 'Tokens', 'Token Source', 'Load Duration (s)', 'Error',
+]
+
+SUMMARY_HEADER = [
+    'Model', 'Endpoint', 'Batch Size', 'Doc Length (tokens)', 'Concurrency', 'Requests', 'Errors',
+    'Wall Time (s)', 'Docs/sec', 'Tokens/sec', 'Token Source', 'Latency Mean (s)', 'Latency p50 (s)', 'Latency p95 (s)',
+    'Latency p99 (s)', 'Avg CPU (%)', 'Peak RSS (MB)',
+]
+
+# Embedding requests often take milliseconds, so latencies are written with more precision
+LATENCY_KEYS = ['latency_mean', 'latency_p50', 'latency_p95', 'latency_p99']
+
+def make_documents(length, count, seed_words):
+    """Build `count` distinct documents of about `length` tokens (one word ~ one token).
+
+    Each document starts with its own index so no two batches are identical, which keeps
+    response caches (like the gateway's) from flattering the numbers. Requests repeat only
+    once a level sends more requests than there are batches.
+    """
+    words = list(itertools.islice(itertools.cycle(seed_words), length + count * 7))
+    return [' '.join([f"Document {i}:"] + words[i * 7:i * 7 + max(length - 2, 1)]) for i in range(count)]
+
+async def count_tokens(client, model, docs):
+    """Server token counts per document, from one untimed /api/embed call each.
+
+    /api/embeddings reports no token count, so this lets both endpoints report server tokens.
+    Documents the server doesn't count are left out and fall back to the word count.
+    """
+    counts = {}
+    for doc in set(docs):
+        try:
+            count = (await client.embed(model, [doc])).get('prompt_eval_count')
+        except Exception:
+            continue
+        if count:
+            counts[doc] = count
+    return counts
+
+async def embed_request(client, model, endpoint, docs, doc_tokens=None):
+    """Send one batch (or, for the legacy endpoint, one text) and return its measurement record."""
+    record = {'docs': len(docs), 'status': 'ok', 'error': '', 'start': time.perf_counter()}
+    try:
+        if endpoint == 'embed':
+            response = await client.embed(model, docs)
+            tokens = response.get('prompt_eval_count')
+            if len(response.get('embeddings', [])) != len(docs):
+                raise RuntimeError(f"expected {len(docs)} embeddings, got {len(response.get('embeddings', []))}")
+            record['load_duration'] = response.get('load_duration', 0) / 1e9
+        else:
+            response = await client.embeddings(model, docs[0])
+            tokens = (doc_tokens or {}).get(docs[0])
+            if not response.get('embedding'):
+                raise RuntimeError('empty embedding')
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e) or type(e).__name__
+    else:
+        # Older servers omit prompt_eval_count; fall back to the word count and say so
+        record['tokens'] = tokens or sum(len(doc.split()) for doc in docs)
+        record['token_source'] = 'server' if tokens else 'words'
+    record['end'] = time.perf_counter()
+    record['latency'] = record['end'] - record['start']
+    return record
+
+async def run_level(client, model, endpoint, batch_size, docs, concurrency, requests, duration, doc_tokens=None):
+    """Closed loop: `concurrency` clients each send the next batch as soon as the previous returns."""
+    batches = itertools.cycle([docs[i:i + batch_size] for i in range(0, len(docs) - batch_size + 1, batch_size)])
+    deadline = time.perf_counter() + duration
+    issued = 0
+    records = []
+
+    async def worker():
+        nonlocal issued
+        while issued < requests and time.perf_counter() < deadline:
+            issued += 1
+            records.append(await embed_request(client, model, endpoint, next(batches), doc_tokens))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return records
+
+def summarize(records):
+    ok = [r for r in records if r['status'] == 'ok']
+    wall_time = max(r['end'] for r in records) - min(r['start'] for r in records)
+    latencies = [r['latency'] for r in ok]
+    sources = {r['token_source'] for r in ok}
+    return {
+        'requests': len(records),
+        'errors': len(records) - len(ok),
+        'wall_time': wall_time,
+        'docs_per_sec': sum(r['docs'] for r in ok) / wall_time if wall_time > 0 else None,
+        'tokens_per_sec': sum(r['tokens'] for r in ok) / wall_time if wall_time > 0 else None,
+        'token_source': sources.pop() if len(sources) == 1 else ('mixed' if sources else None),
+        'latency_mean': sum(latencies) / len(latencies) if latencies else None,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+    }
+
+async def get_embedding_models(client, requested):
+    """Use the requested models, or installed models that look like embedding models."""
+    if requested:
+        return requested
+    models = (await client.tags()).get('models', [])
+    return [m['name'] for m in models
+            if 'embed' in m['name'] or (m.get('details') or {}).get('family') in EMBEDDING_FAMILIES]
+
+def render_charts(summary_path, output_dir):
+    try:
+        from visualize_benchmarks import visualize
+        rendered, cached, failed = visualize([(summary_path, output_dir)], ['embeddings_throughput', 'embeddings_latency'])
+        print(f"Embeddings charts: {rendered} rendered, {cached} up to date, {failed} failed")
+    except ImportError as e:
+        print(f"Skipping embeddings charts ({e}); install pandas and matplotlib to render them")
+
+async def run(args):
+    seed_words = ' '.join(text for _, text in load_prompts(['Short', 'Medium', 'Long', 'Code'])).split()
+    output_dir = session_dir(args.session, args.output_dir)
+    levels = list(itertools.product(args.endpoints, args.batch_sizes, args.doc_lengths, args.concurrency))
+    sampler = ResourceSampler(rate=args.sample_rate).start() if args.sample_rate > 0 else None
+
+    results, summary = [], []
+    max_connections = max(args.concurrency)
+    async with OllamaClient(args.api, max_connections=max_connections, timeout=args.timeout) as client:
+        models = await get_embedding_models(client, args.models)
+        if not models:
+            print("Error: No embedding models found; pass --models (e.g. nomic-embed-text).")
+            return 1
+        for model in models:
+            print(f"\nEmbeddings benchmark: {model}")
+            # Load the model first so the first level doesn't include load time
+            try:
+                await client.embed(model, 'warm up')
+            except Exception as e:
+                print(f"Error: Could not load {model}: {str(e) or type(e).__name__}")
+                continue
+            for endpoint, batch_size, doc_length, concurrency in levels:
+                if endpoint == 'embeddings' and batch_size != 1:
+                    continue  # the legacy endpoint takes exactly one text
+                distinct_batches = args.distinct_batches or args.requests
+                docs = make_documents(doc_length, max(batch_size * distinct_batches, batch_size), seed_words)
+                doc_tokens = await count_tokens(client, model, docs) if endpoint == 'embeddings' else None
+                level_start = time.time()
+                records = await run_level(client, model, endpoint, batch_size, docs, concurrency,
+                                          args.requests, args.duration, doc_tokens)
+                level_end = time.time()
+                if not records:
+                    continue
+                stats = summarize(records)
+                resources = sampler.summary(level_start, level_end) if sampler else {}
+                origin = min(r['start'] for r in records)
+                for r in records:
+                    results.append([model, endpoint, batch_size, doc_length, concurrency, r['start'] - origin,
+                                    format_value(r['latency'], 4), r['status'], r['docs'], r.get('tokens'),
+                                    r.get('token_source'), r.get('load_duration'), r['error']])
+                summary.append([model, endpoint, batch_size, doc_length, concurrency, stats['requests'],
+                                stats['errors'], stats['wall_time'], stats['docs_per_sec'], stats['tokens_per_sec'],
+                                stats['token_source'], *(format_value(stats[key], 4) for key in LATENCY_KEYS),
+                                resources.get('avg_cpu'), resources.get('peak_rss_mb')])
+                print(f"  {endpoint:<10} batch {batch_size:>3} x {doc_length:>5} tokens, {concurrency:>2} clients: "
+                      f"{stats['docs_per_sec'] or 0:8.1f} docs/s, {stats['tokens_per_sec'] or 0:9.1f} tokens/s, "
+                      f"p95 {stats['latency_p95']:.3f}s" + (f", {stats['errors']} errors" if stats['errors'] else ''))
+
+    if sampler:
+        sampler.stop()
+
+    write_csv(os.path.join(output_dir, RESULTS_FILE), RESULTS_HEADER, results)
+    summary_path = os.path.join(output_dir, SUMMARY_FILE)
+    write_csv(summary_path, SUMMARY_HEADER, summary)
+    print(f"\nEmbeddings results saved to: {output_dir}/{RESULTS_FILE}")
+    print(f"Embeddings summary saved to: {summary_path}")
+    if summary and not args.no_charts:
+        render_charts(summary_path, output_dir)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Ollama embedding throughput and latency.')
+    parser.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+    parser.add_argument('--models', type=parse_list(str), help='Comma-separated embedding models (default: installed ones)')
+    parser.add_argument('--endpoints', type=parse_list(str), default=['embed'],
+                        help='Comma-separated endpoints: embed (batched), embeddings (legacy, single text)')
+    parser.add_argument('--batch-sizes', type=parse_list(int), default=[1, 8, 32], help='Texts per /api/embed request')
+    parser.add_argument('--doc-lengths', type=parse_list(int), default=[64, 256, 1024],
+                        help='Approximate document lengths in tokens')
+    parser.add_argument('--concurrency', type=parse_list(int), default=[1, 4], help='Concurrent client levels')
+    parser.add_argument('--requests', type=int, default=20, help='Requests per level')
+    parser.add_argument('--duration', type=float, default=60, help='Maximum seconds per level')
+    parser.add_argument('--distinct-batches', type=int,
+                        help='Distinct batches cycled through per level (default: one per request)')
+    parser.add_argument('--sample-rate', type=float, default=20,
+                        help='Resource samples per second for the Ollama process tree (0 disables)')
+    parser.add_argument('--timeout', type=float, default=600, help='Per-read timeout in seconds')
+    parser.add_argument('--no-charts', action='store_true', help='Skip rendering embeddings charts')
+    parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    args = parser.parse_args()
+    unknown = [endpoint for endpoint in args.endpoints if endpoint not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
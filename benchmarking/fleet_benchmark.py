@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Fleet benchmark coordinator
+Runs the same closed-loop workload against every Ollama endpoint in an inventory, one host
+at a time, all hosts at once, or round-robin across hosts, and merges the results into one
+session with per-host and fleet-aggregate summaries
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import shlex
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from benchmark_common import DEFAULT_PROMPT_NAMES, load_prompts, session_dir, write_csv
+from load_generator import closed_loop, parse_list, run_request, summarize
+from ollama_client import OllamaClient
+
+RESULTS_FILE = 'fleet_results.csv'
+SUMMARY_FILE = 'fleet_summary.csv'
+HOSTS_FILE = 'fleet_hosts.csv'
+FLEET = 'FLEET'
+
+RESULTS_HEADER = [
+    'Host', 'Model', 'Mode', 'Concurrency', 'Prompt', 'Start Offset (s)', 'Latency (s)', 'Status',
+    'Prompt Tokens', 'Generated Tokens', 'Eval Duration (s)', 'Load Duration (s)', 'TTFT (s)', 'Error',
+]
+
+SUMMARY_HEADER = [
+    'Host', 'Hardware', 'Model', 'Mode', 'Concurrency', 'Requests', 'Errors', 'Wall Time (s)',
+    'Requests/sec', 'Tokens/sec', 'Avg Tokens/sec per Request', 'Latency Mean (s)', 'Latency p50 (s)',
+    'Latency p95 (s)', 'Latency p99 (s)', 'TTFT p50 (s)', 'Sum of Host Tokens/sec',
+]
+
+HOSTS_HEADER = ['Host', 'URL', 'Hostname', 'CPU Model', 'CPU Cores', 'Total Memory (MB)', 'Ollama Version', 'Status']
+
+# Same facts get_hardware_info in benchmark-models.sh collects, on macOS or Linux
+HARDWARE_PROBE = r'''
+echo "Hostname: $(hostname)"
+echo "CPU Model: $(sysctl -n machdep.cpu.brand_string 2>/dev/null || grep -m1 'model name' /proc/cpuinfo 2>/dev/null | cut -d: -f2 | sed 's/^ *//' || echo Unknown)"
+echo "CPU Cores: $(sysctl -n hw.ncpu 2>/dev/null || nproc 2>/dev/null || echo Unknown)"
+mem=$(sysctl -n hw.memsize 2>/dev/null || awk '/MemTotal/ {print $2 * 1024}' /proc/meminfo 2>/dev/null)
+echo "Total System Memory: $(echo "$mem" | awk '{printf "%.0f", $1/1024/1024}')MB"
+'''
+
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1'}
+
+def read_inventory(path):
+    """Parse an inventory file: `name url [ssh=user@host] [hardware="..."]` per line, # comments."""
+    hosts = []
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            fields = shlex.split(line, comments=True)
+            if not fields:
+                continue
+            if len(fields) < 2:
+                raise ValueError(f"{path}:{line_number}: expected 'name url [key=value ...]'")
+            host = {'name': fields[0], 'url': fields[1]}
+            for field in fields[2:]:
+                key, _, value = field.partition('=')
+                host[key] = value
+            hosts.append(host)
+    names = [host['name'] for host in hosts]
+    if len(set(names)) != len(names) or FLEET in names:
+        raise ValueError(f"{path}: host names must be unique and not '{FLEET}'")
+    return hosts
+
+def probe_hardware(host, timeout=15):
+    """Collect hardware info locally or over ssh; returns a dict of get_hardware_info fields."""
+    if host.get('ssh'):
+        command = ['ssh', '-o', 'BatchMode=yes', '-o', f'ConnectTimeout={timeout}', host['ssh'], HARDWARE_PROBE]
+    elif urlsplit(host['url']).hostname in LOCAL_HOSTS:
+        command = ['bash', '-c', HARDWARE_PROBE]
+    else:
+        return {}
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=timeout).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    info = {}
+    for line in output.splitlines():
+        key, _, value = line.partition(':')
+        if value.strip():
+            info[key.strip()] = value.strip()
+    return info
+
+def hardware_label(host):
+    """Short description used to tag rows, e.g. 'Apple M2 Max, 32 cores, 98304MB'."""
+    if host.get('hardware'):
+        return host['hardware']
+    info = host.get('info', {})
+    parts = [info.get('CPU Model'), f"{info['CPU Cores']} cores" if info.get('CPU Cores') else None,
+             info.get('Total System Memory')]
+    return ', '.join(part for part in parts if part) or 'Unknown'
+
+async def inspect_host(host, timeout):
+    """Check the endpoint and record its Ollama version and installed models."""
+    host['info'] = await asyncio.to_thread(probe_hardware, host)
+    try:
+        async with OllamaClient(host['url'], max_connections=1, timeout=timeout) as client:
+            host['version'] = (await client.request('GET', '/api/version')).get('version', 'Unknown')
+            host['models'] = {m['name'] for m in (await client.tags()).get('models', [])}
+            host['status'] = 'ok'
+    except Exception as e:
+        host['models'] = set()
+        host['status'] = f"unreachable: {e}"
+    return host
+
+def tag(records, host_name):
+    for record in records:
+        record['host'] = host_name
+    return records
+
+async def run_host(host, model, prompts, args, options):
+    async with OllamaClient(host['url'], max_connections=args.concurrency, timeout=args.timeout) as client:
+        if not args.no_warmup:
+            await run_request(client, model, *prompts[0], options)
+        records = await closed_loop(client, model, prompts, args.concurrency, args.duration,
+                                    args.requests, options, args.stream)
+    return tag(records, host['name'])
+
+async def run_round_robin(hosts, model, prompts, args, options):
+    """One closed loop whose requests are dispatched to the hosts in turn (like a simple load balancer)."""
+    clients = [(host['name'], OllamaClient(host['url'], max_connections=args.concurrency, timeout=args.timeout))
+               for host in hosts]
+    if not args.no_warmup:
+        await asyncio.gather(*(run_request(client, model, *prompts[0], options) for _, client in clients))
+    prompt_cycle = itertools.cycle(prompts)
+    host_cycle = itertools.cycle(clients)
+    deadline = time.perf_counter() + args.duration
+    issued = 0
+    records = []
+
+    async def user():
+        nonlocal issued
+        while time.perf_counter() < deadline and (not args.requests or issued < args.requests):
+            issued += 1
+            name, client = next(host_cycle)
+            prompt_name, prompt = next(prompt_cycle)
+            record = await run_request(client, model, prompt_name, prompt, options, stream=args.stream)
+            record['host'] = name
+            records.append(record)
+
+    try:
+        await asyncio.gather(*(user() for _ in range(args.concurrency)))
+    finally:
+        for _, client in clients:
+            await client.close()
+    return records
+
+def summary_row(host_name, hardware, model, mode, concurrency, stats, host_tps_sum=None):
+    return [
+        host_name, hardware, model, mode, concurrency, stats['requests'], stats['errors'], stats['wall_time'],
+        stats['requests_per_sec'], stats['tokens_per_sec'], stats['avg_request_tps'], stats['latency_mean'],
+        stats['latency_p50'], stats['latency_p95'], stats['latency_p99'], stats['ttft_p50'], host_tps_sum,
+    ]
+
+def result_rows(model, mode, concurrency, records, origin):
+    for r in sorted(records, key=lambda r: r['start']):
+        yield [
+            r['host'], model, mode, concurrency, r['prompt'], r['start'] - origin, r['latency'], r['status'],
+            r.get('prompt_tokens'), r.get('generated_tokens'), r.get('eval_duration'), r.get('load_duration'),
+            r.get('ttft'), r['error'],
+        ]
+
+def write_hardware_info(path, hosts):
+    """Session-level hardware_info.txt: a fleet host name first, then one block per host."""
+    with open(path, 'w') as f:
+        f.write(f"Hostname: fleet({','.join(host['name'] for host in hosts)})\n")
+        f.write(f"Fleet Hosts: {len(hosts)}\n")
+        for host in hosts:
+            f.write(f"\n[{host['name']}] {host['url']} (Ollama {host.get('version', 'Unknown')})\n")
+            for key, value in host.get('info', {}).items():
+                f.write(f"  {key}: {value}\n")
+
+def render_charts(summary_path, output_dir):
+    try:
+        from visualize_benchmarks import visualize
+        rendered, cached, failed = visualize([(summary_path, output_dir)], ['fleet_throughput', 'fleet_latency'])
+        print(f"Fleet charts: {rendered} rendered, {cached} up to date, {failed} failed")
+    except ImportError as e:
+        print(f"Skipping fleet charts ({e}); install pandas and matplotlib to render them")
+
+async def run_fleet(args):
+    hosts = read_inventory(args.inventory) if args.inventory else [
+        {'name': urlsplit(url).hostname or url, 'url': url} for url in args.hosts]
+    if not hosts:
+        print("Error: No hosts given (use --inventory or --hosts).")
+        return 1
+
+    print(f"Inspecting {len(hosts)} hosts...")
+    await asyncio.gather(*(inspect_host(host, args.timeout) for host in hosts))
+    for host in hosts:
+        print(f"  {host['name']:<16} {host['url']:<32} {host['status']:<12} {hardware_label(host)}")
+    active = [host for host in hosts if host['status'] == 'ok']
+    if not active:
+        print("Error: No reachable hosts.")
+        return 1
+
+    models = args.models or sorted(set.intersection(*(host['models'] for host in active)))
+    if not models:
+        print("Error: No model is installed on every reachable host; pass --models.")
+        return 1
+
+    prompts = load_prompts(args.prompts)
+    options = {'num_predict': args.num_predict} if args.num_predict else None
+    output_dir = session_dir(args.session, args.output_dir)
+    results, summary = [], []
+
+    for model in models:
+        targets = [host for host in active if model in host['models'] or args.models]
+        print(f"\n{model}: {args.mode} run on {len(targets)} hosts, {args.concurrency} concurrent users each"
+              if args.mode != 'round-robin' else
+              f"\n{model}: round-robin over {len(targets)} hosts, {args.concurrency} concurrent users")
+        if args.mode == 'concurrent':
+            per_host = await asyncio.gather(*(run_host(host, model, prompts, args, options) for host in targets))
+        elif args.mode == 'sequential':
+            per_host = [await run_host(host, model, prompts, args, options) for host in targets]
+        else:
+            records = await run_round_robin(targets, model, prompts, args, options)
+            per_host = [[r for r in records if r['host'] == host['name']] for host in targets]
+
+        all_records = [record for records in per_host for record in records]
+        if not all_records:
+            continue
+        origin = min(r['start'] for r in all_records)
+        host_tps = []
+        for host, records in zip(targets, per_host):
+            stats = summarize(records)
+            if stats is None:
+                continue
+            host_tps.append(stats['tokens_per_sec'] or 0.0)
+            summary.append(summary_row(host['name'], hardware_label(host), model, args.mode, args.concurrency, stats))
+            print(f"  {host['name']:<16} {stats['requests']:>5} requests, "
+                  f"{stats['tokens_per_sec'] or 0:8.2f} tokens/s, p95 {stats['latency_p95']:.2f}s")
+            results.extend(result_rows(model, args.mode, args.concurrency, records, origin))
+
+        # Sequential runs never overlap, so the measured fleet rate understates capacity; the sum doesn't
+        fleet = summarize(all_records)
+        summary.append(summary_row(FLEET, f"{len(targets)} hosts", model, args.mode, args.concurrency,
+                                   fleet, sum(host_tps)))
+        print(f"  {FLEET:<16} {fleet['requests']:>5} requests, {fleet['tokens_per_sec'] or 0:8.2f} tokens/s "
+              f"measured, {sum(host_tps):.2f} tokens/s sum of hosts")
+
+    write_hardware_info(os.path.join(output_dir, 'hardware_info.txt'), hosts)
+    write_csv(os.path.join(output_dir, HOSTS_FILE), HOSTS_HEADER, [
+        [host['name'], host['url'], host['info'].get('Hostname'), host['info'].get('CPU Model'),
+         host['info'].get('CPU Cores'), (host['info'].get('Total System Memory') or '').rstrip('MB') or None,
+         host.get('version'), host['status']]
+        for host in hosts])
+    write_csv(os.path.join(output_dir, RESULTS_FILE), RESULTS_HEADER, results)
+    summary_path = os.path.join(output_dir, SUMMARY_FILE)
+    write_csv(summary_path, SUMMARY_HEADER, summary)
+    print(f"\nFleet results saved to: {output_dir}/{RESULTS_FILE}")
+    print(f"Fleet summary saved to: {summary_path}")
+    if summary and not args.no_charts:
+        render_charts(summary_path, output_dir)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark a fleet of Ollama endpoints with one workload.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--inventory', help='Inventory file: "name url [ssh=user@host] [hardware=...]" per line')
+    source.add_argument('--hosts', type=parse_list(str), help='Comma-separated endpoint URLs')
+    parser.add_argument('--mode', choices=['concurrent', 'sequential', 'round-robin'], default='concurrent',
+                        help='concurrent: all hosts at once; sequential: one host at a time; '
+                             'round-robin: one workload spread across hosts')
+    parser.add_argument('--models', type=parse_list(str), help='Comma-separated models (default: installed on every host)')
+    parser.add_argument('--prompts', type=parse_list(str), default=DEFAULT_PROMPT_NAMES,
+                        help='Comma-separated prompt names from benchmark-models.sh (default: Short,Medium,Code)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Concurrent users per host (total for round-robin)')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run each model')
+    parser.add_argument('--requests', type=int, default=0, help='Stop each host (or the round-robin) after this many requests')
+    parser.add_argument('--num-predict', type=int, help='Cap generated tokens per request')
+    parser.add_argument('--stream', action='store_true', help='Stream responses and record time-to-first-token')
+    parser.add_argument('--timeout', type=float, default=600, help='Per-read timeout in seconds')
+    parser.add_argument('--no-warmup', action='store_true', help='Do not load each model before measuring')
+    parser.add_argument('--no-charts', action='store_true', help='Skip rendering fleet charts')
+    parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    try:
+        return asyncio.run(run_fleet(args))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Harness overhead benchmark
+Runs the benchmarking tools against the mock Ollama server with known token rates and
+TTFT, and reports how far each tool's measurement is from the injected ground truth
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import subprocess
+import sys
+
+from benchmark_common import (
+    BENCHMARK_DIR, DEFAULT_PROMPT_NAMES, load_prompts, percentile, session_dir, write_csv,
+)
+from load_generator import closed_loop
+from mock_ollama import MockConfig, MockOllamaServer, count_tokens, expected_ttft
+from ollama_client import OllamaClient
+from stream_benchmark import stream_generate
+
+RESULTS_FILE = 'harness_overhead.csv'
+
+RESULTS_HEADER = [
+    'Scenario', 'Prompt', 'Requests', 'Injected Tokens/sec', 'Measured Tokens/sec', 'Tokens/sec Error (%)',
+    'Injected TTFT (s)', 'Measured TTFT (s)', 'TTFT Error (ms)',
+]
+
+MODEL = 'mock-bench:7b'
+
+def expected_wall_tps(config, prompt, generated_tokens):
+    """Injected end-to-end rate: generated tokens over fixed latency, prefill and decode time."""
+    seconds = (config.base_latency + count_tokens(prompt) / config.prefill_tps
+               + generated_tokens / config.decode_tps)
+    return generated_tokens / seconds
+
+def error_pct(measured, truth):
+    return 100.0 * (measured - truth) / truth if measured is not None else None
+
+async def measure_python_harness(config, url, prompts, requests):
+    """Measure load_generator.py and stream_benchmark.py against the mock's ground truth."""
+    rows = []
+    async with OllamaClient(url, max_connections=1) as client:
+        for prompt_name, prompt in prompts:
+            records = await closed_loop(client, MODEL, [(prompt_name, prompt)], 1, 3600, requests, None)
+            ok = [r for r in records if r['status'] == 'ok']
+            counter_tps = [r['generated_tokens'] / r['eval_duration'] for r in ok if r['eval_duration']]
+            wall_tps = [r['generated_tokens'] / r['latency'] for r in ok]
+            # Latency includes the injected prefill, so the truth here is the end-to-end rate, not decode_tps
+            wall_truth = [expected_wall_tps(config, prompt, r['generated_tokens']) for r in ok]
+            rows.append(['load_generator (Ollama counters)', prompt_name, len(ok), config.decode_tps,
+                         sum(counter_tps) / len(counter_tps), None, None, None, None])
+            rows.append(['load_generator (wall clock)', prompt_name, len(ok), sum(wall_truth) / len(wall_truth),
+                         sum(wall_tps) / len(wall_tps), None, None, None, None])
+
+            ttfts, itl_tps = [], []
+            for _ in range(requests):
+                result = await stream_generate(client, MODEL, prompt)
+                ttfts.append(result['ttft'])
+                itl_tps.append(1000.0 / result['itl_p50_ms'] if result['itl_p50_ms'] else None)
+            itl_tps = [tps for tps in itl_tps if tps]
+            rows.append(['stream_benchmark (inter-token)', prompt_name, requests, config.decode_tps,
+                         percentile(itl_tps, 50) if itl_tps else None, None,
+                         expected_ttft(config, prompt), percentile(ttfts, 50), None])
+    return rows
+
+def measure_shell_harness(config, url, output_dir):
+    """Run benchmark-models.sh against the mock and read back its per-run tokens/sec."""
+    shell_dir = os.path.join(output_dir, f"shell_harness_{config.decode_tps:g}tps")
+    # Mock throughput must never reach the results store that trends and the regression gate read
+    env = dict(os.environ, OLLAMA_API=url, REPORTS_DIR=shell_dir, BENCHMARK_NO_STORE='1')
+    completed = subprocess.run(['bash', os.path.join(BENCHMARK_DIR, 'benchmark-models.sh'), f"--models={MODEL}"],
+                               env=env, capture_output=True, text=True)
+    results_path = os.path.join(shell_dir, 'model_benchmark_results.csv')
+    if completed.returncode != 0 or not os.path.exists(results_path):
+        print("Skipping benchmark-models.sh: it did not complete (missing curl/jq/bc/column or ollama?)")
+        print(completed.stdout[-500:] + completed.stderr[-500:])
+        return []
+
+    prompts = dict(load_prompts(['Short', 'Medium', 'Code', 'Long']))
+    rows = []
+    with open(results_path, newline='') as f:
+        for run in csv.DictReader(f):
+            measured = run.get('Tokens per Second')
+            ttft = run.get('TTFT (s)')
+            rows.append(['benchmark-models.sh', run['Prompt'], 1, config.decode_tps,
+                         float(measured) if measured not in (None, '', 'N/A') else None, None,
+                         expected_ttft(config, prompts.get(run['Prompt'], '')),
+                         float(ttft) if ttft not in (None, '', 'N/A') else None, None])
+    return rows
+
+def finish_rows(rows):
+    """Fill in the error columns from measured vs. injected values."""
+    for row in rows:
+        row[5] = error_pct(row[4], row[3])
+        if row[6] is not None and row[7] is not None:
+            row[8] = (row[7] - row[6]) * 1000
+    return rows
+
+def print_rows(rows):
+    print(f"\n{'Scenario':<34} {'Prompt':<7} {'Truth':>8} {'Measured':>9} {'Error':>8} {'TTFT err':>9}")
+    print('-' * 80)
+    for scenario, prompt, _, truth, measured, error, _, _, ttft_error in rows:
+        measured_text = f"{measured:9.2f}" if measured is not None else f"{'N/A':>9}"
+        error_text = f"{error:7.1f}%" if error is not None else f"{'N/A':>8}"
+        ttft_text = f"{ttft_error:7.1f}ms" if ttft_error is not None else f"{'':>9}"
+        print(f"{scenario:<34} {prompt:<7} {truth:8.1f} {measured_text} {error_text} {ttft_text}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure benchmarking harness overhead against a mock Ollama with known token rates.')
+    parser.add_argument('--decode-tps', default='25,100', help='Comma-separated injected decode rates')
+    parser.add_argument('--prefill-tps', type=float, default=500, help='Injected prompt processing rate')
+    parser.add_argument('--num-predict', type=int, default=64, help='Tokens generated per request')
+    parser.add_argument('--requests', type=int, default=3, help='Requests per prompt and scenario')
+    parser.add_argument('--prompts', default=','.join(DEFAULT_PROMPT_NAMES), help='Prompt names to use')
+    parser.add_argument('--shell', action='store_true', help='Also measure benchmark-models.sh (slow)')
+    parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    args = parser.parse_args()
+
+    output_dir = session_dir(args.session, args.output_dir)
+    prompts = load_prompts([name for name in args.prompts.split(',') if name])
+    rows = []
+    for decode_tps in [float(rate) for rate in args.decode_tps.split(',') if rate]:
+        config = MockConfig(models=[MODEL], load_delay=0, prefill_tps=args.prefill_tps,
+                            decode_tps=decode_tps, num_predict=args.num_predict)
+        server = MockOllamaServer(config, port=0).start()
+        try:
+            print(f"Measuring harness overhead at {decode_tps:g} injected tokens/sec...")
+            rows.extend(asyncio.run(measure_python_harness(config, server.url, prompts, args.requests)))
+            if args.shell:
+                rows.extend(measure_shell_harness(config, server.url, output_dir))
+        finally:
+            server.stop()
+
+    rows = finish_rows(rows)
+    print_rows(rows)
+    write_csv(f"{output_dir}/{RESULTS_FILE}", RESULTS_HEADER, rows)
+    print(f"\nHarness overhead results saved to: {output_dir}/{RESULTS_FILE}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
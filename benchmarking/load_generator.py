@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Concurrent load generator for Ollama
+Measures aggregate throughput and latency percentiles under concurrent users (closed loop)
+or a target arrival rate with Poisson arrivals (open loop)
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+
+from benchmark_common import (
+    DEFAULT_OLLAMA_API, DEFAULT_PROMPT_NAMES, load_prompts, percentile, session_dir, write_csv,
+)
+from ollama_client import OllamaClient
+from resource_sampler import ResourceSampler
+from stream_benchmark import stream_generate
+
+RESULTS_FILE = 'load_test_results.csv'
+SUMMARY_FILE = 'load_test_summary.csv'
+
+RESULTS_HEADER = [
+    'Model', 'Mode', 'Concurrency', 'Target Rate (req/s)', 'Prompt', 'Start Offset (s)',
+    'Latency (s)', 'Status', 'Prompt Tokens', 'Generated Tokens', 'Eval Duration (s)',
+    'Load Duration (s)', 'TTFT (s)', 'Error',
+]
+
+SUMMARY_HEADER = [
+    'Model', 'Mode', 'Concurrency', 'Target Rate (req/s)', 'Requests', 'Errors', 'Wall Time (s)',
+    'Requests/sec', 'Tokens/sec', 'Avg Tokens/sec per Request', 'Latency Mean (s)',
+    'Latency p50 (s)', 'Latency p90 (s)', 'Latency p95 (s)', 'Latency p99 (s)',
+    'TTFT p50 (s)', 'TTFT p95 (s)', 'Avg CPU (%)', 'Peak CPU (%)', 'Peak RSS (MB)',
+]
+
+async def run_request(client, model, prompt_name, prompt, options, started=None, stream=False):
+    """Send one generation request and return its measurement record.
+
+    started lets open-loop callers count time spent waiting for a pooled connection.
+    """
+    started = started if started is not None else time.perf_counter()
+    record = {'model': model, 'prompt': prompt_name, 'start': started, 'status': 'ok', 'error': ''}
+    try:
+        if stream:
+            # TTFT counts from when the request was due, including any pool wait
+            response = await stream_generate(client, model, prompt, options, started)
+            record['ttft'] = response['ttft']
+        else:
+            response = await client.generate(model, prompt, options=options)
+        record['prompt_tokens'] = response.get('prompt_eval_count', 0)
+        record['generated_tokens'] = response.get('eval_count', 0)
+        record['eval_duration'] = response.get('eval_duration', 0) / 1e9
+        record['load_duration'] = response.get('load_duration', 0) / 1e9
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e) or type(e).__name__
+    record['end'] = time.perf_counter()
+    record['latency'] = record['end'] - started
+    return record
+
+async def closed_loop(client, model, prompts, concurrency, duration, max_requests, options, stream=False):
+    """Run `concurrency` users that each send a new request as soon as the previous one completes."""
+    prompt_cycle = itertools.cycle(prompts)
+    deadline = time.perf_counter() + duration
+    issued = 0
+    records = []
+
+    async def user():
+        nonlocal issued
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            prompt_name, prompt = next(prompt_cycle)
+            records.append(await run_request(client, model, prompt_name, prompt, options, stream=stream))
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return records
+
+async def open_loop(client, model, prompts, rate, duration, max_requests, options, seed=None, stream=False):
+    """Issue requests with Poisson arrivals at `rate` req/s regardless of how fast they complete."""
+    rng = random.Random(seed)
+    prompt_cycle = itertools.cycle(prompts)
+    start = time.perf_counter()
+    next_arrival = start
+    tasks = []
+
+    while True:
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - start >= duration or (max_requests and len(tasks) >= max_requests):
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        prompt_name, prompt = next(prompt_cycle)
+        tasks.append(asyncio.create_task(
+            run_request(client, model, prompt_name, prompt, options, started=next_arrival, stream=stream)))
+
+    return list(await asyncio.gather(*tasks))
+
+def summarize(records):
+    """Aggregate request records from one load level into throughput and latency metrics."""
+    ok = [r for r in records if r['status'] == 'ok']
+    if not records:
+        return None
+    wall_time = max(r['end'] for r in records) - min(r['start'] for r in records)
+    latencies = [r['latency'] for r in ok]
+    ttfts = [r['ttft'] for r in ok if r.get('ttft') is not None]
+    generated = sum(r['generated_tokens'] for r in ok)
+    per_request_tps = [r['generated_tokens'] / r['eval_duration'] for r in ok if r['eval_duration'] > 0]
+    return {
+        'requests': len(records),
+        'errors': len(records) - len(ok),
+        'wall_time': wall_time,
+        'requests_per_sec': len(ok) / wall_time if wall_time > 0 else None,
+        'tokens_per_sec': generated / wall_time if wall_time > 0 else None,
+        'avg_request_tps': sum(per_request_tps) / len(per_request_tps) if per_request_tps else None,
+        'latency_mean': sum(latencies) / len(latencies) if latencies else None,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p90': percentile(latencies, 90),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+        'ttft_p50': percentile(ttfts, 50) if ttfts else None,
+        'ttft_p95': percentile(ttfts, 95) if ttfts else None,
+    }
+
+def summary_row(model, mode, concurrency, rate, stats, resources):
+    return [
+        model, mode, concurrency, rate, stats['requests'], stats['errors'], stats['wall_time'],
+        stats['requests_per_sec'], stats['tokens_per_sec'], stats['avg_request_tps'],
+        stats['latency_mean'], stats['latency_p50'], stats['latency_p90'], stats['latency_p95'],
+        stats['latency_p99'], stats['ttft_p50'], stats['ttft_p95'],
+        resources.get('avg_cpu'), resources.get('max_cpu'), resources.get('peak_rss_mb'),
+    ]
+
+def result_rows(model, mode, concurrency, rate, records):
+    level_start = min(r['start'] for r in records)
+    for r in sorted(records, key=lambda r: r['start']):
+        yield [
+            model, mode, concurrency, rate, r['prompt'], r['start'] - level_start, r['latency'],
+            r['status'], r.get('prompt_tokens'), r.get('generated_tokens'), r.get('eval_duration'),
+            r.get('load_duration'), r.get('ttft'), r['error'],
+        ]
+
+def print_level(model, label, stats):
+    print(f"{model} | {label}: {stats['requests']} requests ({stats['errors']} errors) in "
+          f"{stats['wall_time']:.1f}s")
+    if stats['tokens_per_sec'] is not None:
+        print(f"  Throughput: {stats['requests_per_sec']:.2f} req/s, {stats['tokens_per_sec']:.2f} tokens/s")
+    if stats['latency_mean'] is not None:
+        print(f"  Latency: p50 {stats['latency_p50']:.2f}s, p95 {stats['latency_p95']:.2f}s, "
+              f"p99 {stats['latency_p99']:.2f}s")
+    if stats['ttft_p50'] is not None:
+        print(f"  TTFT: p50 {stats['ttft_p50']:.3f}s, p95 {stats['ttft_p95']:.3f}s")
+
+async def get_models(client, requested):
+    """Use the requested models, or every installed model if none were given."""
+    if requested:
+        return requested
+    tags = await client.tags()
+    return [m['name'] for m in tags.get('models', [])]
+
+async def run_load_test(args):
+    prompts = load_prompts(args.prompts)
+    options = {'num_predict': args.num_predict} if args.num_predict else None
+    output_dir = session_dir(args.session, args.output_dir)
+    max_connections = max(args.concurrency + [args.max_connections])
+
+    results, summary = [], []
+    sampler = ResourceSampler(rate=args.sample_rate).start() if args.sample_rate > 0 else None
+    if sampler:
+        os.makedirs(f"{output_dir}/resource_samples", exist_ok=True)
+
+    async with OllamaClient(args.api, max_connections=max_connections, timeout=args.timeout) as client:
+        models = await get_models(client, args.models)
+        if not models:
+            print("Error: No models available to test.")
+            return 1
+
+        for model in models:
+            if not args.no_warmup:
+                # Load the model before measuring so the first level doesn't include load time
+                print(f"Warming up {model}...")
+                await run_request(client, model, *prompts[0], options)
+
+            levels = ([('closed', c, 'N/A') for c in args.concurrency] if args.mode == 'closed'
+                      else [('open', 'N/A', r) for r in args.rates])
+            for mode, concurrency, rate in levels:
+                level_start = time.time()
+                if mode == 'closed':
+                    label = f"{concurrency} concurrent users"
+                    records = await closed_loop(client, model, prompts, concurrency, args.duration,
+                                                args.requests, options, args.stream)
+                else:
+                    label = f"{rate} req/s target"
+                    records = await open_loop(client, model, prompts, rate, args.duration,
+                                              args.requests, options, args.seed, args.stream)
+                level_end = time.time()
+                stats = summarize(records)
+                if stats is None:
+                    continue
+                resources = {}
+                if sampler:
+                    sampler.mark(f"{model} {label} start", level_start)
+                    sampler.mark(f"{model} {label} end", level_end)
+                    resources = sampler.summary(level_start, level_end)
+                    safe_name = ''.join(c for c in f"{model}_{mode}_{concurrency}_{rate}" if c.isalnum() or c in '._-')
+                    sampler.write_series(f"{output_dir}/resource_samples/load_{safe_name}.csv", level_start, level_end)
+                print_level(model, label, stats)
+                results.extend(result_rows(model, mode, concurrency, rate, records))
+                summary.append(summary_row(model, mode, concurrency, rate, stats, resources))
+
+    if sampler:
+        sampler.stop()
+
+    write_csv(f"{output_dir}/{RESULTS_FILE}", RESULTS_HEADER, results)
+    write_csv(f"{output_dir}/{SUMMARY_FILE}", SUMMARY_HEADER, summary)
+    print(f"\nDetailed load test results saved to: {output_dir}/{RESULTS_FILE}")
+    print(f"Load test summary saved to: {output_dir}/{SUMMARY_FILE}")
+    return 0
+
+def parse_list(cast):
+    return lambda value: [cast(item) for item in value.split(',') if item]
+
+def positive(cast):
+    """Cast a value and reject zero or negative numbers (argparse reports the error)."""
+    def convert(value):
+        number = cast(value)
+        if number <= 0:
+            raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+        return number
+    return convert
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Run a concurrent load test against Ollama.')
+    parser.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+    parser.add_argument('--models', type=parse_list(str), help='Comma-separated models (default: all installed)')
+    parser.add_argument('--prompts', type=parse_list(str), default=DEFAULT_PROMPT_NAMES,
+                        help='Comma-separated prompt names from benchmark-models.sh (default: Short,Medium,Code)')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed',
+                        help='closed: N concurrent users; open: Poisson arrivals at a target rate')
+    parser.add_argument('--concurrency', type=parse_list(positive(int)), default=[1, 2, 4, 8],
+                        help='Comma-separated concurrency levels for closed-loop mode')
+    parser.add_argument('--rates', type=parse_list(positive(float)), default=[0.5, 1, 2],
+                        help='Comma-separated target request rates (req/s) for open-loop mode')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run each level')
+    parser.add_argument('--requests', type=int, default=0, help='Stop each level after this many requests')
+    parser.add_argument('--num-predict', type=int, help='Cap generated tokens per request')
+    parser.add_argument('--stream', action='store_true', help='Stream responses and record time-to-first-token')
+    parser.add_argument('--max-connections', type=int, default=64, help='Connection pool size')
+    parser.add_argument('--timeout', type=float, default=600, help='Per-read timeout in seconds')
+    parser.add_argument('--sample-rate', type=float, default=20,
+                        help='Resource samples per second for the Ollama process tree (0 disables)')
+    parser.add_argument('--seed', type=int, help='Random seed for open-loop arrivals')
+    parser.add_argument('--no-warmup', action='store_true', help='Do not load each model before measuring')
+    parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    return asyncio.run(run_load_test(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Memory profiler for Ollama models
+Records the RSS/PSS time series of the Ollama process tree during each request while sweeping
+context length (num_ctx) and prompt fill, fits memory = fixed + KV bytes/token x context per model,
+and predicts the largest context or number of parallel slots that fit in a RAM budget
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmark_common import DEFAULT_OLLAMA_API, format_value, load_prompts, session_dir, write_csv
+from load_generator import parse_list
+from model_load_benchmark import get_models, wait_for_residency
+from ollama_client import OllamaClient
+from resource_sampler import DEFAULT_PATTERN, ResourceSampler
+
+RESULTS_FILE = 'memory_profile_results.csv'
+SERIES_FILE = 'memory_series.csv'
+FIT_FILE = 'memory_fit.csv'
+
+RESULTS_HEADER = [
+    'Model', 'Context (tokens)', 'Fill', 'Prompt Tokens', 'Reported Size (MB)', 'Loaded RSS (MB)',
+    'Baseline RSS (MB)', 'Peak RSS (MB)', 'Peak PSS (MB)', 'RSS Growth (MB)', 'Latency (s)', 'Error',
+]
+
+SERIES_HEADER = ['Model', 'Context (tokens)', 'Prompt Tokens', 'Offset (s)', 'RSS (MB)', 'PSS (MB)']
+
+FIT_HEADER = [
+    'Model', 'Points', 'Fixed Memory (MB)', 'KV Bytes/Token', 'R^2', 'Reported Fixed (MB)',
+    'Reported KV Bytes/Token', 'RAM Budget (MB)', 'Max Context (tokens)', 'Slot Context (tokens)',
+    'Max Parallel Slots', 'Fit Source',
+]
+
+# Below this R^2 (or with a flat or falling slope) the RSS fit is noise, so predictions use /api/ps sizes
+MIN_R2 = 0.9
+
+def total_memory_mb():
+    """Physical memory of this machine in MB, or None if it can't be determined."""
+    try:
+        if platform.system() == 'Darwin':
+            output = subprocess.run(['sysctl', '-n', 'hw.memsize'], capture_output=True, text=True).stdout
+            return int(output) / 1024 / 1024
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def make_prompt(tokens, seed_words, nonce):
+    """Build a prompt of about `tokens` tokens (~4 characters per token for BPE vocabularies).
+
+    The nonce goes first so Ollama's prompt cache can't reuse the previous request's KV entries.
+    """
+    text = f"Request {nonce}. Summarize the following text in one sentence:"
+    words = itertools.cycle(seed_words)
+    parts = [text]
+    length = len(text)
+    while length < tokens * 4:
+        word = next(words)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)
+
+def linear_fit(points):
+    """Least-squares fit of y = intercept + slope * x; returns (intercept, slope, r2) or None."""
+    if len({x for x, _ in points}) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    ss_total = sum((y - mean_y) ** 2 for _, y in points)
+    ss_residual = sum((y - intercept - slope * x) ** 2 for x, y in points)
+    return intercept, slope, 1 - ss_residual / ss_total if ss_total > 0 else 1.0
+
+def predict(fixed_mb, kv_mb_per_token, budget_mb, slot_context):
+    """Largest single-slot context and number of `slot_context` slots that fit in the budget."""
+    if fixed_mb is None or not kv_mb_per_token or kv_mb_per_token <= 0 or not budget_mb:
+        return None, None
+    free = budget_mb - fixed_mb
+    if free <= 0:
+        return 0, 0
+    return int(free / kv_mb_per_token), int(free / (kv_mb_per_token * slot_context))
+
+def fit_model(model, records, num_parallel, budget_mb, slot_context):
+    """Fit peak memory against context for one model and turn the fit into capacity predictions.
+
+    Only the fullest prompt at each context is used, since KV pages are touched as the prompt fills
+    them; Ollama allocates num_ctx x OLLAMA_NUM_PARALLEL entries, so the slope is divided by that.
+    Predictions fall back to the fit of Ollama's reported sizes when the RSS fit is unusable.
+    """
+    fullest = {}
+    for r in records:
+        if not r['error'] and r.get('peak_rss') is not None:
+            if r['context'] not in fullest or r['fill'] > fullest[r['context']]['fill']:
+                fullest[r['context']] = r
+    measured = linear_fit([(r['context'], r['peak_rss']) for r in fullest.values()])
+    reported = linear_fit([(r['context'], r['reported_mb']) for r in fullest.values() if r.get('reported_mb')])
+
+    fixed = kv_mb = r2 = None
+    if measured:
+        fixed, slope, r2 = measured
+        kv_mb = slope / num_parallel
+    reported_fixed = reported_kv_mb = None
+    if reported:
+        reported_fixed, reported_kv_mb = reported[0], reported[1] / num_parallel
+
+    source = 'measured' if measured else None
+    if reported and reported_kv_mb > 0 and (not measured or kv_mb <= 0 or r2 < MIN_R2):
+        source = 'reported'
+    if source == 'reported':
+        max_context, max_slots = predict(reported_fixed, reported_kv_mb, budget_mb, slot_context)
+    else:
+        max_context, max_slots = predict(fixed, kv_mb, budget_mb, slot_context)
+    return [model, len(fullest), fixed, kv_mb * 1024 * 1024 if kv_mb is not None else None, format_value(r2, 4),
+            reported_fixed, reported_kv_mb * 1024 * 1024 if reported_kv_mb is not None else None,
+            budget_mb, max_context, slot_context, max_slots, source]
+
+async def load_with_context(client, model, context, keep_alive):
+    """Reload the model with a new num_ctx and return its /api/ps entry."""
+    await client.unload(model)
+    await wait_for_residency(client, model, False)
+    await client.generate(model, '', options={'num_ctx': context}, keep_alive=keep_alive)
+    return await wait_for_residency(client, model, True)
+
+async def measure_request(client, sampler, model, context, fill, seed_words, args):
+    """Send one request of `fill` x `context` prompt tokens and summarize memory while it ran."""
+    record = {'model': model, 'context': context, 'fill': fill, 'error': ''}
+    prompt = make_prompt(int(context * fill), seed_words, f"{context}-{fill}-{time.time_ns()}")
+    await asyncio.sleep(args.settle)
+    record['start'] = time.time()
+    try:
+        response = await client.generate(model, prompt, keep_alive=args.keep_alive,
+                                         options={'num_ctx': context, 'num_predict': args.num_predict})
+        record['prompt_tokens'] = response.get('prompt_eval_count') or len(prompt) // 4
+    except Exception as e:
+        record['error'] = str(e) or type(e).__name__
+    record['end'] = time.time()
+    # Let the sampler take a reading after the response so short requests still get a peak
+    await asyncio.sleep(max(sampler.interval * 2, args.settle))
+
+    before = sampler.summary(record['start'] - args.settle, record['start'])
+    during = sampler.summary(record['start'], time.time())
+    record['baseline_rss'] = before.get('avg_rss_mb')
+    record['peak_rss'] = during.get('peak_rss_mb')
+    record['peak_pss'] = during.get('peak_pss_mb')
+    if record['baseline_rss'] is not None and record['peak_rss'] is not None:
+        record['rss_growth'] = record['peak_rss'] - record['baseline_rss']
+    return record
+
+def series_rows(sampler, record):
+    data = sampler.window(record['start'], record['end'])
+    tokens = record.get('prompt_tokens')
+    return [[record['model'], record['context'], tokens, f"{t - record['start']:.3f}", rss, pss]
+            for t, rss, pss in zip(data['time'], data['rss'], data['pss'])]
+
+def render_chart(results_path, output_dir):
+    try:
+        from visualize_benchmarks import visualize
+        rendered, cached, failed = visualize([(results_path, output_dir)], ['memory_context'])
+        print(f"Memory charts: {rendered} rendered, {cached} up to date, {failed} failed")
+    except ImportError as e:
+        print(f"Skipping memory chart ({e}); install pandas and matplotlib to render it")
+
+async def run(args):
+    seed_words = ' '.join(text for _, text in load_prompts(['Short', 'Medium', 'Long', 'Code'])).split()
+    output_dir = session_dir(args.session, args.output_dir)
+    budget_mb = args.ram_budget_mb
+    if budget_mb is None:
+        total = total_memory_mb()
+        budget_mb = total - args.reserve_mb if total else None
+
+    results, series, fits = [], [], []
+    sampler = ResourceSampler(args.pattern, args.pid, rate=args.sample_rate, pss_every=args.pss_every).start()
+    try:
+        async with OllamaClient(args.api, max_connections=2, timeout=args.timeout) as client:
+            models = await get_models(client, args.models)
+            for model in models:
+                print(f"\nMemory profile: {model}")
+                records = []
+                for context in args.contexts:
+                    try:
+                        entry = await load_with_context(client, model, context, args.keep_alive)
+                    except Exception as e:
+                        print(f"  num_ctx {context:>6}: load failed: {e}")
+                        continue
+                    await asyncio.sleep(args.settle)
+                    loaded = sampler.summary(time.time() - args.settle, time.time())
+                    for fill in args.fills:
+                        record = await measure_request(client, sampler, model, context, fill, seed_words, args)
+                        record['reported_mb'] = entry.get('size', 0) / 1024 / 1024 if entry else None
+                        record['loaded_rss'] = loaded.get('avg_rss_mb')
+                        records.append(record)
+                        series.extend(series_rows(sampler, record))
+                        results.append([model, context, fill, record.get('prompt_tokens'), record['reported_mb'],
+                                        record['loaded_rss'], record['baseline_rss'], record['peak_rss'],
+                                        record['peak_pss'], record.get('rss_growth'),
+                                        record['end'] - record['start'], record['error']])
+                        if record['error']:
+                            print(f"  num_ctx {context:>6} fill {fill:.2f}: error: {record['error']}")
+                        else:
+                            print(f"  num_ctx {context:>6} fill {fill:.2f}: {record['prompt_tokens']:>6} prompt tokens, "
+                                  f"peak RSS {format_value(record['peak_rss'], 0)} MB "
+                                  f"(+{format_value(record.get('rss_growth'), 1)} MB)")
+                fits.append(fit_model(model, records, args.num_parallel, budget_mb, args.slot_context))
+                if args.unload_after:
+                    await client.unload(model)
+    finally:
+        sampler.stop()
+
+    results_path = os.path.join(output_dir, RESULTS_FILE)
+    write_csv(results_path, RESULTS_HEADER, results)
+    write_csv(os.path.join(output_dir, SERIES_FILE), SERIES_HEADER, series)
+    write_csv(os.path.join(output_dir, FIT_FILE), FIT_HEADER, fits)
+
+    print(f"\nRAM budget: {format_value(budget_mb, 0)} MB, slot context {args.slot_context} tokens")
+    for fit in fits:
+        model, points, fixed, kv_bytes, r2, reported_fixed, reported_kv_bytes, _, max_context, _, max_slots, source = fit
+        if source is None:
+            print(f"  {model}: not enough contexts to fit (need at least two)")
+            continue
+        if source == 'reported':
+            fixed, kv_bytes = reported_fixed, reported_kv_bytes
+            quality = f"reported by /api/ps; RSS fit R^2 {r2}"
+        else:
+            quality = f"R^2 {r2}"
+        print(f"  {model}: {format_value(fixed, 0)} MB fixed + {format_value(kv_bytes / 1024, 1)} KiB/token "
+              f"({quality}) -> max context {format_value(max_context, 0)}, max slots {format_value(max_slots, 0)}")
+    print(f"\nMemory profile saved to: {results_path}")
+    print(f"Memory time series saved to: {output_dir}/{SERIES_FILE}")
+    print(f"Memory fit saved to: {output_dir}/{FIT_FILE}")
+    if results and not args.no_charts:
+        render_chart(results_path, output_dir)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile Ollama memory against context length and fit KV-cache growth.')
+    parser.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+    parser.add_argument('--models', type=parse_list(str), help='Comma-separated models (default: all installed)')
+    parser.add_argument('--contexts', type=parse_list(int), default=[2048, 4096, 8192, 16384],
+                        help='Comma-separated num_ctx values to load each model with')
+    parser.add_argument('--fills', type=parse_list(float), default=[0.1, 0.5, 0.9],
+                        help='Comma-separated prompt lengths as fractions of num_ctx')
+    parser.add_argument('--num-predict', type=int, default=16, help='Tokens generated per request')
+    parser.add_argument('--num-parallel', type=int, default=int(os.environ.get('OLLAMA_NUM_PARALLEL') or 1),
+                        help="The server's OLLAMA_NUM_PARALLEL (KV cache is allocated per slot)")
+    parser.add_argument('--ram-budget-mb', type=float, help='RAM budget for predictions (default: total minus reserve)')
+    parser.add_argument('--reserve-mb', type=float, default=2048,
+                        help='Memory kept for the OS and other services when the budget is derived')
+    parser.add_argument('--slot-context', type=int, default=4096, help='Per-slot context for the parallel slot prediction')
+    parser.add_argument('--keep-alive', default='10m', help='keep_alive for loads and requests')
+    parser.add_argument('--settle', type=float, default=0.5, help='Seconds of idle sampling around each request')
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help='Command line pattern of the Ollama server process')
+    parser.add_argument('--pid', type=int, action='append', help='Ollama server PID (repeatable, overrides --pattern)')
+    parser.add_argument('--sample-rate', type=float, default=20, help='Memory samples per second')
+    parser.add_argument('--pss-every', type=int, default=2, help='Read PSS from smaps_rollup every N samples')
+    parser.add_argument('--unload-after', action='store_true', help='Unload each model when done')
+    parser.add_argument('--timeout', type=float, default=900, help='Per-read timeout in seconds')
+    parser.add_argument('--no-charts', action='store_true', help='Skip rendering the memory chart')
+    parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+OpenMetrics/Prometheus exporter for the LLM stack
+Collectors refresh on their own background intervals and cache their rendered output,
+so a scrape only concatenates text and never touches Ollama, /proc or Docker itself
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmark_common import DEFAULT_OLLAMA_API
+from resource_sampler import DEFAULT_PATTERN, PsReader, ProcReader
+
+DEFAULT_PORT = 9877
+DEFAULT_LOG_FILE = os.path.join(os.environ.get('OLLAMA_DATA_DIR', os.path.expanduser('~/.ollama')), 'ollama.log')
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# [GIN] 2025/01/01 - 12:00:00 | 200 |  1.234567s |  127.0.0.1 | POST     "/api/generate"
+GIN_LINE = re.compile(r'\[GIN\][^|]*\|\s*(\d{3})\s*\|\s*([^|]+?)\s*\|[^|]*\|\s*(\w+)\s+"([^"?]+)')
+# llama.cpp timings: "prompt eval time =  123.45 ms /    42 tokens (...)" and "eval time = ..."
+TIMINGS_LINE = re.compile(r'\b(prompt eval|eval) time\s*=\s*([\d.]+) ms /\s*(\d+) (?:tokens|runs)')
+GO_DURATION = re.compile(r'([\d.]+)(h|ms|µs|us|ns|m|s)')
+GO_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 1e-3, 'µs': 1e-6, 'us': 1e-6, 'ns': 1e-9}
+RFC3339_FRACTION = re.compile(r'(\.\d{6})\d+')
+DOCKER_SIZE = re.compile(r'([\d.]+)\s*([KMGT]?i?B)', re.IGNORECASE)
+DOCKER_UNITS = {'b': 1, 'kb': 1e3, 'mb': 1e6, 'gb': 1e9, 'tb': 1e12,
+                'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4}
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_family(name, kind, help_text, samples):
+    """Render one metric family; samples are (suffix, labels, value) tuples."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        label_text = ','.join(f'{key}="{escape(val)}"' for key, val in labels.items())
+        lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+    return '\n'.join(lines) + '\n'
+
+def parse_go_duration(text):
+    """Parse Go duration strings such as '1m2.5s', '523.1ms' or '12µs' into seconds."""
+    return sum(float(amount) * GO_UNITS[unit] for amount, unit in GO_DURATION.findall(text))
+
+def parse_timestamp(text):
+    """Parse Ollama's RFC 3339 timestamps (nanosecond fractions, 'Z' suffix) into Unix seconds."""
+    text = RFC3339_FRACTION.sub(r'\1', text.replace('Z', '+00:00'))
+    return datetime.fromisoformat(text).timestamp()
+
+def parse_docker_size(text):
+    match = DOCKER_SIZE.search(text)
+    return float(match.group(1)) * DOCKER_UNITS[match.group(2).lower()] if match else 0.0
+
+def fetch_json(url, timeout=2.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+class Collector:
+    """Base class: refresh() runs on a background thread and caches the rendered text."""
+
+    name = 'collector'
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.text = ''
+        self.duration = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def collect(self):
+        """Return a list of rendered metric families."""
+        raise NotImplementedError
+
+    def refresh(self):
+        started = time.perf_counter()
+        try:
+            text = ''.join(self.collect())
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️  {self.name} collector failed: {e}", file=sys.stderr)
+            text = ''
+        with self._lock:
+            self.text = text
+            self.duration = time.perf_counter() - started
+
+    def run(self, stop):
+        while not stop.is_set():
+            self.refresh()
+            stop.wait(self.interval)
+
+    def rendered(self):
+        with self._lock:
+            return self.text
+
+class ProcessCollector(Collector):
+    """CPU and memory of the Ollama process tree (server plus model runners)."""
+
+    name = 'process'
+
+    def __init__(self, interval, pattern=DEFAULT_PATTERN, tree_every=6):
+        super().__init__(interval)
+        reader_class = ProcReader if ProcReader.available() else PsReader
+        self.reader = reader_class(pattern)
+        self.tree_every = tree_every
+        self.pids = set()
+        self.previous = None
+        self.cpu_seconds = 0.0
+        self.count = 0
+
+    def collect(self):
+        # Walking the process table is the expensive part; rediscover the tree only every few refreshes
+        if self.count % self.tree_every == 0 or not self.pids:
+            self.pids = self.reader.find_tree()
+        self.count += 1
+        cpu, rss_kb, pss_kb = self.reader.snapshot(self.pids, include_pss=True)
+        now = time.monotonic()
+        percent = 0.0
+        if self.previous:
+            previous_cpu, previous_time = self.previous
+            # Only processes present in both snapshots, so runner exits don't produce negative deltas
+            used = sum(cpu[pid] - previous_cpu[pid] for pid in cpu if pid in previous_cpu)
+            self.cpu_seconds += max(used, 0.0)
+            percent = 100.0 * used / (now - previous_time) if now > previous_time else 0.0
+        self.previous = (cpu, now)
+        families = [
+            render_family('ollama_process_up', 'gauge', 'Whether an Ollama server process was found',
+                          [('', {}, int(bool(cpu)))]),
+            render_family('ollama_process_count', 'gauge', 'Processes in the Ollama process tree',
+                          [('', {}, len(cpu))]),
+            render_family('ollama_process_cpu_seconds', 'counter', 'CPU time used by the Ollama process tree',
+                          [('_total', {}, f"{self.cpu_seconds:.3f}")]),
+            render_family('ollama_process_cpu_percent', 'gauge', 'CPU usage over the last refresh interval',
+                          [('', {}, f"{percent:.2f}")]),
+            render_family('ollama_process_resident_memory_bytes', 'gauge', 'Resident memory of the Ollama process tree',
+                          [('', {}, int(rss_kb * 1024))]),
+        ]
+        if pss_kb == pss_kb:
+            families.append(render_family('ollama_process_proportional_memory_bytes', 'gauge',
+                                          'Proportional set size of the Ollama process tree',
+                                          [('', {}, int(pss_kb * 1024))]))
+        return families
+
+class ModelsCollector(Collector):
+    """Loaded models and their memory split from /api/ps."""
+
+    name = 'models'
+
+    def __init__(self, interval, api):
+        super().__init__(interval)
+        self.api = api.rstrip('/')
+
+    def collect(self):
+        try:
+            models = fetch_json(f"{self.api}/api/ps").get('models', [])
+            up = 1
+        except OSError:
+            models, up = [], 0
+        loaded, memory, expires = [], [], []
+        for model in models:
+            labels = {'model': model.get('name', model.get('model', 'unknown'))}
+            size, vram = model.get('size', 0) or 0, model.get('size_vram', 0) or 0
+            details = model.get('details') or {}
+            loaded.append(('', {**labels, 'parameter_size': details.get('parameter_size', ''),
+                                'quantization': details.get('quantization_level', '')}, 1))
+            memory.append(('', {**labels, 'location': 'vram'}, vram))
+            memory.append(('', {**labels, 'location': 'ram'}, max(size - vram, 0)))
+            try:
+                expires.append(('', labels, f"{parse_timestamp(model.get('expires_at', '')):.3f}"))
+            except ValueError:
+                pass
+        return [
+            render_family('ollama_api_up', 'gauge', 'Whether the Ollama API answered /api/ps', [('', {}, up)]),
+            render_family('ollama_loaded_models', 'gauge', 'Number of models loaded in memory', [('', {}, len(models))]),
+            render_family('ollama_model_loaded', 'gauge', 'Loaded model', loaded),
+            render_family('ollama_model_memory_bytes', 'gauge', 'Memory used by a loaded model', memory),
+            render_family('ollama_model_expires_timestamp_seconds', 'gauge',
+                          'Unix time at which a loaded model is due to be unloaded', expires),
+        ]
+
+class GatewayCollector(Collector):
+    """Re-exports the caching gateway's own metrics."""
+
+    name = 'gateway'
+
+    def __init__(self, interval, url):
+        super().__init__(interval)
+        self.url = url.rstrip('/')
+
+    def collect(self):
+        with urllib.request.urlopen(f"{self.url}/gateway/metrics", timeout=2.0) as response:
+            text = response.read().decode()
+        return [line + '\n' for line in text.splitlines() if line and line != '# EOF']
+
+class DockerCollector(Collector):
+    """Resource usage of the Open WebUI container (docker stats is slow, so refresh rarely)."""
+
+    name = 'docker'
+
+    def __init__(self, interval, containers):
+        super().__init__(interval)
+        self.containers = containers
+
+    def collect(self):
+        result = subprocess.run(['docker', 'stats', '--no-stream', '--format', '{{json .}}', *self.containers],
+                                capture_output=True, text=True, timeout=30)
+        stats = {}
+        for line in result.stdout.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            stats[entry.get('Name', '')] = entry
+        running, cpu, memory, limit = [], [], [], []
+        for name in self.containers:
+            entry = stats.get(name)
+            labels = {'container': name}
+            running.append(('', labels, int(entry is not None)))
+            if entry:
+                cpu.append(('', labels, entry.get('CPUPerc', '0').rstrip('%') or 0))
+                used, _, total = entry.get('MemUsage', '').partition('/')
+                memory.append(('', labels, int(parse_docker_size(used))))
+                limit.append(('', labels, int(parse_docker_size(total))))
+        return [
+            render_family('container_running', 'gauge', 'Whether the container is running', running),
+            render_family('container_cpu_percent', 'gauge', 'Container CPU usage', cpu),
+            render_family('container_memory_usage_bytes', 'gauge', 'Container memory usage', memory),
+            render_family('container_memory_limit_bytes', 'gauge', 'Container memory limit', limit),
+        ]
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def samples(self, labels):
+        rows = [('_bucket', {**labels, 'le': f"{bound:g}"}, count) for bound, count in zip(self.buckets, self.counts)]
+        rows.append(('_bucket', {**labels, 'le': '+Inf'}, self.count))
+        rows.append(('_sum', labels, f"{self.sum:.6f}"))
+        rows.append(('_count', labels, self.count))
+        return rows
+
+class LogCollector(Collector):
+    """Request latency and token throughput parsed incrementally from ollama.log."""
+
+    name = 'log'
+
+    def __init__(self, interval, path, from_start=False):
+        super().__init__(interval)
+        self.path = path
+        self.handle = None
+        self.inode = None
+        self.from_start = from_start
+        self.partial = ''
+        self.latency = {}
+        self.tokens = {'prompt eval': [0, 0.0], 'eval': [0, 0.0]}
+        self.last_rate = {}
+
+    def _open(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if self.handle and (stat.st_ino != self.inode or stat.st_size < self.handle.tell()):
+            # Rotated or truncated: start again from the beginning of the new file
+            self.handle.close()
+            self.handle = None
+            self.from_start = True
+        if not self.handle:
+            self.handle = open(self.path, 'r', errors='replace')
+            self.inode = stat.st_ino
+            if not self.from_start:
+                self.handle.seek(0, os.SEEK_END)
+            self.partial = ''
+        return True
+
+    def consume(self, line):
+        match = GIN_LINE.search(line)
+        if match:
+            status, duration, method, path = match.groups()
+            key = (method, path, status)
+            self.latency.setdefault(key, Histogram()).observe(parse_go_duration(duration))
+            return
+        match = TIMINGS_LINE.search(line)
+        if match:
+            phase, milliseconds, tokens = match.group(1), float(match.group(2)), int(match.group(3))
+            totals = self.tokens[phase]
+            totals[0] += tokens
+            totals[1] += milliseconds / 1000
+            if milliseconds > 0:
+                self.last_rate[phase] = tokens / (milliseconds / 1000)
+
+    def collect(self):
+        available = self._open()
+        if available:
+            data = self.partial + self.handle.read()
+            *lines, self.partial = data.split('\n')
+            for line in lines:
+                self.consume(line)
+        latency = []
+        for (method, path, status), histogram in sorted(self.latency.items()):
+            latency.extend(histogram.samples({'method': method, 'path': path, 'code': status}))
+        phases = {'prompt eval': 'prompt', 'eval': 'eval'}
+        return [
+            render_family('ollama_log_available', 'gauge', 'Whether the Ollama log file could be read',
+                          [('', {}, int(available))]),
+            render_family('ollama_request_duration_seconds', 'histogram', 'Request latency from Ollama access logs',
+                          latency),
+            render_family('ollama_tokens', 'counter', 'Tokens processed according to runner timings',
+                          [('_total', {'phase': phases[p]}, totals[0]) for p, totals in self.tokens.items()]),
+            render_family('ollama_token_seconds', 'counter', 'Time spent processing tokens according to runner timings',
+                          [('_total', {'phase': phases[p]}, f"{totals[1]:.6f}") for p, totals in self.tokens.items()]),
+            render_family('ollama_tokens_per_second', 'gauge', 'Throughput of the most recent request',
+                          [('', {'phase': phases[p]}, f"{rate:.3f}") for p, rate in self.last_rate.items()]),
+        ]
+
+class Exporter:
+    def __init__(self, collectors):
+        self.collectors = collectors
+        self.stop = threading.Event()
+        self.threads = []
+
+    def start(self):
+        for collector in self.collectors:
+            thread = threading.Thread(target=collector.run, args=(self.stop,), name=collector.name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def render(self):
+        parts = [collector.rendered() for collector in self.collectors]
+        parts.append(render_family('llm_exporter_collector_duration_seconds', 'gauge',
+                                   'Time taken by the last collector refresh',
+                                   [('', {'collector': c.name}, f"{c.duration:.6f}") for c in self.collectors]))
+        parts.append(render_family('llm_exporter_collector_errors', 'counter', 'Failed collector refreshes',
+                                   [('_total', {'collector': c.name}, c.errors) for c in self.collectors]))
+        parts.append('# EOF\n')
+        return ''.join(parts).encode()
+
+def make_handler(exporter):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = exporter.render()
+            if 'application/openmetrics-text' in self.headers.get('Accept', ''):
+                content_type = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+            else:
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Expose Ollama, model and Open WebUI metrics for Prometheus')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to serve /metrics on')
+    parser.add_argument('--bind', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--ollama-api', default=os.environ.get('OLLAMA_API', DEFAULT_OLLAMA_API))
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help='Command pattern of the Ollama server process')
+    parser.add_argument('--log-file', default=DEFAULT_LOG_FILE, help='Ollama log to tail (empty to disable)')
+    parser.add_argument('--log-from-start', action='store_true', help='Parse the existing log instead of only new lines')
+    parser.add_argument('--gateway', help='Caching gateway URL to re-export (e.g. http://localhost:11435)')
+    parser.add_argument('--container', action='append', help='Container to report (default: open-webui)')
+    parser.add_argument('--no-docker', action='store_true', help='Skip container metrics')
+    parser.add_argument('--process-interval', type=float, default=5.0)
+    parser.add_argument('--models-interval', type=float, default=10.0)
+    parser.add_argument('--log-interval', type=float, default=2.0)
+    parser.add_argument('--docker-interval', type=float, default=30.0)
+    args = parser.parse_args()
+
+    collectors = [
+        ProcessCollector(args.process_interval, args.pattern),
+        ModelsCollector(args.models_interval, args.ollama_api),
+    ]
+    if args.log_file:
+        collectors.append(LogCollector(args.log_interval, args.log_file, args.log_from_start))
+    if args.gateway:
+        collectors.append(GatewayCollector(args.models_interval, args.gateway))
+    if not args.no_docker:
+        collectors.append(DockerCollector(args.docker_interval, args.container or ['open-webui']))
+
+    exporter = Exporter(collectors)
+    exporter.start()
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(exporter))
+    print(f"Serving metrics on http://{args.bind}:{args.port}/metrics "
+          f"({', '.join(c.name for c in collectors)} collectors)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        exporter.stop.set()
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Deterministic stand-in for the Ollama API
+Serves /api/tags, /api/ps, /api/generate, /api/chat, /api/embed and /api/embeddings with
+configurable load delay, prefill/decode rates and jitter, so the benchmarking tools can be
+exercised offline and their measurements checked against known ground truth
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+@dataclass
+class MockConfig:
+    """Ground truth the mock server injects into every response."""
+    models: list = field(default_factory=lambda: ['mock-small:7b', 'mock-large:70b'])
+    model_size_mb: float = 4096      # Reported by /api/tags and /api/ps
+    load_delay: float = 1.0          # Seconds to "load" a model that isn't resident
+    prefill_tps: float = 500.0       # Prompt tokens processed per second
+    decode_tps: float = 50.0         # Generated tokens per second
+    base_latency: float = 0.005      # Fixed per-request overhead before prefill starts
+    jitter: float = 0.0              # Relative std-dev applied to each token's delay
+    num_predict: int = 128           # Tokens generated when the request doesn't set num_predict
+    embed_tps: float = 5000.0        # Tokens embedded per second
+    embedding_dim: int = 768
+    keep_alive: float = 300.0        # Default residency after a request, in seconds
+    max_loaded: int = 0              # Evict least recently used models beyond this (0 = no limit)
+    seed: int = 0
+
+def count_tokens(text):
+    """Deterministic token estimate (~4 characters per token, like most BPE vocabularies)."""
+    return max(1, math.ceil(len(text) / 4))
+
+def expected_ttft(config, prompt):
+    """Injected time to first token for a resident model: fixed latency, prefill and one decode step."""
+    return config.base_latency + count_tokens(prompt) / config.prefill_tps + 1.0 / config.decode_tps
+
+def parse_keep_alive(value, default):
+    """Parse Ollama keep_alive values: seconds, duration strings ('5m', '1h') or negative for forever."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return math.inf if value < 0 else float(value)
+    units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    for suffix in ('ms', 's', 'm', 'h'):
+        if value.endswith(suffix):
+            number = float(value[:-len(suffix)])
+            return math.inf if number < 0 else number * units[suffix]
+    return parse_keep_alive(float(value), default)
+
+class ModelResidency:
+    """Tracks which models are loaded and when they expire, like Ollama's scheduler."""
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._loaded = {}  # model -> (expires_at, last_used)
+        self.loads = 0
+
+    def _expire(self, now):
+        for model in [m for m, (expires, _) in self._loaded.items() if expires <= now]:
+            del self._loaded[model]
+
+    def acquire(self, model, keep_alive):
+        """Mark a model as used; return the load delay to simulate (0 if already resident)."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            delay = 0.0 if model in self._loaded else self.config.load_delay
+            if delay:
+                self.loads += 1
+                if self.config.max_loaded and len(self._loaded) >= self.config.max_loaded:
+                    oldest = min(self._loaded, key=lambda m: self._loaded[m][1])
+                    del self._loaded[oldest]
+            self._loaded[model] = (now + delay + keep_alive, now)
+            return delay
+
+    def unload(self, model):
+        with self._lock:
+            self._loaded.pop(model, None)
+
+    def loaded(self):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            return dict(self._loaded)
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockOllama/1.0'
+    # Go's net/http (and so Ollama) sets TCP_NODELAY; without it Nagle + delayed ACK adds ~40ms to TTFT
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _send_chunk(self, payload):
+        line = (json.dumps(payload) + '\n').encode()
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _model_info(self, name, expires_at=None):
+        size = int(self.config.model_size_mb * 1024 * 1024)
+        info = {
+            'name': name,
+            'model': name,
+            'size': size,
+            'digest': hashlib.sha256(name.encode()).hexdigest(),
+            'details': {'format': 'gguf', 'family': 'mock', 'parameter_size': name.rsplit(':', 1)[-1].upper(),
+                        'quantization_level': 'Q4_K_M'},
+        }
+        if expires_at is not None:
+            info['size_vram'] = size
+            info['expires_at'] = (datetime.fromtimestamp(expires_at, timezone.utc).isoformat()
+                                  if math.isfinite(expires_at) else '2318-01-01T00:00:00Z')
+        else:
+            info['modified_at'] = datetime.fromtimestamp(0, timezone.utc).isoformat()
+        return info
+
+    def do_GET(self):
+        if self.path == '/':
+            body = b'Ollama is running'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/api/version':
+            self._send_json(200, {'version': '0.0.0-mock'})
+        elif self.path == '/api/tags':
+            self._send_json(200, {'models': [self._model_info(m) for m in self.config.models]})
+        elif self.path == '/api/ps':
+            loaded = self.server.residency.loaded()
+            self._send_json(200, {'models': [self._model_info(m, expires) for m, (expires, _) in loaded.items()]})
+        else:
+            self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send_json(400, {'error': 'invalid JSON body'})
+            return
+
+        model = request.get('model')
+        if self.path in ('/api/generate', '/api/chat', '/api/embed', '/api/embeddings') and \
+                model not in self.config.models:
+            self._send_json(404, {'error': f"model '{model}' not found"})
+            return
+
+        if self.path == '/api/generate':
+            self._generate(request, request.get('prompt'), chat=False)
+        elif self.path == '/api/chat':
+            messages = request.get('messages')
+            prompt = None if messages is None else '\n'.join(m.get('content', '') for m in messages)
+            self._generate(request, prompt if messages else None, chat=True)
+        elif self.path in ('/api/embed', '/api/embeddings'):
+            self._embed(request, legacy=self.path == '/api/embeddings')
+        else:
+            self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+
+    def _timings(self, request, prompt):
+        """Deterministic (seeded per request content) jittered delays for prefill and each token."""
+        config = self.config
+        options = request.get('options') or {}
+        num_predict = options.get('num_predict', config.num_predict)
+        prompt_tokens = count_tokens(prompt)
+        seed = f"{config.seed}:{request.get('model')}:{prompt}:{json.dumps(options, sort_keys=True)}"
+        rng = random.Random(seed)
+
+        def jittered(seconds):
+            if not config.jitter:
+                return seconds
+            return max(0.0, rng.gauss(seconds, seconds * config.jitter))
+
+        prefill = config.base_latency + jittered(prompt_tokens / config.prefill_tps)
+        token_delays = [jittered(1.0 / config.decode_tps) for _ in range(max(0, num_predict))]
+        return prompt_tokens, prefill, token_delays
+
+    def _generate(self, request, prompt, chat):
+        config = self.config
+        model = request['model']
+        keep_alive = parse_keep_alive(request.get('keep_alive'), config.keep_alive)
+        stream = request.get('stream', True)
+        started = time.perf_counter()
+
+        if not prompt:
+            # An empty request loads (or, with keep_alive 0, unloads) the model
+            if keep_alive == 0:
+                self.server.residency.unload(model)
+                load_delay = 0.0
+            else:
+                load_delay = self.server.residency.acquire(model, keep_alive)
+                time.sleep(load_delay)
+            final = {'model': model, 'created_at': datetime.now(timezone.utc).isoformat(), 'done': True,
+                     'done_reason': 'unload' if keep_alive == 0 else 'load',
+                     'load_duration': int(load_delay * 1e9),
+                     'total_duration': int((time.perf_counter() - started) * 1e9)}
+            final.update({'message': {'role': 'assistant', 'content': ''}} if chat else {'response': ''})
+            self._send_json(200, final)
+            return
+
+        load_delay = self.server.residency.acquire(model, keep_alive)
+        prompt_tokens, prefill, token_delays = self._timings(request, prompt)
+
+        time.sleep(load_delay)
+        prefill_start = time.perf_counter()
+        time.sleep(prefill)
+        decode_start = time.perf_counter()
+
+        if stream:
+            self._start_stream()
+
+        # Schedule tokens against absolute deadlines so sleep overshoot doesn't accumulate
+        deadline = decode_start
+        text = []
+        for i, delay in enumerate(token_delays):
+            deadline += delay
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            token = f"tok{i} "
+            text.append(token)
+            if stream:
+                chunk = {'model': model, 'created_at': datetime.now(timezone.utc).isoformat(), 'done': False}
+                chunk.update({'message': {'role': 'assistant', 'content': token}} if chat else {'response': token})
+                self._send_chunk(chunk)
+        finished = time.perf_counter()
+
+        final = {
+            'model': model,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'done': True,
+            'done_reason': 'length',
+            'total_duration': int((finished - started) * 1e9),
+            'load_duration': int(load_delay * 1e9),
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int((decode_start - prefill_start) * 1e9),
+            'eval_count': len(token_delays),
+            'eval_duration': int((finished - decode_start) * 1e9),
+        }
+        if stream:
+            final.update({'message': {'role': 'assistant', 'content': ''}} if chat else {'response': ''})
+            self._send_chunk(final)
+            self._end_stream()
+        else:
+            content = ''.join(text)
+            final.update({'message': {'role': 'assistant', 'content': content}} if chat else {'response': content})
+            self._send_json(200, final)
+
+    def _embed(self, request, legacy):
+        config = self.config
+        model = request['model']
+        inputs = request.get('prompt', '') if legacy else request.get('input', '')
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs)
+        started = time.perf_counter()
+
+        load_delay = self.server.residency.acquire(model, parse_keep_alive(request.get('keep_alive'), config.keep_alive))
+        tokens = sum(count_tokens(text) for text in inputs)
+        time.sleep(load_delay + config.base_latency + tokens / config.embed_tps)
+
+        embeddings = []
+        for text in inputs:
+            rng = random.Random(f"{config.seed}:{model}:{text}")
+            vector = [rng.gauss(0, 1) for _ in range(config.embedding_dim)]
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            embeddings.append([v / norm for v in vector])
+
+        if legacy:
+            self._send_json(200, {'embedding': embeddings[0]})
+        else:
+            self._send_json(200, {
+                'model': model,
+                'embeddings': embeddings,
+                'total_duration': int((time.perf_counter() - started) * 1e9),
+                'load_duration': int(load_delay * 1e9),
+                'prompt_eval_count': tokens,
+            })
+
+class MockOllamaServer(ThreadingHTTPServer):
+    """Threaded mock server; use start()/stop() to run it in the background."""
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host='127.0.0.1', port=11434, verbose=False):
+        super().__init__((host, port), MockOllamaHandler)
+        self.config = config or MockConfig()
+        self.residency = ModelResidency(self.config)
+        self.verbose = verbose
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-ollama', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+def main():
+    defaults = MockConfig()
+    parser = argparse.ArgumentParser(description='Run a deterministic mock Ollama server.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=11434, help='Port to listen on')
+    parser.add_argument('--models', default=','.join(defaults.models), help='Comma-separated model names')
+    parser.add_argument('--model-size-mb', type=float, default=defaults.model_size_mb, help='Reported model size')
+    parser.add_argument('--load-delay', type=float, default=defaults.load_delay, help='Model load time (s)')
+    parser.add_argument('--prefill-tps', type=float, default=defaults.prefill_tps, help='Prompt tokens/sec')
+    parser.add_argument('--decode-tps', type=float, default=defaults.decode_tps, help='Generated tokens/sec')
+    parser.add_argument('--base-latency', type=float, default=defaults.base_latency, help='Fixed request latency (s)')
+    parser.add_argument('--jitter', type=float, default=defaults.jitter, help='Relative std-dev of token delays')
+    parser.add_argument('--num-predict', type=int, default=defaults.num_predict, help='Default tokens per response')
+    parser.add_argument('--embed-tps', type=float, default=defaults.embed_tps, help='Embedding tokens/sec')
+    parser.add_argument('--embedding-dim', type=int, default=defaults.embedding_dim, help='Embedding size')
+    parser.add_argument('--keep-alive', type=float, default=defaults.keep_alive, help='Default residency (s)')
+    parser.add_argument('--max-loaded', type=int, default=defaults.max_loaded, help='Max resident models (0 = unlimited)')
+    parser.add_argument('--seed', type=int, default=defaults.seed, help='Seed for jitter and embeddings')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    config = MockConfig(
+        models=[m for m in args.models.split(',') if m], model_size_mb=args.model_size_mb,
+        load_delay=args.load_delay, prefill_tps=args.prefill_tps, decode_tps=args.decode_tps,
+        base_latency=args.base_latency, jitter=args.jitter, num_predict=args.num_predict,
+        embed_tps=args.embed_tps, embedding_dim=args.embedding_dim, keep_alive=args.keep_alive,
+        max_loaded=args.max_loaded, seed=args.seed,
+    )
+    server = MockOllamaServer(config, args.host, args.port, args.verbose)
+    print(f"Mock Ollama listening on {server.url} (models: {', '.join(config.models)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -131,6 +131,26 @@ if [ -f "${REPORTS_DIR}/hardware_info.txt" ] && [ -f "${REPORTS_DIR}/summary.csv
     fi
 fi
 
+# Show the context length fit from memory_profile.py if this session has one
+if [ -f "${REPORTS_DIR}/memory_fit.csv" ]; then
+    echo -e "\n${BOLD}${BLUE}Memory vs Context Length${NC}"
+    echo "============================================================"
+    echo -e "${BOLD}Model                          | Fixed (MB) | KV KiB/token | Max Context | Max Slots | Fit${NC}"
+    tail -n +2 "${REPORTS_DIR}/memory_fit.csv" | tr -d '\r' | \
+        while IFS=, read -r model points fixed kv_bytes r2 reported_fixed reported_kv budget max_ctx slot_ctx max_slots fit_source; do
+        # Predictions use Ollama's reported sizes when the RSS fit was unusable
+        if [ "$fit_source" = "reported" ]; then
+            fixed=$reported_fixed
+            kv_bytes=$reported_kv
+        fi
+        kv_kib=$(echo "$kv_bytes" | awk '{ if ($1 == "N/A") print "N/A"; else printf "%.1f", $1 / 1024 }')
+        printf "%-30s | %-10s | %-12s | %-11s | %-9s | %s\n" "$model" "$fixed" "$kv_kib" "$max_ctx" "$max_slots" "${fit_source:-N/A}"
+    done
+    budget=$(tail -n +2 "${REPORTS_DIR}/memory_fit.csv" | head -1 | cut -d, -f8)
+    slot_ctx=$(tail -n +2 "${REPORTS_DIR}/memory_fit.csv" | head -1 | cut -d, -f10)
+    echo "Predictions for a ${budget} MB budget; slots are ${slot_ctx}-token contexts"
+fi
+
 echo -e "\n${BOLD}${YELLOW}Memory Usage Analysis${NC}"
 echo "============================================================"
 echo "- Memory footprint is primarily determined by model size (parameters)"
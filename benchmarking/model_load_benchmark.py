@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Model load benchmark for Ollama
+Separates cold start (weights from disk), warm reload (page cache hot) and hot inference
+(runner resident) by controlling keep_alive and unloading models through the API between phases
+"""
+
+import argparse
+import asyncio
+import platform
+import subprocess
+import sys
+import time
+
+from benchmark_common import DEFAULT_OLLAMA_API, load_prompts, percentile, session_dir, write_csv
+from ollama_client import OllamaClient
+
+RESULTS_FILE = 'model_load_results.csv'
+SUMMARY_FILE = 'model_load_summary.csv'
+
+PHASES = ['cold', 'warm', 'hot']
+
+RESULTS_HEADER = [
+    'Model', 'Phase', 'Repeat', 'Cache Dropped', 'Load Duration (s)', 'Time to Ready (s)', 'Resident',
+    'Resident Size (MB)', 'VRAM Size (MB)', 'First Request Latency (s)', 'First Request Load Duration (s)',
+    'Steady Tokens/sec', 'Error',
+]
+
+SUMMARY_HEADER = [
+    'Model', 'Phase', 'Repeats', 'Avg Load Duration (s)', 'Avg Time to Ready (s)', 'Max Time to Ready (s)',
+    'Avg First Request Latency (s)', 'Avg Steady Tokens/sec', 'Resident Size (MB)',
+]
+
+def drop_page_cache():
+    """Drop the OS page cache so the next load reads weights from disk. Needs sudo."""
+    if platform.system() == 'Darwin':
+        command = ['sudo', '-n', 'purge']
+    else:
+        command = ['sudo', '-n', 'sh', '-c', 'sync && echo 3 > /proc/sys/vm/drop_caches']
+    try:
+        return subprocess.run(command, capture_output=True, timeout=120).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+def find_resident(ps, model):
+    """Return the /api/ps entry for a model, or None if it is not loaded."""
+    for entry in ps.get('models', []):
+        if model in (entry.get('name'), entry.get('model')):
+            return entry
+    return None
+
+async def wait_for_residency(client, model, resident, timeout=30.0):
+    """Poll /api/ps until the model is (or is no longer) loaded; return the entry or None."""
+    deadline = time.perf_counter() + timeout
+    delay = 0.02
+    while True:
+        entry = find_resident(await client.ps(), model)
+        if (entry is not None) == resident or time.perf_counter() >= deadline:
+            return entry
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+async def measure_phase(client, model, phase, prompt, options, keep_alive, requests, drop_caches):
+    """Run one load phase for a model and return its result record."""
+    record = {'model': model, 'phase': phase, 'cache_dropped': False, 'error': ''}
+    try:
+        if phase == 'hot':
+            # Make sure the runner is resident before timing the no-op load
+            await client.load(model, keep_alive)
+            await wait_for_residency(client, model, True)
+        else:
+            await client.unload(model)
+            if await wait_for_residency(client, model, False) is not None:
+                raise RuntimeError('model still resident after unload')
+            if phase == 'cold':
+                record['cache_dropped'] = drop_caches and drop_page_cache()
+            else:
+                # Read the weights once so the page cache is hot, then unload the runner again
+                await client.load(model, keep_alive)
+                await client.unload(model)
+                await wait_for_residency(client, model, False)
+
+        started = time.perf_counter()
+        response = await client.load(model, keep_alive)
+        entry = await wait_for_residency(client, model, True)
+        record['time_to_ready'] = time.perf_counter() - started
+        record['load_duration'] = response.get('load_duration', 0) / 1e9
+        record['resident'] = entry is not None
+        if entry:
+            record['size_mb'] = entry.get('size', 0) / 1024 / 1024
+            record['vram_mb'] = entry.get('size_vram', 0) / 1024 / 1024
+
+        rates = []
+        for index in range(requests):
+            request_start = time.perf_counter()
+            response = await client.generate(model, prompt, options=options, keep_alive=keep_alive)
+            if index == 0:
+                record['first_latency'] = time.perf_counter() - request_start
+                record['first_load_duration'] = response.get('load_duration', 0) / 1e9
+            if response.get('eval_duration'):
+                rates.append(response.get('eval_count', 0) / (response['eval_duration'] / 1e9))
+        record['steady_tps'] = percentile(rates, 50) if rates else None
+    except Exception as e:
+        record['error'] = str(e) or type(e).__name__
+    return record
+
+def summarize(records):
+    """Average each model/phase over its successful repeats."""
+    groups = {}
+    for r in records:
+        if not r['error']:
+            groups.setdefault((r['model'], r['phase']), []).append(r)
+    rows = []
+    for (model, phase), group in groups.items():
+        def avg(key):
+            values = [r[key] for r in group if r.get(key) is not None]
+            return sum(values) / len(values) if values else None
+        rows.append([model, phase, len(group), avg('load_duration'), avg('time_to_ready'),
+                     max(r['time_to_ready'] for r in group), avg('first_latency'), avg('steady_tps'),
+                     avg('size_mb')])
+    return rows
+
+def result_row(r, repeat):
+    cache_dropped = ('yes' if r['cache_dropped'] else 'no') if r['phase'] == 'cold' else 'N/A'
+    resident = ('yes' if r['resident'] else 'no') if 'resident' in r else None
+    return [r['model'], r['phase'], repeat, cache_dropped, r.get('load_duration'), r.get('time_to_ready'), resident,
+            r.get('size_mb'), r.get('vram_mb'), r.get('first_latency'), r.get('first_load_duration'),
+            r.get('steady_tps'), r['error']]
+
+async def get_models(client, requested):
+    """Use the requested models, or every installed model if none were given."""
+    if requested:
+        return requested
+    tags = await client.tags()
+    return [m['name'] for m in tags.get('models', [])]
+
+async def run(args):
+    prompt = dict(load_prompts([args.prompt]))[args.prompt]
+    options = {'num_predict': args.num_predict} if args.num_predict else None
+    output_dir = session_dir(args.session, args.output_dir)
+    phases = [phase for phase in args.phases.split(',') if phase]
+    if 'cold' in phases and not args.drop_caches:
+        print("Note: without --drop-caches the cold phase may read weights from the page cache")
+
+    results, records = [], []
+    async with OllamaClient(args.api, max_connections=2, timeout=args.timeout) as client:
+        models = await get_models(client, [m for m in (args.models or '').split(',') if m])
+        for model in models:
+            print(f"\nModel load benchmark: {model}")
+            for repeat in range(1, args.repeats + 1):
+                for phase in phases:
+                    record = await measure_phase(client, model, phase, prompt, options, args.keep_alive,
+                                                 args.requests, args.drop_caches)
+                    records.append(record)
+                    results.append(result_row(record, repeat))
+                    if record['error']:
+                        print(f"  {phase:<5} #{repeat}: error: {record['error']}")
+                    else:
+                        tps = record.get('steady_tps')
+                        print(f"  {phase:<5} #{repeat}: load {record['load_duration']:.2f}s, "
+                              f"ready {record['time_to_ready']:.2f}s, "
+                              f"resident {'yes' if record['resident'] else 'NO'}, "
+                              f"steady {f'{tps:.1f}' if tps else 'N/A'} tok/s")
+            if args.unload_after:
+                await client.unload(model)
+
+    write_csv(f"{output_dir}/{RESULTS_FILE}", RESULTS_HEADER, results)
+    write_csv(f"{output_dir}/{SUMMARY_FILE}", SUMMARY_HEADER, summarize(records))
+    print(f"\nModel load results saved to: {output_dir}/{RESULTS_FILE}")
+    print(f"Model load summary saved to: {output_dir}/{SUMMARY_FILE}")
+    return 1 if any(r['error'] for r in records) else 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold, warm and hot model loads in Ollama.')
+    parser.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+    parser.add_argument('--models', help='Comma-separated models (default: all installed)')
+    parser.add_argument('--phases', default=','.join(PHASES), help='Comma-separated phases: cold,warm,hot')
+    parser.add_argument('--repeats', type=int, default=1, help='Times to repeat each phase')
+    parser.add_argument('--requests', type=int, default=3, help='Generations per phase for steady-state tokens/sec')
+    parser.add_argument('--prompt', default='Short', help='Prompt name from benchmark-models.sh')
+    parser.add_argument('--num-predict', type=int, default=128, help='Tokens generated per request')
+    parser.add_argument('--keep-alive', default='10m', help='keep_alive for loads and requests within a phase')
+    parser.add_argument('--drop-caches', action='store_true',
+                        help='Drop the OS page cache before cold loads (needs passwordless sudo)')
+    parser.add_argument('--unload-after', action='store_true', help='Unload each model when done')
+    parser.add_argument('--timeout', type=float, default=900, help='Per-read timeout in seconds')
+    parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    args = parser.parse_args()
+    phases = [phase for phase in args.phases.split(',') if phase]
+    unknown = [phase for phase in phases if phase not in PHASES]
+    if unknown or not phases:
+        parser.error(f"unknown phases: {', '.join(unknown)} (choose from {', '.join(PHASES)})" if unknown
+                     else f"no phases given (choose from {', '.join(PHASES)})")
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
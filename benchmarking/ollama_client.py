@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Minimal asyncio client for the Ollama HTTP API
+Keeps a pool of keep-alive connections so load tests measure Ollama, not connection setup
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from benchmark_common import DEFAULT_OLLAMA_API
+
+class OllamaError(Exception):
+    """Raised when the Ollama API returns an error or an unreadable response"""
+
+class OllamaClient:
+    """Pooled HTTP/1.1 client for a single Ollama endpoint."""
+
+    def __init__(self, base_url=DEFAULT_OLLAMA_API, max_connections=8, timeout=600.0):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http':
+            raise ValueError(f"Only http:// endpoints are supported: {base_url}")
+        self.base_url = base_url.rstrip('/')
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Close all idle pooled connections."""
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def _read(self, coro):
+        return await asyncio.wait_for(coro, self.timeout)
+
+    async def _open(self, method, path, payload):
+        """Send a request and read the response head, reusing an idle connection if possible."""
+        body = json.dumps(payload).encode() if payload is not None else b''
+        head = (
+            f"{method} {self.base_path}{path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode()
+
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            if self._idle:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await self._read(asyncio.open_connection(self.host, self.port))
+            try:
+                writer.write(head + body)
+                await writer.drain()
+                status_line = await self._read(reader.readline())
+                if not status_line:
+                    raise ConnectionResetError("Connection closed before response")
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if attempt:
+                    raise
+
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            writer.close()
+            raise OllamaError(f"Malformed status line: {status_line!r}")
+
+        headers = {}
+        while True:
+            line = await self._read(reader.readline())
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return status, headers, reader, writer
+
+    async def _body_chunks(self, headers, reader):
+        """Yield raw body chunks using chunked encoding, Content-Length or read-to-EOF."""
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size_line = await self._read(reader.readline())
+                size = int(size_line.split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    # Consume trailers up to the final blank line
+                    while (await self._read(reader.readline())) not in (b'\r\n', b'\n', b''):
+                        pass
+                    return
+                chunk = await self._read(reader.readexactly(size))
+                await self._read(reader.readexactly(2))
+                yield chunk
+        elif 'content-length' in headers:
+            remaining = int(headers['content-length'])
+            while remaining > 0:
+                chunk = await self._read(reader.read(min(remaining, 65536)))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            while True:
+                chunk = await self._read(reader.read(65536))
+                if not chunk:
+                    return
+                yield chunk
+
+    async def request(self, method, path, payload=None):
+        """Send a request and return the decoded JSON response."""
+        async with self._slots:
+            status, headers, reader, writer = await self._open(method, path, payload)
+            complete = False
+            try:
+                body = b''.join([chunk async for chunk in self._body_chunks(headers, reader)])
+                complete = True
+            finally:
+                self._pool(reader, writer, headers, complete)
+
+        if status >= 400:
+            raise OllamaError(f"{method} {path} returned HTTP {status}: {body[:200]!r}")
+        try:
+            return json.loads(body) if body else {}
+        except ValueError:
+            raise OllamaError(f"{method} {path} returned invalid JSON: {body[:200]!r}")
+
+    async def stream(self, path, payload):
+        """Yield (arrival_time, object) for each NDJSON line of a streaming response.
+
+        arrival_time is time.perf_counter() when the line was read off the socket.
+        """
+        async with self._slots:
+            status, headers, reader, writer = await self._open('POST', path, payload)
+            complete = False
+            try:
+                if status >= 400:
+                    body = b''.join([chunk async for chunk in self._body_chunks(headers, reader)])
+                    complete = True
+                    raise OllamaError(f"POST {path} returned HTTP {status}: {body[:200]!r}")
+
+                buffer = b''
+                async for chunk in self._body_chunks(headers, reader):
+                    arrived = time.perf_counter()
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b'\n')
+                    for line in lines:
+                        if line.strip():
+                            yield arrived, json.loads(line)
+                if buffer.strip():
+                    yield time.perf_counter(), json.loads(buffer)
+                complete = True
+            finally:
+                self._pool(reader, writer, headers, complete)
+
+    def _pool(self, reader, writer, headers, complete):
+        """Return a connection to the idle pool if the response was fully consumed."""
+        reusable = (
+            complete
+            and headers.get('connection', '').lower() != 'close'
+            and ('content-length' in headers or 'transfer-encoding' in headers)
+        )
+        if reusable:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def tags(self):
+        """List installed models (GET /api/tags)."""
+        return await self.request('GET', '/api/tags')
+
+    async def ps(self):
+        """List models currently loaded in memory (GET /api/ps)."""
+        return await self.request('GET', '/api/ps')
+
+    async def generate(self, model, prompt, options=None, **fields):
+        """Run a non-streaming generation (POST /api/generate)."""
+        payload = {'model': model, 'prompt': prompt, 'stream': False, **fields}
+        if options:
+            payload['options'] = options
+        return await self.request('POST', '/api/generate', payload)
+
+    async def chat(self, model, messages, options=None, **fields):
+        """Run a non-streaming chat completion (POST /api/chat)."""
+        payload = {'model': model, 'messages': messages, 'stream': False, **fields}
+        if options:
+            payload['options'] = options
+        return await self.request('POST', '/api/chat', payload)
+
+    def chat_stream(self, model, messages, options=None, **fields):
+        """Run a streaming chat completion, yielding (arrival_time, chunk) pairs."""
+        payload = {'model': model, 'messages': messages, 'stream': True, **fields}
+        if options:
+            payload['options'] = options
+        return self.stream('/api/chat', payload)
+
+    async def embed(self, model, inputs, **fields):
+        """Embed one text or a batch of texts (POST /api/embed)."""
+        return await self.request('POST', '/api/embed', {'model': model, 'input': inputs, **fields})
+
+    async def embeddings(self, model, prompt, **fields):
+        """Embed a single text with the legacy endpoint (POST /api/embeddings)."""
+        return await self.request('POST', '/api/embeddings', {'model': model, 'prompt': prompt, **fields})
+
+    async def load(self, model, keep_alive=None):
+        """Load a model without generating (empty prompt), optionally setting keep_alive."""
+        fields = {'keep_alive': keep_alive} if keep_alive is not None else {}
+        return await self.generate(model, '', **fields)
+
+    async def unload(self, model):
+        """Unload a model immediately (empty prompt with keep_alive 0)."""
+        return await self.generate(model, '', keep_alive=0)
+
+    def generate_stream(self, model, prompt, options=None, **fields):
+        """Run a streaming generation, yielding (arrival_time, chunk) pairs."""
+        payload = {'model': model, 'prompt': prompt, 'stream': True, **fields}
+        if options:
+            payload['options'] = options
+        return self.stream('/api/generate', payload)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate
+Compares a benchmark session against a baseline session or a rolling window of earlier
+sessions using bootstrap confidence intervals, and exits non-zero on significant regressions
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+from benchmark_common import REPORTS_BASE_DIR, SESSION_PATTERN, write_csv
+from results_store import DEFAULT_DB_PATH, RAW_SOURCES, DuplicateSessionError, ResultsStore
+
+DIFF_FILE = 'regression_diff.json'
+DIFF_CSV_FILE = 'regression_diff.csv'
+
+# Metrics checked by default and whether a higher value is better
+DEFAULT_METRICS = {
+    'Tokens per Second': True,
+    'Decode Tokens/sec': True,
+    'TTFT (s)': False,
+    'Peak Memory (MB)': False,
+    'Memory Used (MB)': False,
+}
+
+DIFF_HEADER = [
+    'Model', 'Prompt', 'Metric', 'Baseline Runs', 'Candidate Runs', 'Baseline Mean', 'Candidate Mean',
+    'Change (%)', 'CI Low (%)', 'CI High (%)', 'Status',
+]
+
+def mean(values):
+    return sum(values) / len(values)
+
+def bootstrap_change(baseline, candidate, iterations=2000, confidence=0.95, rng=None):
+    """Bootstrap CI for the relative change in means, candidate vs. baseline, as percentages."""
+    rng = rng or random.Random(0)
+    base_mean = mean(baseline)
+    point = 100.0 * (mean(candidate) - base_mean) / base_mean
+    if len(baseline) < 2 or len(candidate) < 2:
+        return point, None, None
+    changes = []
+    for _ in range(iterations):
+        b = mean(rng.choices(baseline, k=len(baseline)))
+        c = mean(rng.choices(candidate, k=len(candidate)))
+        if b:
+            changes.append(100.0 * (c - b) / b)
+    changes.sort()
+    tail = (1 - confidence) / 2
+    low = changes[int(tail * (len(changes) - 1))]
+    high = changes[int(round((1 - tail) * (len(changes) - 1)))]
+    return point, low, high
+
+def classify(point, low, high, higher_is_better, threshold):
+    """Label a comparison; it is significant only if the whole CI clears the threshold."""
+    if low is None:
+        return 'insufficient data'
+    worse_low, worse_high = (-high, -low) if higher_is_better else (low, high)
+    if worse_low > threshold:
+        return 'regression'
+    if worse_high < -threshold:
+        return 'improvement'
+    return 'no change'
+
+def candidate_dir(reports_dir, session=None):
+    """Directory of the named session, or of the newest session with raw results, if any."""
+    if session:
+        path = os.path.join(reports_dir, session)
+        return path if os.path.isdir(path) else None
+    if not os.path.isdir(reports_dir):
+        return None
+    names = sorted(name for name in os.listdir(reports_dir) if SESSION_PATTERN.fullmatch(name)
+                   and any(os.path.exists(os.path.join(reports_dir, name, f)) for f in RAW_SOURCES))
+    return os.path.join(reports_dir, names[-1]) if names else None
+
+def resolve_sessions(store, candidate, baseline, window, any_host):
+    """Pick the candidate session and the baseline sessions to compare against."""
+    sessions = store.sessions()
+    if not sessions:
+        raise ValueError("results store is empty; run 'results_store.py import' first")
+    by_name = {row[0]: row for row in sessions}
+    # compare() only reads benchmark-models.sh runs, so other session types can't be compared
+    comparable = store.sessions_with_source('benchmark')
+    if candidate is None:
+        latest = [row[0] for row in sessions if row[0] in comparable]
+        if not latest:
+            raise ValueError("no benchmark sessions in the results store")
+        candidate = latest[0]
+    if candidate not in by_name:
+        raise ValueError(f"session {candidate} is not in the results store")
+    if baseline:
+        missing = [name for name in baseline if name not in by_name]
+        if missing:
+            raise ValueError(f"baseline session(s) not in the results store: {', '.join(missing)}")
+        return candidate, baseline
+
+    _, started_at, host, _, _ = by_name[candidate]
+    earlier = [row[0] for row in sessions
+               if row[1] < started_at and row[0] in comparable and (any_host or host is None or row[2] == host)]
+    if not earlier:
+        raise ValueError(f"no earlier sessions to use as a baseline for {candidate}")
+    return candidate, earlier[:window]
+
+def compare(store, candidate, baseline, metrics, threshold, iterations, confidence, seed):
+    """Compare every model/prompt/metric present in both the candidate and the baseline."""
+    rng = random.Random(seed)
+    results = []
+    for metric, higher_is_better in metrics.items():
+        grouped = {}
+        for session, _, model, prompt, value in store.values(metric, sessions=[candidate, *baseline],
+                                                             source='benchmark'):
+            side = 'candidate' if session == candidate else 'baseline'
+            grouped.setdefault((model, prompt), {'baseline': [], 'candidate': []})[side].append(value)
+        for (model, prompt), values in sorted(grouped.items()):
+            if not values['baseline'] or not values['candidate'] or not mean(values['baseline']):
+                continue
+            point, low, high = bootstrap_change(values['baseline'], values['candidate'], iterations, confidence, rng)
+            results.append({
+                'model': model,
+                'prompt': prompt,
+                'metric': metric,
+                'higher_is_better': higher_is_better,
+                'baseline_runs': len(values['baseline']),
+                'candidate_runs': len(values['candidate']),
+                'baseline_mean': mean(values['baseline']),
+                'candidate_mean': mean(values['candidate']),
+                'change_pct': point,
+                'ci_low_pct': low,
+                'ci_high_pct': high,
+                'status': classify(point, low, high, higher_is_better, threshold),
+            })
+    return results
+
+def print_results(results):
+    flagged = [r for r in results if r['status'] in ('regression', 'improvement')]
+    print(f"\n{'Model':<28} {'Prompt':<8} {'Metric':<20} {'Change':>8} {'CI':>19}  Status")
+    print('-' * 100)
+    for r in flagged or results:
+        ci = (f"[{r['ci_low_pct']:+.1f}, {r['ci_high_pct']:+.1f}]" if r['ci_low_pct'] is not None else 'N/A')
+        print(f"{r['model']:<28} {str(r['prompt']):<8} {r['metric']:<20} {r['change_pct']:+7.1f}% {ci:>19}  {r['status']}")
+    if not flagged:
+        print("No significant changes.")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare a benchmark session against a baseline and fail on significant regressions.')
+    parser.add_argument('--session', help='Candidate session (default: latest session)')
+    parser.add_argument('--baseline', help='Comma-separated baseline session(s) (default: rolling window)')
+    parser.add_argument('--window', type=int, default=5, help='Number of earlier sessions in the rolling baseline')
+    parser.add_argument('--any-host', action='store_true', help='Allow rolling baseline sessions from other hosts')
+    parser.add_argument('--metrics', help='Comma-separated metrics to check (default: throughput, TTFT, memory)')
+    parser.add_argument('--higher-is-better', default='', help='Comma-separated custom metrics where higher is better')
+    parser.add_argument('--threshold', type=float, default=5.0, help='Minimum change (%%) to flag')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Bootstrap confidence level')
+    parser.add_argument('--iterations', type=int, default=2000, help='Bootstrap resamples')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for resampling')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Results store path')
+    parser.add_argument('--reports-dir', default=REPORTS_BASE_DIR, help='Base directory of session reports')
+    parser.add_argument('--output-dir', help='Directory for the diff (default: the candidate session)')
+    args = parser.parse_args()
+
+    if args.metrics:
+        higher = {name for name in args.higher_is_better.split(',') if name}
+        metrics = {name: DEFAULT_METRICS.get(name, name in higher) for name in args.metrics.split(',') if name}
+    else:
+        metrics = DEFAULT_METRICS
+
+    with ResultsStore(args.db) as store:
+        # Pick up the candidate if it finished after the last import. Only the candidate is imported:
+        # sessions benchmark-models.sh kept out of the store (mock runs, BENCHMARK_NO_STORE) must
+        # not end up in a rolling baseline
+        path = candidate_dir(args.reports_dir, args.session)
+        if path and not os.environ.get('BENCHMARK_NO_STORE'):
+            try:
+                store.import_sessions([path])
+            except DuplicateSessionError as e:
+                print(f"Error: {e}")
+                return 2
+        try:
+            candidate, baseline = resolve_sessions(
+                store, args.session, [s for s in (args.baseline or '').split(',') if s], args.window, args.any_host)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 2
+        print(f"Candidate: {candidate}")
+        print(f"Baseline:  {', '.join(baseline)}")
+        results = compare(store, candidate, baseline, metrics, args.threshold,
+                          args.iterations, args.confidence, args.seed)
+
+    regressions = [r for r in results if r['status'] == 'regression']
+    print_results(results)
+
+    output_dir = args.output_dir or os.path.join(args.reports_dir, candidate)
+    os.makedirs(output_dir, exist_ok=True)
+    diff = {
+        'candidate': candidate,
+        'baseline': baseline,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'threshold_pct': args.threshold,
+        'confidence': args.confidence,
+        'iterations': args.iterations,
+        'regressions': len(regressions),
+        'improvements': sum(r['status'] == 'improvement' for r in results),
+        'comparisons': results,
+    }
+    with open(os.path.join(output_dir, DIFF_FILE), 'w') as f:
+        json.dump(diff, f, indent=2)
+    write_csv(os.path.join(output_dir, DIFF_CSV_FILE), DIFF_HEADER, [
+        [r['model'], r['prompt'], r['metric'], r['baseline_runs'], r['candidate_runs'],
+         r['baseline_mean'], r['candidate_mean'], r['change_pct'], r['ci_low_pct'], r['ci_high_pct'], r['status']]
+        for r in results])
+    print(f"\nRegression diff saved to: {os.path.join(output_dir, DIFF_FILE)}")
+
+    if regressions:
+        print(f"FAILED: {len(regressions)} significant regression(s)")
+        return 1
+    if not results:
+        print("Error: candidate and baseline have no model/prompt/metric in common")
+        return 2
+    undecided = sum(r['status'] == 'insufficient data' for r in results)
+    if undecided == len(results):
+        print("Error: no comparison had enough runs for a confidence interval (at least 2 per side); "
+              "the gate cannot decide. Run benchmark-models.sh with --runs=N")
+        return 2
+    if undecided:
+        print(f"Warning: {undecided} of {len(results)} comparisons had too few runs and were not tested")
+    print("PASSED")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
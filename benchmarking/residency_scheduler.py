@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Model residency scheduler for benchmark and replay workloads
+Groups a mixed workload (a JSONL trace or a models x prompts suite) by model so each model is
+loaded once, orders the groups to fit a memory budget, prefetches the next model while the
+current one finishes when both fit, and reports the load cycles and wall time saved versus
+running the workload in its original order
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from benchmark_common import DEFAULT_OLLAMA_API, format_value, load_prompts, session_dir, write_csv
+from load_generator import parse_list
+from memory_profile import total_memory_mb
+from model_load_benchmark import wait_for_residency
+from ollama_client import OllamaClient
+from workload_trace import read_trace, replay_request
+
+PLAN_FILE = 'residency_plan.csv'
+RESULTS_FILE = 'residency_results.csv'
+SUMMARY_FILE = 'residency_summary.csv'
+
+# A response whose load_duration exceeds this (seconds) counts as a model load
+LOAD_THRESHOLD = 0.1
+
+PLAN_HEADER = ['Position', 'Model', 'Requests', 'Size (MB)', 'Start State', 'Prefetch Next']
+
+RESULTS_HEADER = [
+    'Model', 'Order', 'Position', 'Line', 'Endpoint', 'Latency (s)', 'Load Duration (s)', 'Status',
+    'Generated Tokens', 'Error',
+]
+
+SUMMARY_HEADER = [
+    'Order', 'Requests', 'Errors', 'Predicted Loads', 'Estimated Load Time (s)', 'Measured Loads',
+    'Measured Load Time (s)', 'Wall Time (s)', 'Estimated Time Saved (s)', 'Time Saved (s)',
+]
+
+def workload_from_trace(path, limit=None):
+    """Read (line, entry) pairs from a trace in their recorded order."""
+    workload = []
+    for number, entry in read_trace(path):
+        if limit and len(workload) >= limit:
+            break
+        workload.append((number, entry))
+    return workload
+
+def workload_from_suite(models, prompt_names, runs, num_predict):
+    """Build a multi-model suite in its naive order: every prompt sent to each model in turn."""
+    options = {'num_predict': num_predict} if num_predict else None
+    workload = []
+    for _ in range(runs):
+        for name, prompt in load_prompts(prompt_names):
+            for model in models:
+                entry = {'model': model, 'endpoint': 'generate', 'prompt': prompt, 'name': name}
+                if options:
+                    entry['options'] = options
+                workload.append((len(workload) + 1, entry))
+    return workload
+
+async def model_sizes(client, models, size_factor, default_size_mb):
+    """Estimate each model's resident size in MB, and return the models already loaded.
+
+    /api/ps reports the real footprint (weights plus KV cache) of loaded models; for the rest
+    the file size from /api/tags is scaled by size_factor to allow for the KV cache and runtime.
+    """
+    ps = (await client.ps()).get('models', [])
+    tags = (await client.tags()).get('models', [])
+    loaded = {entry.get('name') or entry.get('model'): entry.get('size', 0) / 1024 / 1024 for entry in ps}
+    on_disk = {entry['name']: entry.get('size', 0) / 1024 / 1024 for entry in tags}
+    sizes = {model: loaded.get(model) or on_disk.get(model, default_size_mb) * size_factor for model in models}
+    return sizes, loaded
+
+def simulate(sequence, sizes, budget_mb, max_loaded, resident=()):
+    """Count model loads for a request sequence under LRU eviction, like Ollama's scheduler."""
+    loaded = OrderedDict((model, True) for model in resident)
+    loads = []
+    for model in sequence:
+        if model in loaded:
+            loaded.move_to_end(model)
+            continue
+        while loaded and (len(loaded) >= max_loaded or
+                          sum(sizes.get(m, 0) for m in loaded) + sizes.get(model, 0) > budget_mb):
+            loaded.popitem(last=False)
+        loaded[model] = True
+        loads.append(model)
+    return loads
+
+def build_plan(workload, sizes, budget_mb, resident=(), max_loaded=3, others=0):
+    """Group requests by model and order the groups; return a list of plan steps.
+
+    Models that are already loaded go first. After that the next group is the earliest-seen model
+    that fits in memory alongside the current one, so it can be prefetched while the current
+    group finishes; if none fits, the earliest-seen model follows after an unload. Fitting also
+    needs two free slots under max_loaded once the `others` models outside the workload are counted,
+    or Ollama would evict the current model to load the next.
+    """
+    groups = OrderedDict()
+    for position, (number, entry) in enumerate(workload):
+        groups.setdefault(entry['model'], []).append((position, number, entry))
+
+    def pair_fits(current, following):
+        return others + 2 <= max_loaded and sizes[current] + sizes[following] <= budget_mb
+
+    remaining = sorted(groups, key=lambda model: model not in resident)
+    ordered = []
+    while remaining:
+        current = ordered[-1] if ordered else None
+        fits = [model for model in remaining if current is not None and pair_fits(current, model)]
+        ordered.append(fits[0] if fits else remaining[0])
+        remaining.remove(ordered[-1])
+
+    steps = []
+    for index, model in enumerate(ordered):
+        following = ordered[index + 1] if index + 1 < len(ordered) else None
+        if model in resident:
+            state = 'resident'
+        elif steps and steps[-1]['prefetch']:
+            state = 'prefetched'
+        else:
+            state = 'load'
+        steps.append({
+            'model': model, 'requests': groups[model], 'state': state,
+            # A resident next model is already loaded, so there is nothing to prefetch
+            'prefetch': following is not None and following not in resident and pair_fits(model, following),
+        })
+    return steps
+
+def estimate_load_time(models, sizes, load_mb_per_sec):
+    return sum(sizes.get(model, 0) for model in models) / load_mb_per_sec
+
+def plan_rows(steps, sizes):
+    return [[index + 1, step['model'], len(step['requests']), sizes[step['model']], step['state'],
+             'yes' if step['prefetch'] else 'no'] for index, step in enumerate(steps)]
+
+async def unload_all(client, models):
+    """Unload every workload model so both orders start from the same (cold) state."""
+    for model in models:
+        await client.unload(model)
+        await wait_for_residency(client, model, False)
+
+async def run_requests(client, requests, order, args, results, on_last_issued=None):
+    """Issue requests in order with bounded concurrency, appending result rows."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(position, number, entry):
+        try:
+            record = await replay_request(client, entry, args.stream)
+        finally:
+            semaphore.release()
+        results.append({'model': entry['model'], 'order': order, 'position': position, 'line': number, **record})
+
+    tasks = []
+    for index, (position, number, entry) in enumerate(requests):
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(one(position, number, entry)))
+        if on_last_issued and index == len(requests) - 1:
+            on_last_issued()
+    await asyncio.gather(*tasks)
+
+async def execute_naive(client, workload, args, results):
+    requests = [(position, number, entry) for position, (number, entry) in enumerate(workload)]
+    started = time.perf_counter()
+    await run_requests(client, requests, 'naive', args, results)
+    return time.perf_counter() - started
+
+async def execute_plan(client, steps, args, results):
+    """Run each model group, warming the next model as the last request of a group goes out."""
+    started = time.perf_counter()
+    for index, step in enumerate(steps):
+        prefetch = []
+
+        def warm_next(index=index):
+            following = steps[index + 1]['model']
+            prefetch.append(asyncio.create_task(client.load(following, args.keep_alive)))
+
+        await run_requests(client, step['requests'], 'scheduled', args, results,
+                           warm_next if step['prefetch'] else None)
+        # The model is not needed again once its group is done
+        await client.unload(step['model'])
+        if prefetch:
+            try:
+                await prefetch[0]
+            except Exception as e:
+                print(f"  prefetch of {steps[index + 1]['model']} failed: {e}")
+        print(f"  {step['model']}: {len(step['requests'])} requests done"
+              f"{', next model prefetched' if prefetch else ''}")
+    return time.perf_counter() - started
+
+def measured(results, order):
+    records = [r for r in results if r['order'] == order]
+    loads = [r['load_duration'] for r in records if (r.get('load_duration') or 0) > LOAD_THRESHOLD]
+    return {
+        'requests': len(records),
+        'errors': sum(1 for r in records if r['status'] != 'ok'),
+        'loads': len(loads),
+        'load_time': sum(loads),
+    }
+
+def result_rows(results):
+    return [[r['model'], r['order'], r['position'] + 1, r['line'], r['endpoint'], r['latency'],
+             r.get('load_duration'), r['status'], r.get('generated_tokens'), r['error']]
+            for r in sorted(results, key=lambda r: (r['order'] != 'naive', r['position']))]
+
+async def run(args):
+    budget_mb = args.ram_budget_mb
+    if budget_mb is None:
+        total = total_memory_mb()
+        budget_mb = total - args.reserve_mb if total else float('inf')
+
+    concurrency = getattr(args, 'concurrency', 1)
+    async with OllamaClient(args.api, max_connections=concurrency + 2, timeout=args.timeout) as client:
+        if args.trace:
+            workload = workload_from_trace(args.trace, args.limit)
+        else:
+            models = args.models or [m['name'] for m in (await client.tags()).get('models', [])]
+            workload = workload_from_suite(models, args.prompts, args.runs, args.num_predict)
+        if not workload:
+            print("Error: empty workload; pass --trace or --models.")
+            return 1
+        models = list(dict.fromkeys(entry['model'] for _, entry in workload))
+        sizes, loaded = await model_sizes(client, models, args.size_factor, args.default_size_mb)
+        # Memory and slots held by models outside this workload aren't available to it
+        budget_mb -= sum(size for model, size in loaded.items() if model not in sizes)
+        others = sum(1 for model in loaded if model not in sizes)
+        # Executed runs start cold so the two orders are comparable; plans use what is loaded now
+        resident = () if args.command == 'run' else [model for model in models if model in loaded]
+
+        if args.command == 'order':
+            print('\n'.join(step['model'] for step in build_plan(workload, sizes, budget_mb, resident, args.max_loaded, others)))
+            return 0
+
+        steps = build_plan(workload, sizes, budget_mb, resident, args.max_loaded, others)
+        sequence = [entry['model'] for _, entry in workload]
+        naive_loads = simulate(sequence, sizes, budget_mb, args.max_loaded, resident)
+        scheduled_loads = [step['model'] for step in steps if step['state'] != 'resident']
+        # Prefetched loads overlap the previous group, so only the rest sit on the critical path
+        blocking_loads = [step['model'] for step in steps if step['state'] == 'load']
+        naive_estimate = estimate_load_time(naive_loads, sizes, args.load_mb_per_sec)
+        scheduled_estimate = estimate_load_time(blocking_loads, sizes, args.load_mb_per_sec)
+
+        print(f"Workload: {len(workload)} requests across {len(models)} models, "
+              f"budget {format_value(budget_mb, 0)} MB")
+        for row in plan_rows(steps, sizes):
+            print(f"  {row[0]:>2}. {row[1]:<30} {row[2]:>5} requests  {row[3]:>8.0f} MB  {row[4]:<10}"
+                  f"{'  prefetch next' if row[5] == 'yes' else ''}")
+        print(f"Predicted loads: {len(naive_loads)} in original order, {len(scheduled_loads)} scheduled "
+              f"({len(blocking_loads)} blocking); estimated load time saved "
+              f"{naive_estimate - scheduled_estimate:.1f}s")
+
+        results, naive_wall, scheduled_wall = [], None, None
+        if args.command == 'run':
+            if args.compare:
+                print("\nRunning the workload in its original order...")
+                await unload_all(client, models)
+                naive_wall = await execute_naive(client, workload, args, results)
+                print(f"  original order: {naive_wall:.1f}s")
+            print("\nRunning the scheduled workload...")
+            await unload_all(client, models)
+            scheduled_wall = await execute_plan(client, steps, args, results)
+            print(f"  scheduled: {scheduled_wall:.1f}s")
+
+    output_dir = session_dir(args.session, args.output_dir)
+    naive = measured(results, 'naive') if naive_wall is not None else {}
+    scheduled = measured(results, 'scheduled') if scheduled_wall is not None else {}
+    summary = [
+        ['naive', len(workload), naive.get('errors'), len(naive_loads), naive_estimate, naive.get('loads'),
+         naive.get('load_time'), naive_wall, None, None],
+        ['scheduled', len(workload), scheduled.get('errors'), len(scheduled_loads), scheduled_estimate,
+         scheduled.get('loads'), scheduled.get('load_time'), scheduled_wall, naive_estimate - scheduled_estimate,
+         naive_wall - scheduled_wall if naive_wall is not None and scheduled_wall is not None else None],
+    ]
+    write_csv(os.path.join(output_dir, PLAN_FILE), PLAN_HEADER, plan_rows(steps, sizes))
+    write_csv(os.path.join(output_dir, SUMMARY_FILE), SUMMARY_HEADER, summary)
+    print(f"\nResidency plan saved to: {output_dir}/{PLAN_FILE}")
+    print(f"Residency summary saved to: {output_dir}/{SUMMARY_FILE}")
+    if results:
+        write_csv(os.path.join(output_dir, RESULTS_FILE), RESULTS_HEADER, result_rows(results))
+        print(f"Residency results saved to: {output_dir}/{RESULTS_FILE}")
+    if naive_wall is not None:
+        saved = naive_wall - scheduled_wall
+        print(f"Wall time: {naive_wall:.1f}s in original order, {scheduled_wall:.1f}s scheduled "
+              f"({saved:+.1f}s saved, {100 * saved / naive_wall:.0f}%); model loads "
+              f"{naive['loads']} -> {scheduled['loads']}")
+    return 1 if any(r['status'] != 'ok' for r in results) else 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Group benchmark and replay workloads by model to avoid reloads.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    plan_parser = subparsers.add_parser('plan', help='Show the schedule and predicted savings without running it')
+    run_parser = subparsers.add_parser('run', help='Run the workload in scheduled order')
+    run_parser.add_argument('--compare', action='store_true',
+                            help='Also run the original order first and measure the wall time saved')
+    run_parser.add_argument('--concurrency', type=int, default=1, help='Concurrent requests within a run')
+    run_parser.add_argument('--stream', action='store_true', help='Stream responses (as workload_trace.py replay)')
+    run_parser.add_argument('--keep-alive', default='10m', help='keep_alive for prefetched models')
+    order_parser = subparsers.add_parser('order', help='Print the scheduled model order, one per line')
+
+    for sub in (plan_parser, run_parser, order_parser):
+        sub.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+        sub.add_argument('--trace', help='JSONL workload trace (see workload_trace.py)')
+        sub.add_argument('--limit', type=int, help='Use only the first N trace requests')
+        sub.add_argument('--models', type=parse_list(str), help='Comma-separated models for a suite (default: installed)')
+        sub.add_argument('--prompts', type=parse_list(str), default=['Short', 'Medium', 'Code'],
+                         help='Comma-separated prompt names from benchmark-models.sh for a suite')
+        sub.add_argument('--runs', type=int, default=1, help='Times the suite is repeated')
+        sub.add_argument('--num-predict', type=int, default=128, help='Tokens generated per suite request')
+        sub.add_argument('--ram-budget-mb', type=float, help='Memory budget for models (default: total minus reserve)')
+        sub.add_argument('--reserve-mb', type=float, default=2048,
+                         help='Memory kept for the OS and other services when the budget is derived')
+        sub.add_argument('--max-loaded', type=int, default=int(os.environ.get('OLLAMA_MAX_LOADED_MODELS') or 3),
+                         help="The server's OLLAMA_MAX_LOADED_MODELS, used when predicting loads")
+        sub.add_argument('--size-factor', type=float, default=1.2,
+                         help='Resident size / file size for models that are not loaded yet')
+        sub.add_argument('--default-size-mb', type=float, default=4096, help='Size assumed for unknown models')
+        sub.add_argument('--load-mb-per-sec', type=float, default=1000,
+                         help='Load speed used to estimate load time from model size')
+        sub.add_argument('--timeout', type=float, default=900, help='Per-read timeout in seconds')
+        sub.add_argument('--session', help='Session timestamp to write into (default: new session)')
+        sub.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+    args = parser.parse_args()
+
+    if args.trace and not os.path.exists(args.trace):
+        print(f"Error: trace not found: {args.trace}")
+        return 1
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Low-overhead CPU and memory sampler for the Ollama process tree
+Reads /proc directly (no fork per sample) into preallocated ring buffers, with a
+single `ps` call per sample as the fallback on systems without /proc (macOS)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+from benchmark_common import percentile, write_csv
+
+DEFAULT_PATTERN = 'ollama serve'
+SERIES_HEADER = ['Time', 'Offset (s)', 'CPU (%)', 'RSS (MB)', 'PSS (MB)', 'Processes']
+
+def expand_tree(parents, roots):
+    """Return roots plus all their descendants, given a {pid: ppid} map.
+
+    Ancestors of this process are never treated as roots, so a shell whose command line
+    happens to contain the pattern doesn't pull the sampler itself into the tree.
+    """
+    own_lineage = set()
+    pid = os.getpid()
+    while pid in parents and pid not in own_lineage:
+        own_lineage.add(pid)
+        pid = parents[pid]
+    tree = set(roots) - own_lineage - {os.getpid()}
+    added = True
+    while added:
+        children = {pid for pid, ppid in parents.items() if ppid in tree and pid not in tree}
+        tree |= children
+        added = bool(children)
+    return tree
+
+class RingBuffer:
+    """Fixed-capacity columnar buffer; the oldest samples are overwritten when full."""
+
+    def __init__(self, capacity, fields):
+        self.capacity = capacity
+        self.fields = fields
+        self._columns = {field: array('d', bytes(8 * capacity)) for field in fields}
+        self._next = 0
+        self.count = 0
+
+    def append(self, **values):
+        for field in self.fields:
+            self._columns[field][self._next] = values.get(field, float('nan'))
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def column(self, field):
+        """Return a column in insertion order."""
+        data = self._columns[field]
+        if self.count < self.capacity:
+            return data[:self.count].tolist()
+        return (data[self._next:] + data[:self._next]).tolist()
+
+class ProcReader:
+    """Reads CPU ticks and memory for a process tree from /proc, keeping file handles open."""
+
+    max_rate = None
+
+    def __init__(self, pattern=DEFAULT_PATTERN, pids=None):
+        self.pattern = pattern
+        self.roots = set(pids or [])
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_kb = os.sysconf('SC_PAGE_SIZE') / 1024
+        self._fds = {}
+
+    @staticmethod
+    def available():
+        return os.path.exists('/proc/self/stat')
+
+    def _read(self, pid, name):
+        key = (pid, name)
+        fd = self._fds.get(key)
+        if fd is None:
+            fd = os.open(f"/proc/{pid}/{name}", os.O_RDONLY)
+            self._fds[key] = fd
+        return os.pread(fd, 65536, 0).decode('latin-1')
+
+    def _forget(self, pid):
+        for key in [key for key in self._fds if key[0] == pid]:
+            os.close(self._fds.pop(key))
+
+    def find_tree(self):
+        """Find the root processes (by command pattern) and all their descendants."""
+        parents = {}
+        roots = set(self.roots)
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            try:
+                with open(f"/proc/{pid}/stat", 'r') as f:
+                    stat = f.read()
+                if not self.roots:
+                    with open(f"/proc/{pid}/cmdline", 'rb') as f:
+                        cmdline = f.read().replace(b'\0', b' ').decode('latin-1')
+                    if self.pattern in cmdline:
+                        roots.add(pid)
+            except OSError:
+                continue
+            parents[pid] = int(stat.rsplit(')', 1)[1].split()[1])
+
+        tree = expand_tree(parents, roots)
+        for pid in {key[0] for key in self._fds} - tree:
+            self._forget(pid)
+        return tree
+
+    def snapshot(self, pids, include_pss=False):
+        """Return ({pid: cpu_seconds}, rss_kb, pss_kb) summed over the given processes."""
+        cpu = {}
+        rss_kb = 0.0
+        pss_kb = None
+        for pid in pids:
+            try:
+                fields = self._read(pid, 'stat').rsplit(')', 1)[1].split()
+                # utime and stime are fields 14 and 15 of /proc/<pid>/stat, rss is field 24
+                cpu[pid] = (int(fields[11]) + int(fields[12])) / self.clock_ticks
+                rss_kb += int(fields[21]) * self.page_kb
+                if include_pss:
+                    for line in self._read(pid, 'smaps_rollup').splitlines():
+                        if line.startswith('Pss:'):
+                            pss_kb = (pss_kb or 0.0) + int(line.split()[1])
+                            break
+            except (OSError, IndexError, ValueError):
+                self._forget(pid)
+        return cpu, rss_kb, pss_kb if pss_kb is not None else float('nan')
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+class PsReader:
+    """Fallback reader using one `ps` invocation per sample (macOS has no /proc)."""
+
+    # Each sample forks ps and walks the process table, and ps reports CPU time in 10ms steps,
+    # so sampling faster perturbs the benchmark more and only adds quantization noise to CPU%
+    max_rate = 2.0
+
+    def __init__(self, pattern=DEFAULT_PATTERN, pids=None):
+        self.pattern = pattern
+        self.roots = set(pids or [])
+        self._processes = {}
+
+    @staticmethod
+    def _cpu_seconds(cputime):
+        # ps reports cumulative CPU time as [[dd-]hh:]mm:ss[.ss]
+        days, _, clock = cputime.rpartition('-')
+        seconds = 0.0
+        for part in clock.split(':'):
+            seconds = seconds * 60 + float(part)
+        return seconds + (int(days) * 86400 if days else 0)
+
+    def _ps(self):
+        output = subprocess.run(['ps', '-A', '-o', 'pid=,ppid=,rss=,time=,command='],
+                                capture_output=True, text=True).stdout
+        processes = {}
+        for line in output.splitlines():
+            parts = line.split(None, 4)
+            if len(parts) == 5:
+                pid, ppid, rss, cputime, command = parts
+                processes[int(pid)] = (int(ppid), float(rss), self._cpu_seconds(cputime), command)
+        return processes
+
+    def find_tree(self):
+        self._processes = self._ps()
+        roots = set(self.roots) or {pid for pid, proc in self._processes.items() if self.pattern in proc[3]}
+        return expand_tree({pid: proc[0] for pid, proc in self._processes.items()}, roots)
+
+    def snapshot(self, pids, include_pss=False):
+        processes = self._processes or self._ps()
+        self._processes = {}
+        cpu = {pid: processes[pid][2] for pid in pids if pid in processes}
+        rss_kb = sum(processes[pid][1] for pid in pids if pid in processes)
+        return cpu, rss_kb, float('nan')
+
+    def close(self):
+        pass
+
+class ResourceSampler:
+    """Samples CPU and memory of a process tree on a background thread.
+
+    Samples are timestamped with time.time() so they can be aligned with request
+    start/end times recorded by this process (mark()) or by the shell harness.
+    """
+
+    def __init__(self, pattern=DEFAULT_PATTERN, pids=None, rate=50.0, max_seconds=3600,
+                 pss_every=10, refresh_interval=1.0, cpu_window=0.1):
+        reader_class = ProcReader if ProcReader.available() else PsReader
+        self.reader = reader_class(pattern, pids)
+        if reader_class.max_rate and rate > reader_class.max_rate:
+            rate = reader_class.max_rate
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self.pss_every = pss_every
+        self.refresh_interval = refresh_interval
+        # CPU times advance in 10 ms ticks, so a 20 ms delta can only read 0%, 50% or 100% per core;
+        # each CPU sample is measured over at least this many seconds instead
+        self.cpu_window = cpu_window
+        self.samples = RingBuffer(int(rate * max_seconds), ['time', 'cpu', 'rss', 'pss', 'processes'])
+        self.marks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def mark(self, label, timestamp=None):
+        """Tag a point in time (e.g. request start/end) for later windowed summaries."""
+        self.marks.append((timestamp if timestamp is not None else time.time(), label))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.reader.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        pids = self.reader.find_tree()
+        refreshed = time.monotonic()
+        history = deque([(time.monotonic(), self.reader.snapshot(pids)[0])])
+        next_sample = history[0][0]
+        index = 0
+
+        while not self._stop.is_set():
+            next_sample += self.interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (e.g. a slow smaps_rollup read); skip missed slots rather than bursting
+                next_sample = time.monotonic()
+
+            now = time.monotonic()
+            if now - refreshed >= self.refresh_interval:
+                pids = self.reader.find_tree()
+                refreshed = now
+
+            index += 1
+            cpu, rss_kb, pss_kb = self.reader.snapshot(pids, include_pss=index % self.pss_every == 0)
+            # Measure from the newest snapshot that is still at least cpu_window old
+            while len(history) > 1 and now - history[1][0] >= self.cpu_window:
+                history.popleft()
+            previous_time, previous_cpu = history[0]
+            elapsed = now - previous_time
+            # Only count processes present in both samples so exits don't produce negative deltas
+            used = sum(cpu[pid] - previous_cpu[pid] for pid in cpu if pid in previous_cpu)
+            with self._lock:
+                self.samples.append(time=time.time(), cpu=100.0 * used / elapsed if elapsed > 0 else 0.0,
+                                    rss=rss_kb / 1024, pss=pss_kb / 1024, processes=len(cpu))
+            history.append((now, cpu))
+
+    def window(self, start=None, end=None):
+        """Return sample columns restricted to [start, end] (epoch seconds)."""
+        # Copy every column under the lock so they all describe the same samples
+        with self._lock:
+            columns = {field: self.samples.column(field) for field in self.samples.fields}
+        keep = [i for i, t in enumerate(columns['time'])
+                if (start is None or t >= start) and (end is None or t <= end)]
+        return {field: [values[i] for i in keep] for field, values in columns.items()}
+
+    def summary(self, start=None, end=None):
+        """Mean/peak/percentile CPU and memory over a time window."""
+        data = self.window(start, end)
+        cpu, rss = data['cpu'], data['rss']
+        pss = [value for value in data['pss'] if value == value]
+        if not cpu:
+            return {'samples': 0}
+        return {
+            'samples': len(cpu),
+            'duration': data['time'][-1] - data['time'][0],
+            'avg_cpu': sum(cpu) / len(cpu),
+            'max_cpu': max(cpu),
+            'p50_cpu': percentile(cpu, 50),
+            'p95_cpu': percentile(cpu, 95),
+            'baseline_rss_mb': rss[0],
+            'avg_rss_mb': sum(rss) / len(rss),
+            'peak_rss_mb': max(rss),
+            'p95_rss_mb': percentile(rss, 95),
+            'peak_pss_mb': max(pss) if pss else None,
+            'max_processes': max(data['processes']),
+        }
+
+    def write_series(self, path, start=None, end=None):
+        """Write the raw time series, with offsets relative to the window start."""
+        data = self.window(start, end)
+        origin = start if start is not None else (data['time'][0] if data['time'] else 0)
+        rows = zip(data['time'], [t - origin for t in data['time']], data['cpu'], data['rss'],
+                   data['pss'], [int(n) for n in data['processes']])
+        write_csv(path, SERIES_HEADER, ([f"{t:.3f}", *rest] for t, *rest in rows))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sample CPU/memory of the Ollama process tree while running a command.',
+        epilog='Example: resource_sampler.py --summary-out s.json -- curl -s http://127.0.0.1:11434/api/generate ...')
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help='Command line pattern of the root process')
+    parser.add_argument('--pid', type=int, action='append', help='Root PID to sample (repeatable, overrides --pattern)')
+    parser.add_argument('--rate', type=float, default=50, help='Samples per second (default: 50; capped at 2 where ps is used)')
+    parser.add_argument('--pss-every', type=int, default=10, help='Read PSS from smaps_rollup every N samples')
+    parser.add_argument('--baseline', type=float, default=0.5,
+                        help='Seconds to sample before the command for baseline_rss_mb and baseline_cpu')
+    parser.add_argument('--series-out', help='Write the raw time series CSV here')
+    parser.add_argument('--summary-out', help='Write the JSON summary here (default: stderr)')
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='Command to run while sampling')
+    args = parser.parse_args()
+
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    if not command:
+        parser.error('a command to run is required')
+
+    sampler = ResourceSampler(args.pattern, args.pid, rate=args.rate, pss_every=args.pss_every)
+    with sampler:
+        # Sample the idle tree first, so the baseline covers the same processes as the peak
+        time.sleep(max(args.baseline, sampler.interval, sampler.cpu_window))
+        baseline = sampler.summary(None, time.time())
+        sampler.mark('request_start')
+        start = time.time()
+        returncode = subprocess.run(command).returncode
+        end = time.time()
+        sampler.mark('request_end')
+        time.sleep(sampler.interval)
+
+    summary = sampler.summary(start, end)
+    summary.update({'request_start': start, 'request_end': end, 'returncode': returncode})
+    if baseline['samples']:
+        summary.update({'baseline_rss_mb': baseline['avg_rss_mb'], 'baseline_cpu': baseline['avg_cpu']})
+    if args.series_out:
+        sampler.write_series(args.series_out, start, end)
+    if args.summary_out:
+        with open(args.summary_out, 'w') as f:
+            json.dump(summary, f)
+    else:
+        print(json.dumps(summary), file=sys.stderr)
+    return returncode
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Cross-session benchmark results store
+Ingests every raw run row from benchmark session directories into an append-only SQLite
+database with indexes on model, session and time, and answers trend, per-prompt and
+latest-N queries without re-parsing CSVs
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from benchmark_common import REPORTS_BASE_DIR, SESSION_FORMAT, SESSION_PATTERN
+
+DEFAULT_DB_PATH = os.path.join(REPORTS_BASE_DIR, 'results.db')
+
+# Raw per-run CSVs written into a session directory, and the source name they are stored under
+RAW_SOURCES = {
+    'model_benchmark_results.csv': 'benchmark',
+    'load_test_results.csv': 'load_test',
+    'model_load_results.csv': 'model_load',
+    'trace_replay_results.csv': 'trace_replay',
+    'fleet_results.csv': 'fleet',
+    'embeddings_results.csv': 'embeddings',
+    'memory_profile_results.csv': 'memory_profile',
+    'residency_results.csv': 'residency',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    host TEXT,
+    cpu_model TEXT,
+    cpu_cores INTEGER,
+    total_memory_mb REAL,
+    gpu TEXT,
+    hardware_info TEXT,
+    source_path TEXT,
+    imported_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL REFERENCES sessions(session),
+    started_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    run_index INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    prompt TEXT,
+    attributes TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_model_time ON runs(model, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_session ON runs(session, model, prompt);
+CREATE INDEX IF NOT EXISTS idx_metrics_metric ON metrics(metric, run_id);
+"""
+
+def parse_hardware_info(path):
+    """Extract the fields written by get_hardware_info in benchmark-models.sh."""
+    info = {'hardware_info': None}
+    if not os.path.exists(path):
+        return info
+    with open(path, 'r') as f:
+        text = f.read()
+    info['hardware_info'] = text
+    patterns = {
+        'host': r'^Hostname:\s*(.+)$',
+        'cpu_model': r'^CPU Model:\s*(.+)$',
+        'cpu_cores': r'^CPU Cores:\s*(\d+)',
+        'total_memory_mb': r'^Total System Memory:\s*([\d.]+)',
+        'gpu': r'^GPU(?: Detected)?:\s*(.+)$',
+    }
+    for key, pattern in patterns.items():
+        match = re.search(pattern, text, re.MULTILINE)
+        if match:
+            info[key] = match.group(1).strip()
+    return info
+
+def session_time(name, path):
+    """Session start time from its timestamped directory name, falling back to the mtime."""
+    match = SESSION_PATTERN.search(name)
+    if match:
+        return datetime.strptime(match.group(0), SESSION_FORMAT).timestamp()
+    return os.path.getmtime(path)
+
+def to_number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+class DuplicateSessionError(Exception):
+    """A different directory with the same session name is already in the store."""
+
+class ResultsStore:
+    """Append-only SQLite store of raw benchmark runs."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def has_session(self, session):
+        return self.conn.execute("SELECT 1 FROM sessions WHERE session = ?", (session,)).fetchone() is not None
+
+    def _ingest(self, session_path, session):
+        """Insert one session's hardware info and raw rows (caller owns the transaction)."""
+        started_at = session_time(session, session_path)
+        hardware = parse_hardware_info(os.path.join(session_path, 'hardware_info.txt'))
+        self.conn.execute("""
+            INSERT INTO sessions (session, started_at, host, cpu_model, cpu_cores, total_memory_mb, gpu,
+                                  hardware_info, source_path, imported_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (session, started_at, hardware.get('host'), hardware.get('cpu_model'),
+              hardware.get('cpu_cores'), to_number(hardware.get('total_memory_mb')), hardware.get('gpu'),
+              hardware['hardware_info'], os.path.abspath(session_path), time.time()))
+
+        next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM runs").fetchone()[0]
+        runs, metrics = [], []
+        for filename, source in RAW_SOURCES.items():
+            path = os.path.join(session_path, filename)
+            if not os.path.exists(path):
+                continue
+            with open(path, newline='') as f:
+                for index, row in enumerate(csv.DictReader(f)):
+                    model = row.pop('Model', None)
+                    if not model:
+                        continue
+                    prompt = row.pop('Prompt', None)
+                    attributes = {}
+                    for column, value in row.items():
+                        number = to_number(value)
+                        if number is not None:
+                            metrics.append((next_id, column, number))
+                        elif value not in (None, '', 'N/A'):
+                            attributes[column] = value
+                    runs.append((next_id, session, started_at, source, index, model, prompt,
+                                 json.dumps(attributes) if attributes else None))
+                    next_id += 1
+
+        self.conn.executemany("""
+            INSERT INTO runs (id, session, started_at, source, run_index, model, prompt, attributes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, runs)
+        self.conn.executemany("INSERT INTO metrics (run_id, metric, value) VALUES (?, ?, ?)", metrics)
+        return len(runs)
+
+    def import_sessions(self, session_paths, replace=False, skip_duplicates=False):
+        """Import session directories in one transaction; already-imported sessions are skipped.
+
+        Sessions are keyed by directory name, so a different directory with a name already in the
+        store raises DuplicateSessionError (and nothing is imported) unless replace is set. With
+        skip_duplicates, as in bulk imports, such a directory is skipped with a warning instead.
+        Returns (sessions_imported, runs_imported).
+        """
+        imported_sessions = imported_runs = 0
+        with self.conn:
+            for session_path in session_paths:
+                session = os.path.basename(os.path.normpath(session_path))
+                row = self.conn.execute("SELECT source_path FROM sessions WHERE session = ?", (session,)).fetchone()
+                if row:
+                    if not replace:
+                        if row[0] != os.path.abspath(session_path):
+                            message = (f"session '{session}' was already imported from {row[0]}; "
+                                       f"rename {session_path} or pass --replace")
+                            if not skip_duplicates:
+                                raise DuplicateSessionError(message)
+                            print(f"Warning: skipping {message}", file=sys.stderr)
+                        continue
+                    self.delete_session(session)
+                imported_runs += self._ingest(session_path, session)
+                imported_sessions += 1
+        return imported_sessions, imported_runs
+
+    def import_all(self, base_dir=REPORTS_BASE_DIR, replace=False):
+        """Bulk-import every session directory under the reports directory, skipping name clashes."""
+        paths = sorted(os.path.join(base_dir, name) for name in os.listdir(base_dir)
+                       if os.path.isdir(os.path.join(base_dir, name))
+                       and any(os.path.exists(os.path.join(base_dir, name, f)) for f in RAW_SOURCES))
+        return self.import_sessions(paths, replace, skip_duplicates=True)
+
+    def delete_session(self, session):
+        self.conn.execute("DELETE FROM metrics WHERE run_id IN (SELECT id FROM runs WHERE session = ?)", (session,))
+        self.conn.execute("DELETE FROM runs WHERE session = ?", (session,))
+        self.conn.execute("DELETE FROM sessions WHERE session = ?", (session,))
+
+    def sessions(self, limit=None):
+        sql = """SELECT s.session, s.started_at, s.host, s.cpu_model, COUNT(r.id)
+                 FROM sessions s LEFT JOIN runs r ON r.session = s.session
+                 GROUP BY s.session ORDER BY s.started_at DESC"""
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.conn.execute(sql).fetchall()
+
+    def sessions_with_source(self, source):
+        """Names of sessions that have at least one run from the given source."""
+        return {row[0] for row in self.conn.execute("SELECT DISTINCT session FROM runs WHERE source = ?", (source,))}
+
+    def models(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT model FROM runs ORDER BY model")]
+
+    def metric_names(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT metric FROM metrics ORDER BY metric")]
+
+    def values(self, metric, model=None, prompt=None, sessions=None, source=None, since=None):
+        """Raw per-run values as (session, started_at, model, prompt, value) rows."""
+        clauses, params = ["1"], [metric]
+        if model:
+            clauses.append("r.model = ?")
+            params.append(model)
+        if prompt:
+            clauses.append("r.prompt = ?")
+            params.append(prompt)
+        if source:
+            clauses.append("r.source = ?")
+            params.append(source)
+        if since:
+            clauses.append("r.started_at >= ?")
+            params.append(since)
+        if sessions:
+            clauses.append(f"r.session IN ({','.join('?' * len(sessions))})")
+            params.extend(sessions)
+        return self.conn.execute(f"""
+            SELECT r.session, r.started_at, r.model, r.prompt, m.value
+            FROM runs r JOIN metrics m ON m.run_id = r.id AND m.metric = ?
+            WHERE {' AND '.join(clauses)}
+            ORDER BY r.started_at, r.run_index
+        """, params).fetchall()
+
+    def trend(self, metric, model, prompt=None, since=None):
+        """Per-session mean/min/max of a metric for one model, oldest first."""
+        sql = """
+            SELECT r.session, r.started_at, AVG(m.value), MIN(m.value), MAX(m.value), COUNT(*)
+            FROM runs r JOIN metrics m ON m.run_id = r.id AND m.metric = ?
+            WHERE r.model = ?"""
+        params = [metric, model]
+        if prompt:
+            sql += " AND r.prompt = ?"
+            params.append(prompt)
+        if since:
+            sql += " AND r.started_at >= ?"
+            params.append(since)
+        sql += " GROUP BY r.session ORDER BY r.started_at"
+        return self.conn.execute(sql, params).fetchall()
+
+    def prompt_breakdown(self, metric, model=None, session=None):
+        """Mean/min/max of a metric per model and prompt (latest session by default)."""
+        if session is None:
+            row = self.conn.execute("""
+                SELECT r.session FROM runs r JOIN metrics m ON m.run_id = r.id AND m.metric = ?
+                ORDER BY r.started_at DESC LIMIT 1""", (metric,)).fetchone()
+            session = row[0] if row else None
+        sql = """
+            SELECT r.model, r.prompt, AVG(m.value), MIN(m.value), MAX(m.value), COUNT(*)
+            FROM runs r JOIN metrics m ON m.run_id = r.id AND m.metric = ?
+            WHERE r.session = ?"""
+        params = [metric, session]
+        if model:
+            sql += " AND r.model = ?"
+            params.append(model)
+        sql += " GROUP BY r.model, r.prompt ORDER BY r.model, r.prompt"
+        return session, self.conn.execute(sql, params).fetchall()
+
+    def latest(self, metric, count=5, model=None):
+        """Mean of a metric per model for each of the latest `count` sessions that recorded it."""
+        sessions = [row[0] for row in self.conn.execute("""
+            SELECT DISTINCT r.session FROM runs r JOIN metrics m ON m.run_id = r.id AND m.metric = ?
+            WHERE (? IS NULL OR r.model = ?)
+            ORDER BY r.started_at DESC LIMIT ?""", (metric, model, model, count))]
+        if not sessions:
+            return [], []
+        rows = self.conn.execute(f"""
+            SELECT r.model, r.session, AVG(m.value)
+            FROM runs r JOIN metrics m ON m.run_id = r.id AND m.metric = ?
+            WHERE r.session IN ({','.join('?' * len(sessions))}) AND (? IS NULL OR r.model = ?)
+            GROUP BY r.model, r.session""", [metric, *sessions, model, model]).fetchall()
+        return sessions, rows
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime(SESSION_FORMAT)
+
+def print_table(header, rows, as_csv=False):
+    if as_csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(header)
+        writer.writerows(rows)
+        return
+    cells = [[f"{v:.2f}" if isinstance(v, float) else ('N/A' if v is None else str(v)) for v in row] for row in rows]
+    widths = [max(len(str(h)), *(len(row[i]) for row in cells)) for i, h in enumerate(header)]
+    print('  '.join(str(h).ljust(w) for h, w in zip(header, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in cells:
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Query and maintain the cross-session benchmark results store.')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database path')
+    parser.add_argument('--csv', action='store_true', help='Print query results as CSV')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Import session directories')
+    import_parser.add_argument('paths', nargs='*', help='Session directories (default: all under benchmark-reports)')
+    import_parser.add_argument('--replace', action='store_true', help='Re-import sessions that already exist')
+
+    sessions_parser = subparsers.add_parser('sessions', help='List imported sessions')
+    sessions_parser.add_argument('-n', type=int, help='Show only the latest N sessions')
+    subparsers.add_parser('models', help='List models')
+    subparsers.add_parser('metrics', help='List metric names')
+
+    trend_parser = subparsers.add_parser('trend', help='Per-session trend of a metric for a model')
+    trend_parser.add_argument('--model', required=True)
+    trend_parser.add_argument('--metric', default='Tokens per Second')
+    trend_parser.add_argument('--prompt')
+    trend_parser.add_argument('--days', type=float, help='Only sessions from the last N days')
+
+    prompts_parser = subparsers.add_parser('prompts', help='Per-prompt breakdown for a session')
+    prompts_parser.add_argument('--metric', default='Tokens per Second')
+    prompts_parser.add_argument('--model')
+    prompts_parser.add_argument('--session', help='Session (default: latest)')
+
+    latest_parser = subparsers.add_parser('latest', help='Compare models across the latest N sessions')
+    latest_parser.add_argument('--metric', default='Tokens per Second')
+    latest_parser.add_argument('--model')
+    latest_parser.add_argument('-n', type=int, default=5)
+
+    args = parser.parse_args()
+    started = time.perf_counter()
+
+    with ResultsStore(args.db) as store:
+        if args.command == 'import':
+            try:
+                if args.paths:
+                    # Only a single named directory is an error; a list is treated like a bulk import
+                    sessions, runs = store.import_sessions(args.paths, args.replace,
+                                                           skip_duplicates=len(args.paths) > 1)
+                elif os.path.isdir(REPORTS_BASE_DIR):
+                    sessions, runs = store.import_all(REPORTS_BASE_DIR, args.replace)
+                else:
+                    sessions, runs = 0, 0
+            except DuplicateSessionError as e:
+                print(f"Error: {e}")
+                return 1
+            print(f"Imported {sessions} sessions ({runs} runs) into {args.db}")
+        elif args.command == 'sessions':
+            rows = [(s, format_time(t), host, cpu, runs) for s, t, host, cpu, runs in store.sessions(args.n)]
+            print_table(['Session', 'Started', 'Host', 'CPU', 'Runs'], rows, args.csv)
+        elif args.command == 'models':
+            print('\n'.join(store.models()))
+        elif args.command == 'metrics':
+            print('\n'.join(store.metric_names()))
+        elif args.command == 'trend':
+            since = time.time() - args.days * 86400 if args.days else None
+            rows = store.trend(args.metric, args.model, args.prompt, since)
+            print_table(['Session', 'Mean', 'Min', 'Max', 'Runs'],
+                        [(s, avg, lo, hi, n) for s, _, avg, lo, hi, n in rows], args.csv)
+        elif args.command == 'prompts':
+            session, rows = store.prompt_breakdown(args.metric, args.model, args.session)
+            if not args.csv:
+                print(f"Session: {session}  Metric: {args.metric}")
+            print_table(['Model', 'Prompt', 'Mean', 'Min', 'Max', 'Runs'], rows, args.csv)
+        elif args.command == 'latest':
+            sessions, rows = store.latest(args.metric, args.n, args.model)
+            table = {}
+            for model, session, value in rows:
+                table.setdefault(model, {})[session] = value
+            print_table(['Model', *sessions],
+                        [(model, *(values.get(s) for s in sessions)) for model, values in sorted(table.items())],
+                        args.csv)
+
+    if args.command != 'import' and not args.csv:
+        print(f"\n({(time.perf_counter() - started) * 1000:.1f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Streaming generation probe for Ollama
+Consumes /api/generate NDJSON chunks as they arrive to measure time-to-first-token,
+inter-token latency, and prefill vs. decode throughput
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmark_common import DEFAULT_OLLAMA_API, percentile
+from ollama_client import OllamaClient
+
+def split_durations(final):
+    """Derive load time and prefill/decode throughput from the final chunk's counters."""
+    metrics = {'load_time': final.get('load_duration', 0) / 1e9}
+    if final.get('prompt_eval_duration'):
+        metrics['prefill_tps'] = final.get('prompt_eval_count', 0) / (final['prompt_eval_duration'] / 1e9)
+    if final.get('eval_duration'):
+        metrics['decode_tps'] = final.get('eval_count', 0) / (final['eval_duration'] / 1e9)
+    return metrics
+
+async def stream_generate(client, model, prompt, options=None, started=None):
+    """Run one streaming generation and return the final chunk merged with latency metrics.
+
+    TTFT is measured from `started` (default: now) to the first chunk carrying generated text.
+    Inter-token latencies are the gaps between consecutive text chunks (Ollama sends one
+    token per chunk; chunks that arrive in the same read show up as zero gaps).
+    """
+    started = started if started is not None else time.perf_counter()
+    token_times = []
+    final = {}
+    async for arrived, chunk in client.generate_stream(model, prompt, options=options):
+        if chunk.get('error'):
+            raise RuntimeError(chunk['error'])
+        if chunk.get('response'):
+            token_times.append(arrived)
+        if chunk.get('done'):
+            final = chunk
+    finished = time.perf_counter()
+
+    gaps_ms = [(b - a) * 1000 for a, b in zip(token_times, token_times[1:])]
+    result = {key: value for key, value in final.items() if key not in ('response', 'context')}
+    result.update(split_durations(final))
+    result.update({
+        'ttft': token_times[0] - started if token_times else None,
+        'itl_p50_ms': percentile(gaps_ms, 50) if gaps_ms else None,
+        'itl_p90_ms': percentile(gaps_ms, 90) if gaps_ms else None,
+        'itl_p99_ms': percentile(gaps_ms, 99) if gaps_ms else None,
+        'streamed_chunks': len(token_times),
+        'wall_time': finished - started,
+    })
+    return result
+
+async def probe(args):
+    options = {'num_predict': args.num_predict} if args.num_predict else None
+    async with OllamaClient(args.api, max_connections=1, timeout=args.timeout) as client:
+        return await stream_generate(client, args.model, args.prompt, options)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run one streaming generation and print its final response with latency metrics as JSON.')
+    parser.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+    parser.add_argument('--model', required=True, help='Model to test')
+    parser.add_argument('--prompt', required=True, help='Prompt text')
+    parser.add_argument('--num-predict', type=int, help='Cap generated tokens')
+    parser.add_argument('--timeout', type=float, default=600, help='Per-read timeout in seconds')
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(probe(args))
+    except Exception as e:
+        # Keep stdout parseable for benchmark-models.sh
+        print(json.dumps({'error': str(e) or type(e).__name__}))
+        return 1
+    print(json.dumps(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
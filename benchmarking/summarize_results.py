@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Benchmark summary engine
+Aggregates model_benchmark_results.csv by session x model x prompt with pandas/NumPy,
+reading in chunks so memory stays flat however many rows the raw files have, and writes
+the legacy summary.csv alongside a richer summary_detailed.csv
+"""
+
+import argparse
+import os
+import sys
+
+from benchmark_common import REPORTS_BASE_DIR, SESSION_PATTERN, write_csv
+
+RAW_FILE = 'model_benchmark_results.csv'
+SUMMARY_FILE = 'summary.csv'
+DETAILED_FILE = 'summary_detailed.csv'
+ALL_PROMPTS = 'All'
+CHUNK_ROWS = 100_000
+
+KEY_COLUMNS = ['Model', 'Prompt']
+TEXT_COLUMNS = ['Metal Acceleration']
+# Numeric columns of model_benchmark_results.csv; older sessions may lack the latency ones
+RAW_METRICS = [
+    'Baseline Memory (MB)', 'Peak Memory (MB)', 'Memory Used (MB)', 'Baseline CPU (%)', 'Peak CPU (%)',
+    'Avg CPU (%)', 'Total Tokens', 'Generated Tokens', 'Tokens per Second', 'Tokens per MB',
+    'Throughput Score', 'Total Time (s)', 'Avg GPU Power (W)', 'TTFT (s)', 'ITL p50 (ms)', 'ITL p90 (ms)',
+    'ITL p99 (ms)', 'Prefill Tokens/sec', 'Decode Tokens/sec', 'Load Time (s)',
+]
+REQUIRED_COLUMNS = KEY_COLUMNS + ['Memory Used (MB)', 'Tokens per Second', 'Throughput Score', 'Total Time (s)']
+
+# summary.csv column -> (raw column, decimals), in the order the awk summary wrote them
+LEGACY_SUMMARY = [
+    ('Avg Memory (MB)', 'Memory Used (MB)', 1),
+    ('Avg Peak CPU (%)', 'Peak CPU (%)', 2),
+    ('Avg CPU (%)', 'Avg CPU (%)', 2),
+    ('Avg Tokens/sec', 'Tokens per Second', 2),
+    ('Avg Tokens/MB', 'Tokens per MB', 2),
+    ('Avg Throughput Score', 'Throughput Score', 2),
+    ('Metal Acceleration', None, None),
+    ('Avg Time (s)', 'Total Time (s)', 2),
+    ('Avg GPU Power (W)', 'Avg GPU Power (W)', 2),
+    ('Avg TTFT (s)', 'TTFT (s)', 3),
+    ('Avg ITL p50 (ms)', 'ITL p50 (ms)', 3),
+    ('Avg ITL p90 (ms)', 'ITL p90 (ms)', 3),
+    ('Avg ITL p99 (ms)', 'ITL p99 (ms)', 3),
+    ('Avg Prefill Tokens/sec', 'Prefill Tokens/sec', 3),
+    ('Avg Decode Tokens/sec', 'Decode Tokens/sec', 3),
+    ('Avg Load Time (s)', 'Load Time (s)', 3),
+]
+
+DETAILED_HEADER = ['Session', 'Model', 'Prompt', 'Metric', 'Runs', 'Mean', 'Std', 'Min', 'p50', 'p95', 'p99', 'Max']
+
+# Percentiles come from a log-bucketed sketch (relative error <= SKETCH_ACCURACY) that merges across
+# chunks in constant memory per group, instead of keeping every value
+SKETCH_ACCURACY = 0.01
+SKETCH_OFFSET = 4000
+# Packs (group id, signed bucket) into one int64 sketch key
+SKETCH_SPAN = 1 << 15
+# Groups with at most this many values keep them all and get exact percentiles, since at
+# benchmark-sized counts the sketch's bucket error is larger than the run-to-run spread
+EXACT_LIMIT = 1000
+
+class SchemaError(ValueError):
+    """Raised when a raw results file is missing required columns."""
+
+def check_schema(columns, path):
+    """Validate a raw file header; returns the metric columns it provides."""
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise SchemaError(f"{path}: missing required columns: {', '.join(missing)}")
+    unknown = [column for column in columns if column not in KEY_COLUMNS + TEXT_COLUMNS + RAW_METRICS]
+    if unknown:
+        print(f"Note: ignoring unrecognized columns in {path}: {', '.join(unknown)}")
+    return [metric for metric in RAW_METRICS if metric in columns]
+
+class SummaryEngine:
+    """Mergeable per-group statistics: count, sum, sum of squares, min, max and a quantile sketch,
+    plus the raw values of groups small enough for exact percentiles.
+
+    Groups are (session, model, prompt) plus a model-level (session, model, All) group, mapped to
+    integer ids so each chunk is reduced with bincount rather than string-keyed groupbys.
+    """
+
+    def __init__(self, chunk_rows=CHUNK_ROWS, accuracy=SKETCH_ACCURACY):
+        import numpy as np
+        self.np = np
+        self.chunk_rows = chunk_rows
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.groups = {}
+        self.moments = {metric: np.zeros((5, 0)) for metric in RAW_METRICS}  # runs, sum, sumsq, min, max
+        self.sketch = {metric: {} for metric in RAW_METRICS}
+        self.exact = {metric: {} for metric in RAW_METRICS}  # group id -> value arrays, None past EXACT_LIMIT
+        self.labels = {}
+
+    def _bucket(self, values):
+        """Signed log bucket index; 0 holds values too small to matter."""
+        np = self.np
+        magnitude = np.abs(values)
+        index = np.ceil(np.log(np.maximum(magnitude, 1e-12)) / self.log_gamma) + SKETCH_OFFSET
+        return np.where(magnitude < 1e-9, 0, np.sign(values) * np.maximum(index, 1)).astype(np.int64)
+
+    def _bucket_value(self, buckets):
+        np = self.np
+        buckets = np.asarray(buckets, dtype=float)
+        magnitude = 2 * self.gamma ** (np.abs(buckets) - SKETCH_OFFSET) / (self.gamma + 1)
+        return np.where(buckets == 0, 0.0, np.sign(buckets) * magnitude)
+
+    def _group_ids(self, session, keys):
+        """Map chunk-local (model, prompt) codes to global group ids, growing the state arrays."""
+        np = self.np
+        ids = []
+        for model, prompt in keys:
+            key = (session, model, prompt)
+            if key not in self.groups:
+                self.groups[key] = len(self.groups)
+            ids.append(self.groups[key])
+        size = len(self.groups)
+        for metric, moments in self.moments.items():
+            if moments.shape[1] < size:
+                grown = np.zeros((5, size))
+                grown[3], grown[4] = np.inf, -np.inf
+                grown[:, :moments.shape[1]] = moments
+                self.moments[metric] = grown
+        return np.asarray(ids, dtype=np.int64)
+
+    def add_file(self, path, session):
+        """Aggregate one raw results file into the running state, chunk by chunk."""
+        import pandas as pd
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        metrics = check_schema(header, path)
+        usecols = KEY_COLUMNS + [c for c in TEXT_COLUMNS if c in header] + metrics
+        reader = pd.read_csv(path, usecols=usecols, chunksize=self.chunk_rows, na_values=['N/A'],
+                             keep_default_na=True, dtype={column: str for column in KEY_COLUMNS + TEXT_COLUMNS})
+        rows = 0
+        for chunk in reader:
+            rows += len(chunk)
+            self._add_chunk(chunk, session, metrics)
+        return rows
+
+    def _add_chunk(self, chunk, session, metrics):
+        import pandas as pd
+        np = self.np
+        chunk = chunk.dropna(subset=KEY_COLUMNS)
+        pairs, uniques = pd.MultiIndex.from_frame(chunk[KEY_COLUMNS]).factorize()
+        models = sorted({model for model, _ in uniques})
+        prompt_ids = self._group_ids(session, list(uniques))
+        model_ids = self._group_ids(session, [(model, ALL_PROMPTS) for model in models])
+        model_of_pair = np.asarray([models.index(model) for model, _ in uniques], dtype=np.int64)
+        # Every row counts towards its prompt group and its model-level group
+        gids = np.concatenate([prompt_ids[pairs], model_ids[model_of_pair[pairs]]])
+        size = len(self.groups)
+
+        if 'Metal Acceleration' in chunk.columns:
+            for (model, label), count in chunk.groupby(['Model', 'Metal Acceleration']).size().items():
+                counts = self.labels.setdefault((session, model), {})
+                counts[label] = counts.get(label, 0) + count
+
+        for metric in metrics:
+            column = pd.to_numeric(chunk[metric], errors='coerce').to_numpy(dtype=np.float64)
+            values = np.concatenate([column, column])
+            present = ~np.isnan(values)
+            values, ids = values[present], gids[present]
+            if not len(values):
+                continue
+            moments = self.moments[metric]
+            moments[0] += np.bincount(ids, minlength=size)
+            moments[1] += np.bincount(ids, weights=values, minlength=size)
+            moments[2] += np.bincount(ids, weights=values * values, minlength=size)
+            np.minimum.at(moments[3], ids, values)
+            np.maximum.at(moments[4], ids, values)
+            keys, counts = np.unique(ids * SKETCH_SPAN + self._bucket(values) + SKETCH_SPAN // 2,
+                                     return_counts=True)
+            sketch = self.sketch[metric]
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                sketch[key] = sketch.get(key, 0) + count
+            order = np.argsort(ids, kind='stable')
+            group_ids, starts = np.unique(ids[order], return_index=True)
+            exact = self.exact[metric]
+            for gid, part in zip(group_ids.tolist(), np.split(values[order], starts[1:])):
+                kept = exact.get(gid, [])
+                if kept is not None:
+                    exact[gid] = kept + [part] if moments[0][gid] <= EXACT_LIMIT else None
+
+    def _quantiles(self, metric, quantiles):
+        """{group id: [quantile values]}: exact (linear, like numpy) for groups of up to EXACT_LIMIT
+        values, otherwise from the bucket counts (nearest rank on the sketch)."""
+        np = self.np
+        result = {}
+        keys = sorted(self.sketch[metric])
+        groups = {}
+        for key in keys:
+            groups.setdefault(key // SKETCH_SPAN, []).append(key)
+        for gid, group_keys in groups.items():
+            exact = self.exact[metric].get(gid)
+            if exact is not None:
+                result[gid] = np.quantile(np.concatenate(exact), quantiles)
+                continue
+            counts = np.cumsum([self.sketch[metric][key] for key in group_keys])
+            buckets = np.asarray(group_keys) % SKETCH_SPAN - SKETCH_SPAN // 2
+            ranks = np.maximum(np.ceil(np.asarray(quantiles) * counts[-1]), 1)
+            result[gid] = self._bucket_value(buckets[np.searchsorted(counts, ranks)])
+        return result
+
+    def detailed(self):
+        """One row per session x model x prompt x metric, with exact moments and percentiles
+        (sketched for groups over EXACT_LIMIT values)."""
+        import pandas as pd
+        np = self.np
+        records = []
+        names = {gid: key for key, gid in self.groups.items()}
+        for metric in RAW_METRICS:
+            runs, total, squares, low, high = self.moments[metric]
+            quantiles = self._quantiles(metric, [0.5, 0.95, 0.99])
+            for gid in np.flatnonzero(runs):
+                n = runs[gid]
+                mean = total[gid] / n
+                std = np.sqrt(max(squares[gid] - n * mean * mean, 0.0) / (n - 1)) if n > 1 else np.nan
+                # Sketched percentiles are approximate; keep them inside the exact range
+                p50, p95, p99 = np.clip(quantiles[gid], low[gid], high[gid])
+                records.append((*names[gid], metric, int(n), mean, std, low[gid], p50, p95, p99, high[gid]))
+        if not records:
+            return None
+        table = pd.DataFrame.from_records(records, columns=DETAILED_HEADER)
+        metric_order = {metric: i for i, metric in enumerate(RAW_METRICS)}
+        table['_order'] = table['Metric'].map(metric_order)
+        table['_all'] = table['Prompt'] == ALL_PROMPTS
+        table = table.sort_values(['Session', 'Model', '_all', 'Prompt', '_order'], kind='stable')
+        return table[DETAILED_HEADER].reset_index(drop=True)
+
+    def metal_label(self, session, model):
+        """Most common Metal Acceleration value recorded for a model (the awk summary hard-coded 'Enabled')."""
+        counts = self.labels.get((session, model))
+        return max(counts, key=counts.get) if counts else 'N/A'
+
+    def legacy(self, detailed, session):
+        """Rows for the backward-compatible summary.csv of one session (model-level means)."""
+        rows = detailed[(detailed['Session'] == session) & (detailed['Prompt'] == ALL_PROMPTS)]
+        means = rows.pivot_table(index='Model', columns='Metric', values='Mean', sort=False)
+        for model in means.index:
+            row = [model]
+            for _, metric, decimals in LEGACY_SUMMARY:
+                if metric is None:
+                    row.append(self.metal_label(session, model))
+                    continue
+                value = means.at[model, metric] if metric in means.columns else None
+                row.append(None if value is None or value != value else f"{value:.{decimals}f}")
+            yield row
+
+def session_name(path):
+    """Session label for a raw file: its session directory name."""
+    return os.path.basename(os.path.dirname(os.path.abspath(path)))
+
+def resolve_inputs(paths, all_sessions):
+    """Turn session dirs, session timestamps or CSV paths into raw result files."""
+    if all_sessions:
+        paths = [os.path.join(REPORTS_BASE_DIR, name) for name in sorted(os.listdir(REPORTS_BASE_DIR))
+                 if SESSION_PATTERN.match(name)] if os.path.isdir(REPORTS_BASE_DIR) else []
+    files = []
+    for path in paths:
+        if not os.path.exists(path) and os.path.isdir(os.path.join(REPORTS_BASE_DIR, path)):
+            path = os.path.join(REPORTS_BASE_DIR, path)
+        if os.path.isdir(path):
+            path = os.path.join(path, RAW_FILE)
+        if os.path.exists(path):
+            files.append(path)
+        elif not all_sessions:
+            print(f"Warning: no raw results at {path}")
+    return files
+
+def print_views(summary_path):
+    """Print the legacy summary sorted by memory, speed and efficiency (replaces sort | column)."""
+    import pandas as pd
+    df = pd.read_csv(summary_path, na_values=['N/A'])
+    columns = ['Model', 'Avg Memory (MB)', 'Avg Tokens/sec', 'Avg CPU (%)', 'Avg Throughput Score',
+               'Metal Acceleration', 'Avg Time (s)']
+    views = [('By Memory Usage (Highest to Lowest)', 'Avg Memory (MB)'),
+             ('By Inference Speed (Fastest to Slowest)', 'Avg Tokens/sec'),
+             ('By Hardware Efficiency (Best to Worst)', 'Avg Throughput Score')]
+    for title, column in views:
+        print(f"\n{title}:")
+        print(df.sort_values(column, ascending=False)[columns].to_string(index=False, na_rep='N/A'))
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate raw benchmark results into summary CSVs.')
+    parser.add_argument('paths', nargs='*', help='Session directories, session timestamps or raw CSV files')
+    parser.add_argument('--all-sessions', action='store_true', help='Summarize every session under benchmark-reports')
+    parser.add_argument('--combined', help='Also write one detailed summary across all inputs to this path')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows read per chunk')
+    parser.add_argument('--print', dest='print_views', action='store_true',
+                        help='Print the summary sorted by memory, speed and efficiency')
+    args = parser.parse_args()
+
+    files = resolve_inputs(args.paths, args.all_sessions)
+    if not files:
+        print("Error: No raw benchmark results found.")
+        return 1
+
+    try:
+        engine = SummaryEngine(args.chunk_rows)
+    except ImportError as e:
+        print(f"Error: {e}. Install pandas and numpy to use the summary engine.")
+        return 1
+
+    sessions = {}
+    try:
+        for path in files:
+            session = session_name(path)
+            rows = engine.add_file(path, session)
+            sessions[session] = os.path.dirname(os.path.abspath(path))
+            print(f"Aggregated {rows} rows from {path}")
+    except SchemaError as e:
+        print(f"Error: {e}")
+        return 1
+
+    detailed = engine.detailed()
+    if detailed is None:
+        print("Error: Raw results contain no numeric data.")
+        return 1
+    for session, directory in sessions.items():
+        summary_path = os.path.join(directory, SUMMARY_FILE)
+        write_csv(summary_path, ['Model'] + [column for column, _, _ in LEGACY_SUMMARY], engine.legacy(detailed, session))
+        detailed[detailed['Session'] == session].to_csv(os.path.join(directory, DETAILED_FILE), index=False,
+                                                         float_format='%.4f', na_rep='N/A')
+        print(f"Summary saved to: {summary_path} (+ {DETAILED_FILE})")
+        if args.print_views:
+            print_views(summary_path)
+    if args.combined:
+        detailed.to_csv(args.combined, index=False, float_format='%.4f', na_rep='N/A')
+        print(f"Combined detailed summary saved to: {args.combined}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,31 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+#!/usr/bin/env python3
+"""
+Benchmark visualization
+Renders charts from session summary.csv files. Usable as a module or a CLI; pandas and
+matplotlib are only imported when a chart is actually rendered
+"""
+
 import argparse
+import hashlib
+import json
 import os
 import re
-from datetime import datetime
-import numpy as np
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Base directory for reports
+base_reports_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark-reports')
+
+# Bump when chart code changes so cached renders are redrawn
+RENDER_VERSION = 1
+CACHE_FILE = '.render_cache.json'
+
+def pyplot():
+    """Import matplotlib.pyplot on first use with a non-interactive backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
 def list_available_sessions(base_dir):
     """List all available benchmark sessions in the given directory."""
@@ -29,8 +50,9 @@ def get_latest_session(base_dir):
 
 def create_tokens_per_second_chart(df, output_dir, file_format='png'):
     """Create a simple tokens per second bar chart."""
-    plt.figure(figsize=(10, 6))
-    ax = df.plot(x='Model', y='Avg Tokens/sec', kind='bar', color='#1f77b4')
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax = df.plot(x='Model', y='Avg Tokens/sec', kind='bar', color='#1f77b4', ax=ax)
     plt.title('Average Tokens per Second', fontsize=14, fontweight='bold')
     plt.ylabel('Tokens/sec', fontsize=12)
     plt.xlabel('Model', fontsize=12)
@@ -47,8 +69,10 @@ def create_tokens_per_second_chart(df, output_dir, file_format='png'):
 
 def create_memory_chart(df, output_dir, file_format='png'):
     """Create a memory usage chart with efficiency annotations."""
-    plt.figure(figsize=(10, 6))
-    ax = df.plot(x='Model', y='Avg Memory (MB)', kind='bar', color='#ff7f0e')
+    import pandas as pd
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax = df.plot(x='Model', y='Avg Memory (MB)', kind='bar', color='#ff7f0e', ax=ax)
     plt.title('Memory Usage with Efficiency', fontsize=14, fontweight='bold')
     plt.ylabel('Memory Usage (MB)', fontsize=12)
     plt.xlabel('Model', fontsize=12)
@@ -73,8 +97,9 @@ def create_memory_chart(df, output_dir, file_format='png'):
 
 def create_performance_chart(df, output_dir, file_format='png'):
     """Create a performance comparison chart showing tokens/sec and CPU usage."""
-    plt.figure(figsize=(10, 6))
-    ax = df.plot(x='Model', y='Avg Tokens/sec', kind='bar', color='#2ca02c')
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax = df.plot(x='Model', y='Avg Tokens/sec', kind='bar', color='#2ca02c', ax=ax)
     
     # Add CPU usage as a line on secondary y-axis if column exists
     if 'Avg CPU (%)' in df.columns:
@@ -97,10 +122,11 @@ def create_performance_chart(df, output_dir, file_format='png'):
 
 def create_efficiency_chart(df, output_dir, file_format='png'):
     """Create an efficiency score chart."""
-    plt.figure(figsize=(10, 6))
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
     
     if 'Avg Throughput Score' in df.columns:
-        ax = df.plot(x='Model', y='Avg Throughput Score', kind='bar', color='#9467bd')
+        ax = df.plot(x='Model', y='Avg Throughput Score', kind='bar', color='#9467bd', ax=ax)
         plt.title('Efficiency Score (Higher is Better)', fontsize=14, fontweight='bold')
         plt.ylabel('Throughput Score (tokens/sec per CPU%)', fontsize=12)
         plt.xlabel('Model', fontsize=12)
@@ -120,6 +146,7 @@ def create_efficiency_chart(df, output_dir, file_format='png'):
 
 def create_overview_chart(df, output_dir, file_format='png'):
     """Create a 2x2 overview chart with key metrics."""
+    plt = pyplot()
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     
     # 1. Tokens per Second (Top Left)
@@ -156,159 +183,406 @@ def create_overview_chart(df, output_dir, file_format='png'):
     plt.savefig(f"{output_dir}/overview.{file_format}")
     plt.close()
 
-def create_gpu_charts(df, output_dir, include_gpu=False, gpu_chart=False, file_format='png'):
-    """Create GPU-related charts if the data is available."""
+
+def gpu_data(df):
+    """Rows with numeric GPU power, or None (with a hint) when there are none."""
+    import pandas as pd
     if 'Avg GPU Power (W)' not in df.columns:
         print("GPU power data column not found in summary file. Skipping GPU charts.")
         print("Note: To collect GPU metrics, run benchmark with --gpu-metrics flag.")
-        return
+        return None
     
-    # Filter out rows with N/A GPU power
-    df_gpu = df[df['Avg GPU Power (W)'] != 'N/A'].copy()
+    # Convert to numeric and drop rows with N/A GPU power
+    df_gpu = df.copy()
+    df_gpu['Avg GPU Power (W)'] = pd.to_numeric(df_gpu['Avg GPU Power (W)'], errors='coerce')
+    df_gpu = df_gpu.dropna(subset=['Avg GPU Power (W)'])
     if df_gpu.empty:
         print("No valid GPU power data found in summary file. All values are 'N/A'.")
         print("Note: To collect GPU metrics, run benchmark with --gpu-metrics flag.")
         print("Example: ./benchmarking/benchmark-models.sh --gpu-metrics")
+        return None
+    return df_gpu
+
+def create_gpu_performance_chart(df, output_dir, file_format='png'):
+    """Create a tokens/sec vs. GPU power chart."""
+    df_gpu = gpu_data(df)
+    if df_gpu is None:
         return
-    
-    # Convert to numeric
-    df_gpu['Avg GPU Power (W)'] = pd.to_numeric(df_gpu['Avg GPU Power (W)'], errors='coerce')
-    
-    if include_gpu:
-        plt.figure(figsize=(10, 6))
-        ax = df_gpu.plot(x='Model', y='Avg Tokens/sec', kind='bar', label='Tokens/sec')
-        df_gpu.plot(x='Model', y='Avg GPU Power (W)', kind='line', color='red', marker='o', 
-                   secondary_y=True, ax=ax, label='Avg GPU Power (W)')
-        ax.set_ylabel('Tokens/sec')
-        ax.right_ax.set_ylabel('GPU Power (W)')
-        plt.title('Performance vs. GPU Power', fontsize=14, fontweight='bold')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.savefig(f"{output_dir}/performance_vs_gpu_power.{file_format}")
-        plt.close()
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax = df_gpu.plot(x='Model', y='Avg Tokens/sec', kind='bar', label='Tokens/sec', ax=ax)
+    df_gpu.plot(x='Model', y='Avg GPU Power (W)', kind='line', color='red', marker='o', 
+               secondary_y=True, ax=ax, label='Avg GPU Power (W)')
+    ax.set_ylabel('Tokens/sec')
+    ax.right_ax.set_ylabel('GPU Power (W)')
+    plt.title('Performance vs. GPU Power', fontsize=14, fontweight='bold')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/performance_vs_gpu_power.{file_format}")
+    plt.close()
 
+def create_gpu_power_chart(df, output_dir, file_format='png'):
+    """Create a dedicated GPU power usage chart."""
+    df_gpu = gpu_data(df)
+    if df_gpu is None:
+        return
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    df_gpu.plot(x='Model', y='Avg GPU Power (W)', kind='bar', color='orange', 
+               title='Average GPU Power Usage', ax=ax)
+    plt.ylabel('GPU Power (W)')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/gpu_power_usage.{file_format}")
+    plt.close()
+
+def create_gpu_charts(df, output_dir, include_gpu=False, gpu_chart=False, file_format='png'):
+    """Create GPU-related charts if the data is available."""
+    if include_gpu:
+        create_gpu_performance_chart(df, output_dir, file_format)
     if gpu_chart:
-        plt.figure(figsize=(10, 6))
-        df_gpu.plot(x='Model', y='Avg GPU Power (W)', kind='bar', color='orange', 
-                   title='Average GPU Power Usage')
-        plt.ylabel('GPU Power (W)')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.savefig(f"{output_dir}/gpu_power_usage.{file_format}")
-        plt.close()
-
-# Set up command line argument parsing
-parser = argparse.ArgumentParser(description='Visualize benchmark summaries for specific sessions.')
-parser.add_argument('--summary-path', help='Path to summary CSV (overrides session-based path)')
-parser.add_argument('--output-dir', help='Directory to save output charts (overrides session-based path)')
-parser.add_argument('--session', help='Specific session timestamp to visualize (YYYY-mm-dd_HH:MM:SS format)')
-parser.add_argument('--latest', action='store_true', help='Use the latest session automatically')
-parser.add_argument('--list-sessions', action='store_true', help='List all available sessions and exit')
-
-# Visualization types
-parser.add_argument('--overview', action='store_true', help='Generate 2x2 overview chart')
-parser.add_argument('--performance', action='store_true', help='Generate performance comparison chart')
-parser.add_argument('--efficiency', action='store_true', help='Generate efficiency score chart')
-parser.add_argument('--memory', action='store_true', help='Generate memory usage chart with efficiency annotations')
-parser.add_argument('--all', action='store_true', help='Generate all visualization types')
-
-# GPU options
-parser.add_argument('--include-gpu', action='store_true', help='Include GPU metrics in charts')
-parser.add_argument('--gpu-chart', action='store_true', help='Generate dedicated GPU power usage chart')
-
-# Output format
-parser.add_argument('--format', choices=['png', 'pdf', 'svg'], default='png', help='Output file format')
-args = parser.parse_args()
+        create_gpu_power_chart(df, output_dir, file_format)
 
-# Base directory for reports
-base_reports_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark-reports')
+def create_fleet_throughput_chart(df, output_dir, file_format='png'):
+    """Tokens/sec per host and for the whole fleet, grouped by model (fleet_summary.csv)."""
+    plt = pyplot()
+    table = df.pivot_table(index='Model', columns='Host', values='Tokens/sec', aggfunc='mean')
+    hosts = [host for host in table.columns if host != 'FLEET'] + (['FLEET'] if 'FLEET' in table.columns else [])
+    fig, ax = plt.subplots(figsize=(max(10, 1.5 * len(table) * len(hosts) / 2), 6))
+    table[hosts].plot(kind='bar', ax=ax, edgecolor='black', linewidth=0.5)
+    plt.title(f"Fleet Throughput ({df['Mode'].iloc[0]} mode)", fontsize=14, fontweight='bold')
+    plt.ylabel('Tokens/sec', fontsize=12)
+    plt.xlabel('Model', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.legend(title='Host')
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/fleet_throughput.{file_format}")
+    plt.close()
 
-# Handle listing sessions if requested
-if args.list_sessions:
-    sessions = list_available_sessions(base_reports_dir)
-    if sessions:
-        print(f"Available benchmark sessions ({len(sessions)}):")
-        for session in sessions:
-            # Get the summary file path for this session
-            summary_path = os.path.join(base_reports_dir, session, 'summary.csv')
-            session_status = "✓" if os.path.exists(summary_path) else "✗"
-            print(f"  {session_status} {session}")
-    else:
-        print("No benchmark sessions found.")
-    exit(0)
-
-# Determine which session to use
-selected_session = None
-if args.session:
-    selected_session = args.session
-elif args.latest:
-    selected_session = get_latest_session(base_reports_dir)
-    if selected_session:
-        print(f"Using latest session: {selected_session}")
-    else:
-        print("No sessions found. Using sample data.")
+def create_fleet_latency_chart(df, output_dir, file_format='png'):
+    """p50/p95 request latency per host, one panel per model (fleet_summary.csv)."""
+    plt = pyplot()
+    models = list(dict.fromkeys(df['Model']))
+    fig, axes = plt.subplots(1, len(models), figsize=(6 * len(models), 5), squeeze=False)
+    for ax, model in zip(axes[0], models):
+        rows = df[df['Model'] == model].set_index('Host')
+        rows[['Latency p50 (s)', 'Latency p95 (s)']].plot(kind='bar', ax=ax, color=['#1f77b4', '#ff7f0e'])
+        ax.set_title(model, fontsize=12, fontweight='bold')
+        ax.set_ylabel('Latency (s)')
+        ax.tick_params(axis='x', rotation=45)
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.suptitle('Fleet Request Latency', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/fleet_latency.{file_format}")
+    plt.close()
 
-# Determine paths based on arguments or selected session
-summary_path = args.summary_path
-output_dir = args.output_dir
+def embeddings_panels(df, plt, value, ylabel, x, series, title, stem, output_dir, file_format):
+    """One panel per document length, a line per series, for embeddings_summary.csv."""
+    import pandas as pd
+    df = df.copy()
+    df[value] = pd.to_numeric(df[value], errors='coerce')
+    lengths = sorted(df['Doc Length (tokens)'].unique())
+    fig, axes = plt.subplots(1, len(lengths), figsize=(6 * len(lengths), 5), squeeze=False)
+    for ax, length in zip(axes[0], lengths):
+        rows = df[df['Doc Length (tokens)'] == length]
+        for label, group in rows.groupby(series):
+            label = ' '.join(str(part) for part in (label if isinstance(label, tuple) else (label,)))
+            group = group.sort_values(x)
+            ax.plot(group[x], group[value], marker='o', label=label)
+        ax.set_title(f"~{length} tokens per document", fontsize=12, fontweight='bold')
+        ax.set_xlabel(x)
+        ax.set_ylabel(ylabel)
+        ax.grid(linestyle='--', alpha=0.7)
+        ax.legend(fontsize=8)
+    plt.suptitle(title, fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/{stem}.{file_format}")
+    plt.close()
 
-if not summary_path:
-    if selected_session:
-        summary_path = os.path.join(base_reports_dir, selected_session, 'summary.csv')
-    else:
-        summary_path = os.path.join(base_reports_dir, 'sample_summary.csv')
+def create_embeddings_throughput_chart(df, output_dir, file_format='png'):
+    """Docs/sec vs batch size, per model and concurrency (embeddings_summary.csv)."""
+    df = df.assign(Clients=df['Concurrency'].map(lambda c: f"x{c}"))
+    embeddings_panels(df, pyplot(), 'Docs/sec', 'Documents/sec', 'Batch Size', ['Model', 'Endpoint', 'Clients'],
+                      'Embedding Throughput', 'embeddings_throughput', output_dir, file_format)
+
+def create_embeddings_latency_chart(df, output_dir, file_format='png'):
+    """p95 request latency vs concurrency, per model and batch size (embeddings_summary.csv)."""
+    df = df.assign(Batch=df['Batch Size'].map(lambda b: f"batch {b}"))
+    embeddings_panels(df, pyplot(), 'Latency p95 (s)', 'p95 latency (s)', 'Concurrency', ['Model', 'Endpoint', 'Batch'],
+                      'Embedding Request Latency (p95)', 'embeddings_latency', output_dir, file_format)
+
+def create_memory_context_chart(df, output_dir, file_format='png'):
+    """Peak RSS vs num_ctx per model, a line per prompt fill (memory_profile_results.csv)."""
+    import pandas as pd
+    plt = pyplot()
+    df = df.copy()
+    for column in ('Context (tokens)', 'Fill', 'Peak RSS (MB)'):
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df = df.dropna(subset=['Context (tokens)', 'Fill', 'Peak RSS (MB)'])
+    models = list(dict.fromkeys(df['Model']))
+    fig, axes = plt.subplots(1, len(models), figsize=(6 * len(models), 5), squeeze=False)
+    for ax, model in zip(axes[0], models):
+        for fill, group in df[df['Model'] == model].groupby('Fill'):
+            group = group.sort_values('Context (tokens)')
+            ax.plot(group['Context (tokens)'], group['Peak RSS (MB)'], marker='o', label=f"{fill:.0%} filled")
+        ax.set_xscale('log', base=2)
+        ax.set_title(model, fontsize=12, fontweight='bold')
+        ax.set_xlabel('Context (num_ctx tokens)')
+        ax.set_ylabel('Peak RSS (MB)')
+        ax.grid(linestyle='--', alpha=0.7)
+        ax.legend(fontsize=8)
+    plt.suptitle('Memory vs Context Length', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/memory_context.{file_format}")
+    plt.close()
+
+# Chart name -> (render function, output file stem)
+CHARTS = {
+    'overview': (create_overview_chart, 'overview'),
+    'performance': (create_performance_chart, 'performance_comparison'),
+    'efficiency': (create_efficiency_chart, 'efficiency_score'),
+    'memory': (create_memory_chart, 'memory_usage'),
+    'tokens_per_second': (create_tokens_per_second_chart, 'tokens_per_second'),
+    'gpu_performance': (create_gpu_performance_chart, 'performance_vs_gpu_power'),
+    'gpu_power': (create_gpu_power_chart, 'gpu_power_usage'),
+    # Fleet sessions (fleet_summary.csv from fleet_benchmark.py)
+    'fleet_throughput': (create_fleet_throughput_chart, 'fleet_throughput'),
+    'fleet_latency': (create_fleet_latency_chart, 'fleet_latency'),
+    # Embeddings sessions (embeddings_summary.csv from embeddings_benchmark.py)
+    'embeddings_throughput': (create_embeddings_throughput_chart, 'embeddings_throughput'),
+    'embeddings_latency': (create_embeddings_latency_chart, 'embeddings_latency'),
+    # Memory profiles (memory_profile_results.csv from memory_profile.py)
+    'memory_context': (create_memory_context_chart, 'memory_context'),
+}
+
+# Summary file -> the charts it feeds; None means the classic charts picked by the command-line flags
+SUMMARY_FILES = {
+    'summary.csv': None,
+    'fleet_summary.csv': ['fleet_throughput', 'fleet_latency'],
+    'embeddings_summary.csv': ['embeddings_throughput', 'embeddings_latency'],
+    'memory_profile_results.csv': ['memory_context'],
+}
+
+def session_summaries(session_path):
+    """Summary files present in a session directory, in SUMMARY_FILES order."""
+    return [os.path.join(session_path, name) for name in SUMMARY_FILES
+            if os.path.exists(os.path.join(session_path, name))]
+
+def render_key(summary_bytes, chart, file_format):
+    """Cache key for one chart: hash of the summary data, chart type, format and renderer version."""
+    digest = hashlib.sha256(summary_bytes)
+    digest.update(f"\0{chart}\0{file_format}\0{RENDER_VERSION}".encode())
+    return digest.hexdigest()
+
+def load_cache(output_dir):
+    try:
+        with open(os.path.join(output_dir, CACHE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(output_dir, cache):
+    path = os.path.join(output_dir, CACHE_FILE)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+def plan_renders(summary_path, output_dir, charts, file_format='png', force=False):
+    """Split the requested charts into (jobs to render, charts whose cached output is current)."""
+    with open(summary_path, 'rb') as f:
+        summary_bytes = f.read()
+    cache = {} if force else load_cache(output_dir)
+    jobs, cached = [], []
+    for chart in charts:
+        key = render_key(summary_bytes, chart, file_format)
+        output = os.path.join(output_dir, f"{CHARTS[chart][1]}.{file_format}")
+        if cache.get(os.path.basename(output)) == key and os.path.exists(output):
+            cached.append(chart)
+        else:
+            jobs.append((summary_path, output_dir, chart, file_format, key))
+    return jobs, cached
+
+def render_job(job):
+    """Render one chart (runs in a worker process). Returns the job and whether a file was written."""
+    import pandas as pd
+    summary_path, output_dir, chart, file_format, _ = job
+    render, stem = CHARTS[chart]
+    render(pd.read_csv(summary_path), output_dir, file_format)
+    return job, os.path.exists(os.path.join(output_dir, f"{stem}.{file_format}"))
+
+def render_all(jobs, max_workers=None):
+    """Render jobs in a process pool (in-process for a single job) and record them in each output cache.
+
+    Returns (rendered, failed) counts.
+    """
+    rendered = failed = 0
+    caches = {}
+
+    def finish(job, written):
+        nonlocal rendered
+        summary_path, output_dir, chart, file_format, key = job
+        if written:
+            print(f"Generated {chart} chart in {output_dir}")
+            cache = caches.setdefault(output_dir, load_cache(output_dir))
+            cache[f"{CHARTS[chart][1]}.{file_format}"] = key
+            rendered += 1
 
-if not output_dir:
-    if selected_session:
-        output_dir = os.path.join(base_reports_dir, selected_session)
+    if len(jobs) == 1 or max_workers == 1:
+        for job in jobs:
+            try:
+                finish(*render_job(job))
+            except Exception as e:
+                print(f"Error rendering {job[2]} chart from {job[0]}: {e}")
+                failed += 1
+    elif jobs:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(render_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    finish(*future.result())
+                except Exception as e:
+                    job = futures[future]
+                    print(f"Error rendering {job[2]} chart from {job[0]}: {e}")
+                    failed += 1
+
+    for output_dir, cache in caches.items():
+        save_cache(output_dir, cache)
+    return rendered, failed
+
+def visualize(targets, charts, file_format='png', max_workers=None, force=False):
+    """Render `charts` for each (summary_path, output_dir) target, skipping unchanged ones.
+
+    A target may also be (summary_path, output_dir, charts) to override the charts for that file.
+    Returns (rendered, cached, failed) counts.
+    """
+    jobs, cached = [], 0
+    for summary_path, output_dir, *own in targets:
+        os.makedirs(output_dir, exist_ok=True)
+        session_jobs, session_cached = plan_renders(summary_path, output_dir, own[0] if own else charts,
+                                                    file_format, force)
+        jobs.extend(session_jobs)
+        cached += len(session_cached)
+    rendered, failed = render_all(jobs, max_workers)
+    return rendered, cached, failed
+
+def selected_charts(args, summary_path=None):
+    """Charts for one summary file: the fixed set for fleet, embeddings and memory profile files,
+    otherwise the ones requested on the command line (tokens per second is always included)."""
+    charts = SUMMARY_FILES.get(os.path.basename(summary_path or ''))
+    if charts:
+        return list(charts)
+    charts = [name for name in ('overview', 'performance', 'efficiency', 'memory')
+              if args.all or getattr(args, name)]
+    charts.append('tokens_per_second')
+    if args.include_gpu:
+        charts.append('gpu_performance')
+    if args.gpu_chart:
+        charts.append('gpu_power')
+    return charts
+
+def main():
+    # Set up command line argument parsing
+    parser = argparse.ArgumentParser(description='Visualize benchmark summaries for specific sessions.')
+    parser.add_argument('--summary-path', help='Path to a summary.csv, fleet_summary.csv, embeddings_summary.csv or '
+                        'memory_profile_results.csv (overrides session-based path)')
+    parser.add_argument('--output-dir', help='Directory to save output charts (overrides session-based path)')
+    parser.add_argument('--session', help='Specific session timestamp to visualize (YYYY-mm-dd_HH:MM:SS format)')
+    parser.add_argument('--latest', action='store_true', help='Use the latest session automatically')
+    parser.add_argument('--all-sessions', action='store_true', help='Refresh charts for every session with a summary')
+    parser.add_argument('--list-sessions', action='store_true', help='List all available sessions and exit')
+
+    # Visualization types
+    parser.add_argument('--overview', action='store_true', help='Generate 2x2 overview chart')
+    parser.add_argument('--performance', action='store_true', help='Generate performance comparison chart')
+    parser.add_argument('--efficiency', action='store_true', help='Generate efficiency score chart')
+    parser.add_argument('--memory', action='store_true', help='Generate memory usage chart with efficiency annotations')
+    parser.add_argument('--all', action='store_true', help='Generate all visualization types')
+
+    # GPU options
+    parser.add_argument('--include-gpu', action='store_true', help='Include GPU metrics in charts')
+    parser.add_argument('--gpu-chart', action='store_true', help='Generate dedicated GPU power usage chart')
+
+    # Output format and rendering
+    parser.add_argument('--format', choices=['png', 'pdf', 'svg'], default='png', help='Output file format')
+    parser.add_argument('--jobs', type=int, help='Rendering processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-render charts even if the cached output is current')
+    args = parser.parse_args()
+
+    # Handle listing sessions if requested
+    if args.list_sessions:
+        sessions = list_available_sessions(base_reports_dir)
+        if sessions:
+            print(f"Available benchmark sessions ({len(sessions)}):")
+            for session in sessions:
+                summaries = session_summaries(os.path.join(base_reports_dir, session))
+                session_status = "✓" if summaries else "✗"
+                kinds = ', '.join(os.path.basename(path) for path in summaries)
+                print(f"  {session_status} {session}" + (f" ({kinds})" if kinds else ''))
+        else:
+            print("No benchmark sessions found.")
+        return 0
+
+    if args.all_sessions:
+        sessions = [os.path.join(base_reports_dir, session) for session in list_available_sessions(base_reports_dir)]
+        targets = [(summary, output) for output in sessions for summary in session_summaries(output)]
+        if not targets:
+            print(f"No benchmark sessions with a summary file ({', '.join(SUMMARY_FILES)}) found.")
+            return 1
+        print(f"Refreshing charts for {len({output for _, output in targets})} sessions...")
     else:
-        output_dir = base_reports_dir
-
-# Ensure the output directory exists
-os.makedirs(output_dir, exist_ok=True)
-
-print(f"Using summary file: {summary_path}")
-print(f"Saving charts to: {output_dir}")
-
-# Read the benchmark data
-try:
-    df = pd.read_csv(summary_path)
-except FileNotFoundError:
-    print(f"Error: Could not find summary file at {summary_path}")
-    exit(1)
-except Exception as e:
-    print(f"Error reading {summary_path}: {str(e)}")
-    exit(1)
-
-# If no specific charts are requested, default to tokens per second chart
-if not (args.overview or args.performance or args.efficiency or args.memory or args.all):
-    # Default to just the tokens per second chart
-    create_tokens_per_second_chart(df, output_dir, args.format)
-else:
-    # Generate requested visualizations
-    if args.overview or args.all:
-        print("Generating overview chart...")
-        create_overview_chart(df, output_dir, args.format)
-    
-    if args.performance or args.all:
-        print("Generating performance comparison chart...")
-        create_performance_chart(df, output_dir, args.format)
-    
-    if args.efficiency or args.all:
-        print("Generating efficiency score chart...")
-        create_efficiency_chart(df, output_dir, args.format)
-    
-    if args.memory or args.all:
-        print("Generating memory usage chart...")
-        create_memory_chart(df, output_dir, args.format)
-    
-    # Always generate the tokens per second chart
-    print("Generating tokens per second chart...")
-    create_tokens_per_second_chart(df, output_dir, args.format)
+        # Determine which session to use
+        selected_session = None
+        if args.session:
+            selected_session = args.session
+        elif args.latest:
+            selected_session = get_latest_session(base_reports_dir)
+            if selected_session:
+                print(f"Using latest session: {selected_session}")
+            else:
+                print("No sessions found. Using sample data.")
+
+        # Determine paths based on arguments or selected session
+        summary_paths = [args.summary_path] if args.summary_path else []
+        output_dir = args.output_dir
+
+        if not summary_paths:
+            if selected_session:
+                # Fleet, embeddings and memory profile sessions have their own summary files
+                summary_paths = (session_summaries(os.path.join(base_reports_dir, selected_session))
+                                 or [os.path.join(base_reports_dir, selected_session, 'summary.csv')])
+            else:
+                summary_path = os.path.join(base_reports_dir, 'sample_summary.csv')
+                if not os.path.exists(summary_path):
+                    summary_path = os.path.join(base_reports_dir, 'sample', 'sample_summary.csv')
+                summary_paths = [summary_path]
+
+        if not output_dir:
+            if selected_session:
+                output_dir = os.path.join(base_reports_dir, selected_session)
+            else:
+                output_dir = base_reports_dir
+
+        for summary_path in summary_paths:
+            if not os.path.exists(summary_path):
+                print(f"Error: Could not find summary file at {summary_path}")
+                return 1
+            print(f"Using summary file: {summary_path}")
+        print(f"Saving charts to: {output_dir}")
+        targets = [(summary_path, output_dir) for summary_path in summary_paths]
+
+    targets = [(summary, output, selected_charts(args, summary)) for summary, output in targets]
+    try:
+        rendered, cached, failed = visualize(targets, None, args.format, args.jobs, args.force)
+    except ImportError as e:
+        print(f"Error: {e}. Install pandas and matplotlib to render charts.")
+        return 1
 
-# Generate GPU charts if requested
-if args.include_gpu or args.gpu_chart:
-    print("Generating GPU charts...")
-    create_gpu_charts(df, output_dir, args.include_gpu, args.gpu_chart, args.format)
+    print(f"Rendered {rendered} charts, {cached} unchanged (cached), {failed} failed.")
+    if failed:
+        return 1
+    print("Visualization complete! Check the output directory for generated charts.")
+    return 0
 
-print("Visualization complete! Check the output directory for generated charts.")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Workload trace recording and replay
+Records generate/chat requests proxied toward Ollama as a JSONL trace, and replays traces
+against Ollama at 1x, scaled or as-fast-as-possible speed, streaming them from disk
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from array import array
+
+from benchmark_common import DEFAULT_OLLAMA_API, percentile, session_dir, write_csv, format_value
+from ollama_client import OllamaClient
+
+RESULTS_FILE = 'trace_replay_results.csv'
+SUMMARY_FILE = 'trace_replay_summary.csv'
+
+RESULTS_HEADER = [
+    'Model', 'Line', 'Endpoint', 'Scheduled Offset (s)', 'Start Lag (s)', 'Latency (s)', 'Status',
+    'Prompt Tokens', 'Generated Tokens', 'Eval Duration (s)', 'Load Duration (s)', 'TTFT (s)', 'Error',
+]
+
+SUMMARY_HEADER = [
+    'Model', 'Requests', 'Errors', 'Wall Time (s)', 'Requests/sec', 'Tokens/sec', 'Latency Mean (s)',
+    'Latency p50 (s)', 'Latency p95 (s)', 'Latency p99 (s)', 'TTFT p50 (s)', 'TTFT p95 (s)',
+    'Avg Start Lag (s)', 'Max Start Lag (s)',
+]
+
+# Request fields copied into a trace entry besides timestamp/model/prompt/messages/options
+PASSTHROUGH_FIELDS = ('system', 'template', 'format', 'keep_alive', 'raw', 'images', 'tools')
+
+TRACED_PATHS = {'/api/generate': 'generate', '/api/chat': 'chat'}
+
+def trace_entry(endpoint, request, timestamp):
+    """Build one trace line from a generate/chat request body.
+
+    Trace lines are JSON objects: timestamp (epoch seconds), model, endpoint ('generate' or
+    'chat'), prompt or messages, optional options, plus any passthrough request fields.
+    """
+    entry = {'timestamp': round(timestamp, 6), 'model': request.get('model'), 'endpoint': endpoint}
+    if endpoint == 'chat':
+        entry['messages'] = request.get('messages', [])
+    else:
+        entry['prompt'] = request.get('prompt', '')
+    if request.get('options'):
+        entry['options'] = request['options']
+    for field in PASSTHROUGH_FIELDS:
+        if field in request:
+            entry[field] = request[field]
+    return entry
+
+def read_trace(path):
+    """Yield (line_number, entry) from a JSONL trace without loading it into memory."""
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f"Skipping line {number}: invalid JSON")
+                continue
+            if not entry.get('model') or ('prompt' not in entry and 'messages' not in entry):
+                print(f"Skipping line {number}: needs a model and a prompt or messages")
+                continue
+            yield number, entry
+
+class ModelStats:
+    """Running per-model aggregates; only latencies are kept (as compact float arrays)."""
+
+    def __init__(self):
+        self.requests = self.errors = self.generated = 0
+        self.first_start = self.last_end = None
+        self.latencies = array('d')
+        self.ttfts = array('d')
+        self.lag_total = self.lag_max = 0.0
+
+    def add(self, record):
+        self.requests += 1
+        self.lag_total += record['lag']
+        self.lag_max = max(self.lag_max, record['lag'])
+        self.first_start = min(self.first_start, record['start']) if self.first_start is not None else record['start']
+        self.last_end = max(self.last_end, record['end']) if self.last_end is not None else record['end']
+        if record['status'] != 'ok':
+            self.errors += 1
+            return
+        self.generated += record.get('generated_tokens') or 0
+        self.latencies.append(record['latency'])
+        if record.get('ttft') is not None:
+            self.ttfts.append(record['ttft'])
+
+    def row(self, model):
+        wall = self.last_end - self.first_start if self.requests else 0
+        ok = len(self.latencies)
+        return [
+            model, self.requests, self.errors, wall,
+            ok / wall if wall > 0 else None, self.generated / wall if wall > 0 else None,
+            sum(self.latencies) / ok if ok else None,
+            percentile(self.latencies, 50) if ok else None,
+            percentile(self.latencies, 95) if ok else None,
+            percentile(self.latencies, 99) if ok else None,
+            percentile(self.ttfts, 50) if self.ttfts else None,
+            percentile(self.ttfts, 95) if self.ttfts else None,
+            self.lag_total / self.requests if self.requests else None, self.lag_max,
+        ]
+
+async def replay_request(client, entry, stream):
+    """Issue one trace entry and return its measurements."""
+    model = entry['model']
+    fields = {field: entry[field] for field in PASSTHROUGH_FIELDS if field in entry}
+    options = entry.get('options')
+    chat = entry.get('endpoint') == 'chat' or ('messages' in entry and 'prompt' not in entry)
+    record = {'endpoint': 'chat' if chat else 'generate', 'status': 'ok', 'error': ''}
+    started = time.perf_counter()
+    try:
+        if stream:
+            chunks = (client.chat_stream(model, entry['messages'], options, **fields) if chat
+                      else client.generate_stream(model, entry['prompt'], options, **fields))
+            response = {}
+            async for arrived, chunk in chunks:
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'])
+                text = chunk.get('message', {}).get('content') if chat else chunk.get('response')
+                if text and 'ttft' not in record:
+                    record['ttft'] = arrived - started
+                if chunk.get('done'):
+                    response = chunk
+        elif chat:
+            response = await client.chat(model, entry['messages'], options, **fields)
+        else:
+            response = await client.generate(model, entry['prompt'], options, **fields)
+        record['prompt_tokens'] = response.get('prompt_eval_count', 0)
+        record['generated_tokens'] = response.get('eval_count', 0)
+        record['eval_duration'] = response.get('eval_duration', 0) / 1e9
+        record['load_duration'] = response.get('load_duration', 0) / 1e9
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e) or type(e).__name__
+    record['start'] = started
+    record['end'] = time.perf_counter()
+    record['latency'] = record['end'] - started
+    return record
+
+async def replay(args):
+    """Replay a trace, writing per-request rows as they complete. Returns (output_dir, stats)."""
+    output_dir = session_dir(args.session, args.output_dir)
+    model_map = dict(item.split('=', 1) for item in (args.model_map or '').split(',') if '=' in item)
+    speed = None if args.speed in ('max', '0') else float(args.speed.rstrip('x'))
+    stats = {}
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+    pending = set()
+
+    results_path = f"{output_dir}/{RESULTS_FILE}"
+    with open(results_path, 'w', newline='') as results_file:
+        writer = csv.writer(results_file)
+        writer.writerow(RESULTS_HEADER)
+
+        async def run(number, entry, scheduled, offset):
+            try:
+                lag = max(0.0, time.perf_counter() - scheduled)
+                record = await replay_request(client, entry, args.stream)
+            finally:
+                in_flight.release()
+            record['lag'] = lag
+            stats.setdefault(entry['model'], ModelStats()).add(record)
+            row = [entry['model'], number, record['endpoint'], offset, lag, record['latency'], record['status'],
+                   record.get('prompt_tokens'), record.get('generated_tokens'), record.get('eval_duration'),
+                   record.get('load_duration'), record.get('ttft'), record['error']]
+            writer.writerow([format_value(value) for value in row])
+
+        async with OllamaClient(args.api, max_connections=args.max_in_flight, timeout=args.timeout) as client:
+            replay_start = time.perf_counter()
+            trace_start = None
+            for count, (number, entry) in enumerate(read_trace(args.trace)):
+                if args.limit and count >= args.limit:
+                    break
+                entry['model'] = model_map.get(entry['model'], entry['model'])
+                timestamp = float(entry.get('timestamp', 0))
+                trace_start = timestamp if trace_start is None else trace_start
+                offset = (timestamp - trace_start) / speed if speed else 0.0
+                scheduled = replay_start + offset
+                if speed:
+                    await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                else:
+                    scheduled = time.perf_counter()
+                # Bounded in-flight requests keep memory flat; waiting here shows up as start lag
+                await in_flight.acquire()
+                task = asyncio.create_task(run(number, entry, scheduled, offset))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                if count and count % 1000 == 0:
+                    print(f"  {count} requests issued...")
+            if pending:
+                await asyncio.gather(*pending)
+    return output_dir, stats
+
+async def read_request_body(reader, headers):
+    """Read a request body delimited by Content-Length or chunked transfer encoding."""
+    encoding = next((value.strip().lower() for name, value in headers
+                     if name.strip().lower() == 'transfer-encoding'), '')
+    if encoding == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                # Skip any trailers up to the blank line that ends the body
+                while (await reader.readline()).strip():
+                    pass
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    length = next((int(value) for name, value in headers if name.strip().lower() == 'content-length'), 0)
+    return await reader.readexactly(length) if length else b''
+
+class RecorderProxy:
+    """HTTP proxy that forwards everything to Ollama and traces generate/chat requests."""
+
+    def __init__(self, upstream, trace_path):
+        self.upstream = upstream.rstrip('/')
+        host_port = self.upstream.split('://', 1)[-1].split('/', 1)[0]
+        self.upstream_host, _, port = host_port.partition(':')
+        self.upstream_port = int(port or 80)
+        self.trace = open(trace_path, 'a', buffering=1)
+        self.recorded = 0
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            method, path, _ = lines[0].split(' ', 2)
+            headers = [line.split(':', 1) for line in lines[1:] if ':' in line]
+            body = await read_request_body(reader, headers)
+
+            endpoint = TRACED_PATHS.get(path.split('?', 1)[0])
+            if method == 'POST' and endpoint and body:
+                try:
+                    self.trace.write(json.dumps(trace_entry(endpoint, json.loads(body), time.time())) + '\n')
+                    self.recorded += 1
+                except ValueError:
+                    pass
+
+            # Forward the decoded body with a Content-Length, and Connection: close so the
+            # response is delimited by EOF
+            forwarded = [f"{method} {path} HTTP/1.1", f"Host: {self.upstream_host}:{self.upstream_port}",
+                         f"Content-Length: {len(body)}", "Connection: close"]
+            forwarded += [f"{name}:{value}" for name, value in headers if name.strip().lower()
+                          not in ('host', 'content-length', 'connection', 'transfer-encoding')]
+            up_reader, up_writer = await asyncio.open_connection(self.upstream_host, self.upstream_port)
+            up_writer.write(('\r\n'.join(forwarded) + '\r\n\r\n').encode('latin-1') + body)
+            await up_writer.drain()
+            while True:
+                chunk = await up_reader.read(65536)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+            up_writer.close()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            if not isinstance(e, asyncio.IncompleteReadError):
+                print(f"Proxy error: {e}")
+        finally:
+            writer.close()
+
+async def record(args):
+    proxy = RecorderProxy(args.upstream, args.output)
+    host, _, port = args.listen.rpartition(':')
+    server = await asyncio.start_server(proxy.handle, host or '127.0.0.1', int(port))
+    print(f"Recording requests on http://{args.listen} -> {args.upstream} into {args.output}")
+    print(f"Point clients at the proxy (e.g. OLLAMA_BASE_URL=http://{args.listen}); Ctrl+C to stop")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        proxy.trace.close()
+        print(f"\nRecorded {proxy.recorded} requests")
+
+def main():
+    parser = argparse.ArgumentParser(description='Record and replay Ollama workload traces (JSONL).')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    replay_parser = subparsers.add_parser('replay', help='Replay a trace against Ollama')
+    replay_parser.add_argument('trace', help='JSONL trace file')
+    replay_parser.add_argument('--api', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint')
+    replay_parser.add_argument('--speed', default='1',
+                               help="Time scaling: 1 = recorded pace, 5 = five times faster, max = as fast as possible")
+    replay_parser.add_argument('--max-in-flight', type=int, default=64, help='Maximum concurrent requests')
+    replay_parser.add_argument('--limit', type=int, help='Replay only the first N requests')
+    replay_parser.add_argument('--model-map', help='Comma-separated old=new model substitutions')
+    replay_parser.add_argument('--stream', action='store_true', help='Stream responses and record TTFT')
+    replay_parser.add_argument('--timeout', type=float, default=600, help='Per-read timeout in seconds')
+    replay_parser.add_argument('--session', help='Session timestamp to write into (default: new session)')
+    replay_parser.add_argument('--output-dir', help='Directory to write results (overrides --session)')
+
+    record_parser = subparsers.add_parser('record', help='Run a recording proxy in front of Ollama')
+    record_parser.add_argument('--listen', default='127.0.0.1:11435', help='Address for the proxy to listen on')
+    record_parser.add_argument('--upstream', default=DEFAULT_OLLAMA_API, help='Ollama API endpoint to forward to')
+    record_parser.add_argument('--output', required=True, help='Trace file to append to')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        try:
+            asyncio.run(record(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if not os.path.exists(args.trace):
+        print(f"Error: trace not found: {args.trace}")
+        return 1
+    print(f"Replaying {args.trace} at {args.speed}{'' if args.speed == 'max' else 'x'} speed...")
+    output_dir, stats = asyncio.run(replay(args))
+    rows = [model_stats.row(model) for model, model_stats in sorted(stats.items())]
+    write_csv(f"{output_dir}/{SUMMARY_FILE}", SUMMARY_HEADER, rows)
+
+    for row in rows:
+        model, requests, errors, wall, rps, tps = row[:6]
+        print(f"{model}: {requests} requests ({errors} errors) in {wall:.1f}s, "
+              f"{format_value(rps)} req/s, {format_value(tps)} tokens/s, p95 latency {format_value(row[8])}s")
+    print(f"\nReplay results saved to: {output_dir}/{RESULTS_FILE}")
+    print(f"Replay summary saved to: {output_dir}/{SUMMARY_FILE}")
+    return 1 if any(row[2] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
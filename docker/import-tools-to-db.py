@@ -4,11 +4,14 @@ Import Open WebUI tools directly into the SQLite database
 This script reads JSON tool exports and inserts them into webui.db
 """
 
+import ast
+import hashlib
 import json
 import sqlite3
 import uuid
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import sys
 
@@ -18,11 +21,65 @@ def connect_to_db(db_path="/app/backend/data/webui.db"):
         conn = sqlite3.connect(db_path, timeout=30.0)
         # Test the connection
         conn.execute("SELECT 1")
+        # WAL lets the import transaction run without blocking Open WebUI readers
+        conn.execute("PRAGMA journal_mode=WAL")
         return conn
     except sqlite3.Error as e:
         print(f"Database connection error: {e}")
         raise
 
+def wait_for_schema(db_path, tables=('tool', 'user'), timeout=300.0, initial_delay=0.05, max_delay=0.5):
+    """Wait for webui.db to exist and contain the given tables, backing off exponentially.
+
+    Open WebUI creates the database file before its migrations finish, so the file alone
+    is not enough. Returns (seconds until the file appeared, seconds until the schema was
+    ready, attempts) or raises TimeoutError once `timeout` seconds have passed.
+    """
+    started = time.perf_counter()
+    deadline = started + timeout
+    delay = initial_delay
+    file_ready = None
+    attempts = 0
+    missing = set(tables)
+    while True:
+        attempts += 1
+        if os.path.exists(db_path):
+            if file_ready is None:
+                file_ready = time.perf_counter() - started
+            try:
+                # Read-only so polling never creates or locks the database
+                conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=1.0)
+                try:
+                    found = {row[0] for row in conn.execute(
+                        f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({','.join('?' * len(tables))})",
+                        tables)}
+                finally:
+                    conn.close()
+                missing = set(tables) - found
+                if not missing:
+                    return file_ready, time.perf_counter() - started, attempts
+            except sqlite3.Error:
+                pass
+        
+        now = time.perf_counter()
+        if now >= deadline:
+            waiting_for = 'database file' if file_ready is None else f"tables {sorted(missing)}"
+            raise TimeoutError(f"timed out after {timeout:.0f}s waiting for {waiting_for}")
+        time.sleep(min(delay, deadline - now))
+        delay = min(delay * 2, max_delay)
+
+def report_timings(timings, path=None):
+    """Print per-phase startup timings and optionally save them as JSON"""
+    print("\n⏱️  Startup timings:")
+    for phase, seconds in timings.items():
+        print(f"   {phase:<16} {seconds:8.3f}s")
+    if path:
+        try:
+            with open(path, 'w') as f:
+                json.dump({'finished_at': datetime.now().isoformat(timespec='seconds'), 'phases': timings}, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not write timings to {path}: {e}")
+
 def create_tools_table_if_not_exists(conn):
     """Create tools table if it doesn't exist"""
     cursor = conn.cursor()
@@ -41,79 +98,363 @@ def create_tools_table_if_not_exists(conn):
     """)
     conn.commit()
 
-def import_tool_from_json(conn, json_file_path, default_user_id):
-    """Import a tool from JSON export into the database"""
-    
+def parse_tool_export(json_file_path):
+    """Parse a JSON tool export into (tool_info, user_id) entries plus log messages.
+
+    Array exports yield one entry per element. user_id is None when the export does not
+    name one. Runs in worker processes, so it only returns data and never prints.
+    """
     with open(json_file_path, 'r') as f:
         data = json.load(f)
     
-    print(f"📋 JSON structure: {list(data.keys()) if isinstance(data, dict) else 'Array with ' + str(len(data)) + ' items'}")
+    messages = [f"📋 JSON structure: {list(data.keys()) if isinstance(data, dict) else 'Array with ' + str(len(data)) + ' items'}"]
+    candidates = []
     
     # Handle different JSON export formats
-    tool_info = None
-    
-    if isinstance(data, list) and len(data) > 0:
-        # Format: [{"tool": {...}, "userId": "...", ...}]
-        if 'tool' in data[0]:
-            tool_info = data[0]['tool']
-            user_id = data[0].get('userId', default_user_id)
-        else:
-            print(f"❌ Unexpected array format, first item keys: {list(data[0].keys())}")
-            return None
+    if isinstance(data, list):
+        # Format: [{"tool": {...}, "userId": "...", ...}, ...]
+        for index, item in enumerate(data):
+            if isinstance(item, dict) and 'tool' in item:
+                candidates.append((item['tool'], item.get('userId')))
+            else:
+                keys = list(item.keys()) if isinstance(item, dict) else type(item).__name__
+                messages.append(f"❌ Unexpected array item {index}, keys: {keys}")
     elif isinstance(data, dict):
         if 'tool' in data:
             # Format: {"tool": {...}, "userId": "...", ...}
-            tool_info = data['tool']
-            user_id = data.get('userId', default_user_id)
+            candidates.append((data['tool'], data.get('userId')))
         elif 'id' in data and 'name' in data and 'content' in data:
             # Format: Direct tool object {"id": "...", "name": "...", "content": "...", ...}
-            tool_info = data
-            user_id = default_user_id
+            candidates.append((data, None))
         elif 'description' in data and 'manifest' in data:
             # This is a metadata file, skip it
-            print(f"⏭️  Skipping metadata file")
-            return None
+            messages.append(f"⏭️  Skipping metadata file")
         else:
-            print(f"❌ Unexpected dict format, keys: {list(data.keys())}")
-            return None
+            messages.append(f"❌ Unexpected dict format, keys: {list(data.keys())}")
     else:
-        print(f"❌ Unknown JSON format: {type(data)}")
-        return None
-    
-    if not tool_info:
-        print(f"❌ Could not extract tool info")
-        return None
+        messages.append(f"❌ Unknown JSON format: {type(data)}")
     
     # Validate required fields
+    entries = []
     required_fields = ['id', 'name', 'content']
-    missing_fields = [field for field in required_fields if field not in tool_info]
-    if missing_fields:
-        print(f"❌ Missing required fields: {missing_fields}")
-        print(f"   Available fields: {list(tool_info.keys())}")
-        return None
+    for tool_info, user_id in candidates:
+        if not isinstance(tool_info, dict):
+            messages.append(f"❌ Could not extract tool info")
+            continue
+        missing_fields = [field for field in required_fields if field not in tool_info]
+        if missing_fields:
+            messages.append(f"❌ Missing required fields: {missing_fields}")
+            messages.append(f"   Available fields: {list(tool_info.keys())}")
+            continue
+        entries.append((tool_info, user_id))
+    return entries, messages
+
+def parse_tool_exports(json_file_paths):
+    """Parse exports in parallel, returning (path, entries, messages, error) in input order"""
+    parsed = []
+    if len(json_file_paths) < 2:
+        for path in json_file_paths:
+            try:
+                parsed.append((path, *parse_tool_export(path), None))
+            except Exception as e:
+                parsed.append((path, [], [], e))
+        return parsed
+    
+    with ProcessPoolExecutor(max_workers=min(len(json_file_paths), os.cpu_count() or 1)) as pool:
+        futures = [(path, pool.submit(parse_tool_export, path)) for path in json_file_paths]
+        for path, future in futures:
+            try:
+                parsed.append((path, *future.result(), None))
+            except Exception as e:
+                parsed.append((path, [], [], e))
+    return parsed
+
+# Bump when the generated specs change so cached analyses are recomputed
+ANALYZER_VERSION = 2
+
+SIMPLE_TYPES = {
+    'str': 'string', 'int': 'integer', 'float': 'number', 'bool': 'boolean',
+    'list': 'array', 'List': 'array', 'tuple': 'array', 'Tuple': 'array', 'set': 'array', 'Set': 'array',
+    'dict': 'object', 'Dict': 'object',
+}
+DOCSTRING_SECTIONS = ('Args:', 'Arguments:', 'Parameters:', 'Returns:', 'Return:', 'Raises:', ':param', ':return', ':raises')
+
+def annotation_schema(node):
+    """Return (JSON schema, optional) for a parameter annotation AST node"""
+    if node is None:
+        return {'type': 'string'}, False
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        # String annotations ("int") are parsed and analyzed like real ones
+        try:
+            return annotation_schema(ast.parse(node.value, mode='eval').body)
+        except SyntaxError:
+            return {'type': 'string'}, False
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return union_schema([node.left, node.right])
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        name = node.id if isinstance(node, ast.Name) else node.attr
+        return {'type': SIMPLE_TYPES.get(name, 'string')}, False
+    if isinstance(node, ast.Subscript):
+        outer = node.value.id if isinstance(node.value, ast.Name) else getattr(node.value, 'attr', '')
+        args = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        if outer == 'Optional':
+            return annotation_schema(args[0])[0], True
+        if outer == 'Union':
+            return union_schema(args)
+        if outer == 'Literal':
+            values = [arg.value for arg in args if isinstance(arg, ast.Constant)]
+            kinds = {type(value).__name__ for value in values}
+            return {'type': SIMPLE_TYPES.get(kinds.pop(), 'string') if len(kinds) == 1 else 'string', 'enum': values}, False
+        if outer == 'Annotated':
+            return annotation_schema(args[0])
+        schema = {'type': SIMPLE_TYPES.get(outer, 'string')}
+        if schema['type'] == 'array':
+            schema['items'] = annotation_schema(args[0])[0]
+        return schema, False
+    return {'type': 'string'}, False
+
+def union_schema(members):
+    """Schema for Union[...] / X | Y: None makes it optional, a single remaining type is used as-is"""
+    optional = any(isinstance(m, ast.Constant) and m.value is None for m in members)
+    schemas = [annotation_schema(m)[0] for m in members if not (isinstance(m, ast.Constant) and m.value is None)]
+    if len(schemas) == 1:
+        return schemas[0], optional
+    return {'anyOf': schemas}, optional
+
+def parse_docstring(docstring):
+    """Split a docstring into its description and per-parameter descriptions (reST or Google style)"""
+    description, params = [], {}
+    section = None
+    current = None
+    for raw in (docstring or '').splitlines():
+        line = raw.strip()
+        if line.startswith(':param'):
+            # :param name: text  or  :param type name: text
+            head, _, text = line[len(':param'):].partition(':')
+            current = head.split()[-1] if head.split() else None
+            if current:
+                params[current] = text.strip()
+            section = 'params'
+        elif line.startswith(DOCSTRING_SECTIONS):
+            section = 'args' if line in ('Args:', 'Arguments:', 'Parameters:') else 'other'
+            current = None
+        elif section == 'args' and line:
+            head, sep, text = line.partition(':')
+            name = head.split('(')[0].strip()
+            if sep and name.isidentifier():
+                current = name
+                params[current] = text.strip()
+            elif current:
+                params[current] = f"{params[current]} {line}".strip()
+        elif section == 'params' and line and current:
+            params[current] = f"{params[current]} {line}".strip()
+        elif section is None and line:
+            description.append(line)
+    return ' '.join(description), params
+
+def json_literal(node):
+    """Return (True, value) when node is a literal that can be stored as JSON, else (False, None)"""
+    try:
+        value = ast.literal_eval(node)
+        # Field(...) marks a required field; sets, bytes and complex numbers have no JSON form
+        json.dumps(value)
+    except (ValueError, TypeError):
+        return False, None
+    return True, value
+
+def method_spec(function):
+    """Open WebUI function-calling spec for one Tools method"""
+    description, param_docs = parse_docstring(ast.get_docstring(function))
+    arguments = function.args.posonlyargs + function.args.args + function.args.kwonlyargs
+    # Defaults align with the end of the positional arguments; keyword-only ones have their own list
+    positional = function.args.posonlyargs + function.args.args
+    defaults = dict(zip([a.arg for a in positional][len(positional) - len(function.args.defaults):], function.args.defaults))
+    defaults.update({a.arg: d for a, d in zip(function.args.kwonlyargs, function.args.kw_defaults) if d is not None})
+    properties, required = {}, []
+    for argument in arguments:
+        # self and the __user__/__event_emitter__ style arguments Open WebUI injects are not model-facing
+        if argument.arg == 'self' or argument.arg.startswith('__'):
+            continue
+        schema, optional = annotation_schema(argument.annotation)
+        if argument.arg in param_docs:
+            schema['description'] = param_docs[argument.arg]
+        if argument.arg in defaults:
+            found, value = json_literal(defaults[argument.arg])
+            if found:
+                schema['default'] = value
+        elif not optional:
+            required.append(argument.arg)
+        properties[argument.arg] = schema
+    return {
+        'name': function.name,
+        'description': description or function.name,
+        'parameters': {'type': 'object', 'properties': properties, 'required': required},
+    }
+
+def valve_defaults(valves_class):
+    """Literal default values of a pydantic Valves model's fields"""
+    defaults = {}
+    for statement in valves_class.body:
+        if not isinstance(statement, ast.AnnAssign) or not isinstance(statement.target, ast.Name):
+            continue
+        value = statement.value
+        if isinstance(value, ast.Call) and getattr(value.func, 'id', getattr(value.func, 'attr', None)) == 'Field':
+            keywords = {keyword.arg: keyword.value for keyword in value.keywords}
+            value = keywords.get('default', value.args[0] if value.args else None)
+        if value is None:
+            continue
+        # Computed defaults (os.getenv(...), default_factory) and required fields are left for Open WebUI
+        found, value = json_literal(value)
+        if found:
+            defaults[statement.target.id] = value
+    return defaults
+
+def analyze_tool_content(content):
+    """Statically derive (specs, valves) from a tool's source without importing it.
+
+    Runs in worker processes, so it only returns data and never prints.
+    """
+    try:
+        tree = ast.parse(content)
+    except SyntaxError as e:
+        return [], {}, f"syntax error on line {e.lineno}"
+    except (ValueError, RecursionError) as e:
+        return [], {}, f"unparsable source ({e})"
+    tools = next((node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == 'Tools'), None)
+    if tools is None:
+        return [], {}, "no Tools class"
+    specs, valves = [], {}
+    try:
+        for node in tools.body:
+            # Open WebUI exposes every callable attribute of Tools except dunder methods
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith('__'):
+                specs.append(method_spec(node))
+            elif isinstance(node, ast.ClassDef) and node.name == 'Valves':
+                valves = valve_defaults(node)
+        # The results are cached and stored as JSON, so one odd tool must not fail the whole import
+        json.dumps([specs, valves])
+    except (TypeError, ValueError, RecursionError) as e:
+        return [], {}, f"unsupported source ({e})"
+    return specs, valves, None
+
+def content_key(content):
+    return hashlib.sha256(f"{ANALYZER_VERSION}\0{content}".encode('utf-8')).hexdigest()
+
+def analyze_tools(contents, cache_path=None):
+    """Analyze tool sources in parallel, reusing results cached by content hash.
+
+    Returns ({content key: (specs, valves)}, analyzed, cached, messages).
+    """
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+    
+    keyed = {content_key(content): content for content in contents}
+    pending = [key for key in keyed if key not in cache]
+    messages = []
+    if len(pending) < 2:
+        results = [analyze_tool_content(keyed[key]) for key in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1)) as pool:
+            results = list(pool.map(analyze_tool_content, [keyed[key] for key in pending], chunksize=8))
+    for key, (specs, valves, error) in zip(pending, results):
+        if error:
+            messages.append(f"⚠️  Could not analyze tool source ({error}); Open WebUI will introspect it on first use")
+        cache[key] = {'specs': specs, 'valves': valves}
+    
+    if cache_path and pending:
+        try:
+            # Keep only entries for the current tools so the cache doesn't grow forever
+            current = {key: cache[key] for key in keyed}
+            with open(f"{cache_path}.tmp", 'w') as f:
+                json.dump(current, f)
+            os.replace(f"{cache_path}.tmp", cache_path)
+        except OSError as e:
+            messages.append(f"⚠️  Could not write spec cache {cache_path}: {e}")
+    return ({key: (cache[key]['specs'], cache[key]['valves']) for key in keyed},
+            len(pending), len(keyed) - len(pending), messages)
+
+def tool_row_hash(user_id, name, content, meta):
+    """Content hash of the imported fields of a tool row"""
+    digest = hashlib.sha256()
+    for value in (user_id, name, content, meta):
+        digest.update((value or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def same_specs(stored, specs):
+    """Whether stored specs JSON already holds the given specs (formatting aside)"""
+    try:
+        return json.loads(stored or '[]') == json.loads(specs)
+    except ValueError:
+        return False
+
+def import_tools(conn, entries, default_user_id, analyses=None):
+    """Upsert tools in a single transaction, skipping rows whose content hash is unchanged.
+
+    analyses maps content_key(content) to precomputed (specs, valves). Unchanged rows whose stored
+    specs differ from the analysis (imported before specs were generated, or by an older analyzer)
+    are updated; an empty analysis never replaces existing specs. Returns (inserted, updated,
+    skipped) counts. created_at and any valves configured in the UI are kept for existing tools.
+    """
+    analyses = analyses or {}
+    # Later exports win when the same tool ID appears more than once
+    rows = {}
+    for tool_info, user_id in entries:
+        specs, valves = analyses.get(content_key(tool_info['content']), ([], {}))
+        rows[tool_info['id']] = (
+            user_id or default_user_id,
+            tool_info['name'],
+            tool_info['content'],
+            json.dumps(tool_info.get('meta', {})),
+            json.dumps(specs),
+            json.dumps(valves),
+        )
+    
+    existing = {}
+    ids = list(rows)
+    for offset in range(0, len(ids), 500):
+        batch = ids[offset:offset + 500]
+        cursor = conn.execute(
+            f"SELECT id, user_id, name, content, meta, specs FROM tool WHERE id IN ({','.join('?' * len(batch))})", batch)
+        for tool_id, user_id, name, content, meta, specs in cursor:
+            existing[tool_id] = (tool_row_hash(user_id, name, content, meta), specs)
     
     # Generate timestamps
     timestamp = int(datetime.now().timestamp())
     
-    # Prepare data for insertion
-    tool_id = tool_info['id']
-    name = tool_info['name']
-    content = tool_info['content']
-    meta = json.dumps(tool_info.get('meta', {}))
-    specs = json.dumps([])  # Empty list, not dict
-    valves = json.dumps({})  # Empty dict for valves
-    
-    # Insert into database
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT OR REPLACE INTO tool 
-        (id, user_id, name, content, specs, meta, valves, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (tool_id, user_id, name, content, specs, meta, valves, timestamp, timestamp))
+    upserts = []
+    inserted = updated = skipped = 0
+    for tool_id, (user_id, name, content, meta, specs, valves) in rows.items():
+        if tool_id not in existing:
+            inserted += 1
+        elif existing[tool_id][0] == tool_row_hash(user_id, name, content, meta) and \
+                (specs == '[]' or same_specs(existing[tool_id][1], specs)):
+            skipped += 1
+            continue
+        else:
+            updated += 1
+        upserts.append((tool_id, user_id, name, content, specs, meta, valves, timestamp, timestamp))
     
-    conn.commit()
-    print(f"✅ Imported tool: {name} (ID: {tool_id})")
-    return tool_id
+    with conn:
+        conn.executemany("""
+            INSERT INTO tool (id, user_id, name, content, specs, meta, valves, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                user_id = excluded.user_id,
+                name = excluded.name,
+                content = excluded.content,
+                specs = excluded.specs,
+                meta = excluded.meta,
+                valves = CASE WHEN tool.valves IS NULL OR tool.valves IN ('', '{}', 'null')
+                              THEN excluded.valves ELSE tool.valves END,
+                updated_at = excluded.updated_at
+        """, upserts)
+    return inserted, updated, skipped
 
 def get_default_user_id(conn):
     """Get the first admin user ID from the database"""
@@ -149,23 +490,25 @@ def main():
         print(f"❌ Tools directory not found: {tools_dir}")
         sys.exit(1)
     
-    # Wait for database to be ready
-    max_retries = 60
-    for i in range(max_retries):
-        try:
-            if os.path.exists(db_path):
-                conn = connect_to_db(db_path)
-                print(f"✅ Connected to database on attempt {i+1}")
-                break
-            else:
-                print(f"⏳ Database file doesn't exist yet... ({i+1}/{max_retries})")
-        except sqlite3.Error as e:
-            print(f"⏳ Waiting for database to be ready... ({i+1}/{max_retries}): {e}")
-            if i < max_retries - 1:
-                time.sleep(3)
-            else:
-                print(f"❌ Failed to connect to database after {max_retries} attempts")
-                sys.exit(1)
+    # Wait for Open WebUI to create its schema (bounded by TOOL_IMPORT_TIMEOUT seconds)
+    timeout = float(os.environ.get('TOOL_IMPORT_TIMEOUT', '300'))
+    timings_path = os.environ.get('TOOL_IMPORT_TIMINGS', os.path.join(os.path.dirname(db_path), 'tool-import-timings.json'))
+    specs_cache = os.environ.get('TOOL_SPECS_CACHE', os.path.join(os.path.dirname(db_path), 'tool-specs-cache.json'))
+    started = time.perf_counter()
+    timings = {}
+    print(f"⏳ Waiting for the Open WebUI schema (timeout {timeout:.0f}s)...")
+    try:
+        file_ready, schema_ready, attempts = wait_for_schema(db_path, timeout=timeout)
+    except TimeoutError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    timings['wait_db_file'] = file_ready
+    timings['wait_schema'] = schema_ready - file_ready
+    
+    phase_start = time.perf_counter()
+    conn = connect_to_db(db_path)
+    timings['connect'] = time.perf_counter() - phase_start
+    print(f"✅ Connected to database after {schema_ready:.2f}s ({attempts} checks)")
     
     try:
         # Create tools table if needed
@@ -182,20 +525,36 @@ def main():
         print(f"Found files in {tools_dir}: {all_files}")
         print(f"JSON files to process: {json_files}")
         
-        # Import all JSON files in the tools directory
-        imported_count = 0
-        for filename in json_files:
-            json_file_path = os.path.join(tools_dir, filename)
-            try:
-                print(f"📥 Processing {filename}...")
-                import_tool_from_json(conn, json_file_path, default_user_id)
-                imported_count += 1
-            except Exception as e:
-                print(f"❌ Failed to import {filename}: {e}")
-                import traceback
-                traceback.print_exc()
+        # Parse all JSON exports (in parallel), then import them in one transaction
+        phase_start = time.perf_counter()
+        entries = []
+        for path, file_entries, messages, error in parse_tool_exports(
+                [os.path.join(tools_dir, filename) for filename in json_files]):
+            print(f"📥 Processing {os.path.basename(path)}...")
+            for message in messages:
+                print(message)
+            if error:
+                print(f"❌ Failed to parse {os.path.basename(path)}: {error}")
+                continue
+            for tool_info, _ in file_entries:
+                print(f"   Found tool: {tool_info['name']} (ID: {tool_info['id']})")
+            entries.extend(file_entries)
+        timings['parse'] = time.perf_counter() - phase_start
+        
+        # Precompute function specs and default valves so Open WebUI doesn't introspect each tool lazily
+        phase_start = time.perf_counter()
+        analyses, analyzed, cached, messages = analyze_tools([tool_info['content'] for tool_info, _ in entries], specs_cache)
+        for message in messages:
+            print(message)
+        timings['analyze'] = time.perf_counter() - phase_start
+        print(f"🔍 Tool specs: {analyzed} analyzed, {cached} from cache")
         
-        print(f"\n🎉 Successfully imported {imported_count} tools!")
+        phase_start = time.perf_counter()
+        inserted, updated, skipped = import_tools(conn, entries, default_user_id, analyses)
+        timings['import'] = time.perf_counter() - phase_start
+        timings['total'] = time.perf_counter() - started
+        print(f"\n🎉 Imported tools: {inserted} inserted, {updated} updated, {skipped} unchanged (skipped)")
+        report_timings(timings, timings_path)
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Caching and request-coalescing gateway for Ollama
+Sits between Open WebUI and Ollama: deterministic requests are answered from a bounded
+memory + disk cache, identical in-flight requests share one upstream call, and everything
+else is proxied unchanged
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+UPSTREAM = os.environ.get('OLLAMA_UPSTREAM', 'http://host.docker.internal:11434')
+LISTEN_HOST = os.environ.get('GATEWAY_HOST', '0.0.0.0')
+LISTEN_PORT = int(os.environ.get('GATEWAY_PORT', '11435'))
+CACHE_DIR = os.environ.get('GATEWAY_CACHE_DIR', '/cache')
+MEMORY_CACHE_MB = float(os.environ.get('GATEWAY_MEMORY_CACHE_MB', '256'))
+DISK_CACHE_MB = float(os.environ.get('GATEWAY_DISK_CACHE_MB', '2048'))
+CACHE_TTL = float(os.environ.get('GATEWAY_CACHE_TTL', '86400'))
+
+GENERATION_PATHS = {'/api/generate', '/api/chat'}
+EMBEDDING_PATHS = {'/api/embed', '/api/embeddings'}
+
+# Request fields that do not change the response
+IGNORED_FIELDS = ('stream', 'keep_alive')
+
+class Stats:
+    """Gateway counters exposed on /gateway/metrics and /gateway/stats"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.passthrough = 0
+        self.cacheable = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.upstream_errors = 0
+        self.saved_prompt_tokens = 0
+        self.saved_eval_tokens = 0
+        self.saved_seconds = 0.0
+
+    def record_saving(self, chunks):
+        final = chunks[-1] if chunks else {}
+        self.saved_prompt_tokens += final.get('prompt_eval_count', 0) or 0
+        self.saved_eval_tokens += final.get('eval_count', 0) or 0
+        self.saved_seconds += (final.get('total_duration', 0) or 0) / 1e9
+
+    def snapshot(self):
+        hits = self.memory_hits + self.disk_hits
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'requests': self.requests,
+            'passthrough': self.passthrough,
+            'cacheable': self.cacheable,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'coalesced': self.coalesced,
+            'misses': self.misses,
+            'upstream_errors': self.upstream_errors,
+            'hit_rate': (hits + self.coalesced) / self.cacheable if self.cacheable else 0.0,
+            'saved_prompt_tokens': self.saved_prompt_tokens,
+            'saved_eval_tokens': self.saved_eval_tokens,
+            'saved_seconds': self.saved_seconds,
+        }
+
+class ResponseCache:
+    """LRU + TTL cache of response chunk lists, bounded in memory and on disk"""
+
+    def __init__(self, directory, memory_bytes, disk_bytes, ttl):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (created_at, size, chunks)
+        self.size = 0
+        self.trimming = False
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.disk_usage = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+        else:
+            self.disk_usage = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key, created_at, size, chunks):
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = (created_at, size, chunks)
+        self.size += size
+        while self.size > self.memory_bytes and self.entries:
+            _, (_, evicted, _) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+    async def get(self, key):
+        """Return (chunks, tier) for a fresh entry, or (None, None)"""
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry:
+            if now - entry[0] <= self.ttl:
+                self.entries.move_to_end(key)
+                return entry[2], 'memory'
+            self.size -= self.entries.pop(key)[1]
+        if not self.directory:
+            return None, None
+        path = self._path(key)
+        # File I/O runs in a worker thread so a slow disk never stalls other connections
+        stored, size = await asyncio.to_thread(self._read_file, path)
+        if stored is None:
+            return None, None
+        if now - stored['created_at'] > self.ttl:
+            self.disk_usage -= await asyncio.to_thread(self._remove_file, path)
+            return None, None
+        self._remember(key, stored['created_at'], size, stored['chunks'])
+        return stored['chunks'], 'disk'
+
+    async def put(self, key, chunks):
+        data = json.dumps({'created_at': time.time(), 'chunks': chunks}).encode()
+        self._remember(key, time.time(), len(data), chunks)
+        if not self.directory or len(data) > self.disk_bytes:
+            return
+        try:
+            self.disk_usage += await asyncio.to_thread(self._write_file, self._path(key), data)
+        except OSError as e:
+            print(f"⚠️  Could not write cache entry: {e}")
+            return
+        if self.disk_usage > self.disk_bytes and not self.trimming:
+            self.trimming = True
+            try:
+                self.disk_usage -= await asyncio.to_thread(self._trim_disk, self.disk_usage)
+            finally:
+                self.trimming = False
+
+    # The methods below run in worker threads and return byte deltas for the event loop to apply
+
+    @staticmethod
+    def _read_file(path):
+        """Read an entry and mark it recently used; the disk tier evicts by mtime"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            stored = json.loads(data)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None, 0
+        return stored, len(data)
+
+    @staticmethod
+    def _write_file(path, data):
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+        return len(data) - previous
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except OSError:
+            return 0
+
+    def _trim_disk(self, usage):
+        """Delete the least recently used files until the disk tier is back under 90% of its limit"""
+        files = sorted((entry for entry in os.scandir(self.directory) if entry.is_file()),
+                       key=lambda entry: entry.stat().st_mtime)
+        freed = 0
+        for entry in files:
+            if usage - freed <= self.disk_bytes * 0.9:
+                break
+            freed += self._remove_file(entry.path)
+        return freed
+
+class Flight:
+    """One upstream call whose chunks are shared by every identical concurrent request"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None  # (status, body) when upstream failed
+        self.changed = asyncio.Condition()
+
+    async def publish(self, chunk=None, done=False, error=None):
+        async with self.changed:
+            if chunk is not None:
+                self.chunks.append(chunk)
+            self.done = self.done or done
+            self.error = error or self.error
+            self.changed.notify_all()
+
+    async def follow(self):
+        """Yield chunks as they arrive (including ones received before following)"""
+        index = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: index < len(self.chunks) or self.done)
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                return
+
+def cache_key(path, request):
+    """Key deterministic requests by endpoint and every field that affects the output"""
+    relevant = {k: v for k, v in request.items() if k not in IGNORED_FIELDS}
+    canonical = json.dumps([path, relevant], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def is_deterministic(path, request):
+    """Embeddings always are; generations only with temperature 0 or a fixed seed"""
+    if path in EMBEDDING_PATHS:
+        return True
+    options = request.get('options') or {}
+    return options.get('temperature') == 0 or 'seed' in options
+
+def collapse(path, chunks):
+    """Turn streamed chunks into the single response Ollama returns with stream: false"""
+    final = dict(chunks[-1])
+    if path == '/api/chat':
+        message = dict(final.get('message') or {'role': 'assistant'})
+        message['content'] = ''.join((c.get('message') or {}).get('content', '') for c in chunks)
+        tool_calls = [call for c in chunks for call in (c.get('message') or {}).get('tool_calls', [])]
+        if tool_calls:
+            message['tool_calls'] = tool_calls
+        final['message'] = message
+    else:
+        final['response'] = ''.join(c.get('response', '') for c in chunks)
+    return final
+
+async def read_head(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+async def read_body(reader, headers):
+    """Yield body bytes of a chunked, Content-Length or read-to-EOF response"""
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                await reader.readline()
+                return
+            yield await reader.readexactly(size)
+            await reader.readline()
+    elif 'content-length' in headers:
+        remaining = int(headers['content-length'])
+        while remaining > 0:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+    else:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+class Gateway:
+    def __init__(self, upstream, cache):
+        parts = urlsplit(upstream)
+        self.upstream_host = parts.hostname
+        self.upstream_port = parts.port or 80
+        self.cache = cache
+        self.stats = Stats()
+        self.flights = {}
+
+    async def _upstream(self, method, path, headers, body):
+        reader, writer = await asyncio.open_connection(self.upstream_host, self.upstream_port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.upstream_host}:{self.upstream_port}",
+                 f"Content-Length: {len(body)}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in headers.items()
+                  if name not in ('host', 'content-length', 'connection', 'transfer-encoding')]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+        return reader, writer
+
+    async def passthrough(self, method, path, headers, body, client):
+        """Forward a request and copy the response back byte for byte"""
+        self.stats.passthrough += 1
+        try:
+            reader, writer = await self._upstream(method, path, headers, body)
+        except OSError as e:
+            self.stats.upstream_errors += 1
+            self.send(client, 502, json.dumps({'error': f"gateway: {e}"}).encode())
+            return
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                client.write(data)
+                await client.drain()
+        finally:
+            writer.close()
+
+    async def fly(self, key, path, request, flight):
+        """Run the upstream call for a flight, publishing chunks for every follower"""
+        upstream_request = dict(request, stream=True) if path in GENERATION_PATHS else request
+        body = json.dumps(upstream_request).encode()
+        writer = None
+        try:
+            reader, writer = await self._upstream('POST', path, {'content-type': 'application/json'}, body)
+            status_line, headers = await read_head(reader)
+            status = int(status_line.split(' ', 2)[1])
+            if status != 200:
+                error_body = b''.join([data async for data in read_body(reader, headers)])
+                self.stats.upstream_errors += 1
+                await flight.publish(done=True, error=(status, error_body))
+                return
+            buffer = b''
+            async for data in read_body(reader, headers):
+                buffer += data
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    if line.strip():
+                        await flight.publish(json.loads(line))
+            if buffer.strip():
+                await flight.publish(json.loads(buffer))
+            chunks = flight.chunks
+            if chunks and not any('error' in chunk for chunk in chunks):
+                await self.cache.put(key, chunks)
+            await flight.publish(done=True)
+        except Exception as e:
+            self.stats.upstream_errors += 1
+            await flight.publish(done=True, error=(502, json.dumps({'error': f"gateway: {e}"}).encode()))
+        finally:
+            self.flights.pop(key, None)
+            if writer:
+                writer.close()
+
+    async def respond(self, client, path, request, chunks_iter, cache_status):
+        """Send chunks as an NDJSON stream, or collapsed into one JSON body for stream: false"""
+        streaming = path in GENERATION_PATHS and request.get('stream', True)
+        if streaming:
+            client.write((
+                "HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n"
+                f"X-Gateway-Cache: {cache_status}\r\nConnection: close\r\n\r\n").encode())
+            async for chunk in chunks_iter:
+                line = (json.dumps(chunk) + '\n').encode()
+                client.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                await client.drain()
+            client.write(b"0\r\n\r\n")
+            return
+        chunks = [chunk async for chunk in chunks_iter]
+        payload = collapse(path, chunks) if path in GENERATION_PATHS else chunks[-1]
+        self.send(client, 200, json.dumps(payload).encode(), cache_status)
+
+    def send(self, client, status, body, cache_status=None, content_type='application/json'):
+        reason = {200: 'OK', 404: 'Not Found', 502: 'Bad Gateway'}.get(status, 'Error')
+        extra = f"X-Gateway-Cache: {cache_status}\r\n" if cache_status else ''
+        client.write((f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body)}\r\n{extra}Connection: close\r\n\r\n").encode() + body)
+
+    async def handle_cacheable(self, path, request, client):
+        self.stats.cacheable += 1
+        key = cache_key(path, request)
+        chunks, tier = await self.cache.get(key)
+        if chunks:
+            if tier == 'memory':
+                self.stats.memory_hits += 1
+            else:
+                self.stats.disk_hits += 1
+            self.stats.record_saving(chunks)
+            async def cached():
+                for chunk in chunks:
+                    yield chunk
+            await self.respond(client, path, request, cached(), f"hit-{tier}")
+            return
+
+        flight = self.flights.get(key)
+        if flight:
+            self.stats.coalesced += 1
+            cache_status = 'coalesced'
+        else:
+            self.stats.misses += 1
+            flight = self.flights[key] = Flight()
+            asyncio.create_task(self.fly(key, path, request, flight))
+            cache_status = 'miss'
+
+        if path in GENERATION_PATHS and request.get('stream', True):
+            # Wait for the first chunk (or an error) before committing to a 200 stream
+            async with flight.changed:
+                await flight.changed.wait_for(lambda: flight.chunks or flight.done)
+        else:
+            async with flight.changed:
+                await flight.changed.wait_for(lambda: flight.done)
+        if flight.error:
+            status, body = flight.error
+            self.send(client, status, body, cache_status)
+            return
+        await self.respond(client, path, request, flight.follow(), cache_status)
+        if cache_status == 'coalesced':
+            self.stats.record_saving(flight.chunks)
+
+    def metrics(self):
+        s = self.stats.snapshot()
+        lines = []
+        def metric(name, kind, help_text, value):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}",
+                          f"{name}{'_total' if kind == 'counter' else ''} {value}"])
+        metric('ollama_gateway_requests', 'counter', 'Requests received', s['requests'])
+        metric('ollama_gateway_passthrough_requests', 'counter', 'Requests proxied without caching', s['passthrough'])
+        metric('ollama_gateway_cacheable_requests', 'counter', 'Deterministic requests', s['cacheable'])
+        lines.extend(['# HELP ollama_gateway_cache_hits Cache hits by tier', '# TYPE ollama_gateway_cache_hits counter',
+                      f'ollama_gateway_cache_hits_total{{tier="memory"}} {s["memory_hits"]}',
+                      f'ollama_gateway_cache_hits_total{{tier="disk"}} {s["disk_hits"]}'])
+        metric('ollama_gateway_coalesced_requests', 'counter', 'Requests merged into an in-flight call', s['coalesced'])
+        metric('ollama_gateway_cache_misses', 'counter', 'Deterministic requests sent upstream', s['misses'])
+        metric('ollama_gateway_upstream_errors', 'counter', 'Failed upstream calls', s['upstream_errors'])
+        metric('ollama_gateway_hit_ratio', 'gauge', 'Share of deterministic requests served without a new upstream call',
+               f"{s['hit_rate']:.6f}")
+        lines.extend(['# HELP ollama_gateway_saved_tokens Tokens not recomputed thanks to the gateway',
+                      '# TYPE ollama_gateway_saved_tokens counter',
+                      f'ollama_gateway_saved_tokens_total{{kind="prompt"}} {s["saved_prompt_tokens"]}',
+                      f'ollama_gateway_saved_tokens_total{{kind="eval"}} {s["saved_eval_tokens"]}'])
+        metric('ollama_gateway_saved_seconds', 'counter', 'Upstream compute time saved', f"{s['saved_seconds']:.3f}")
+        metric('ollama_gateway_cache_memory_bytes', 'gauge', 'Memory cache size', self.cache.size)
+        metric('ollama_gateway_cache_disk_bytes', 'gauge', 'Disk cache size', self.cache.disk_usage)
+        return ('\n'.join(lines) + '\n# EOF\n').encode()
+
+    async def handle(self, reader, client):
+        try:
+            request_line, headers = await read_head(reader)
+            method, target, _ = request_line.split(' ', 2)
+            path = target.split('?', 1)[0]
+            body = b''.join([data async for data in read_body(reader, headers)]) if (
+                'content-length' in headers or 'transfer-encoding' in headers) else b''
+            self.stats.requests += 1
+
+            if path == '/gateway/metrics':
+                self.send(client, 200, self.metrics(), content_type='application/openmetrics-text; version=1.0.0')
+            elif path == '/gateway/stats':
+                self.send(client, 200, json.dumps(self.stats.snapshot()).encode())
+            else:
+                request = None
+                if method == 'POST' and path in GENERATION_PATHS | EMBEDDING_PATHS and body:
+                    try:
+                        request = json.loads(body)
+                    except ValueError:
+                        request = None
+                if request is not None and is_deterministic(path, request):
+                    await self.handle_cacheable(path, request, client)
+                else:
+                    await self.passthrough(method, target, headers, body, client)
+            await client.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f"❌ Gateway error: {e}")
+        finally:
+            client.close()
+
+async def serve():
+    cache = ResponseCache(CACHE_DIR, MEMORY_CACHE_MB * 1024 * 1024, DISK_CACHE_MB * 1024 * 1024, CACHE_TTL)
+    gateway = Gateway(UPSTREAM, cache)
+    server = await asyncio.start_server(gateway.handle, LISTEN_HOST, LISTEN_PORT)
+    print(f"🚀 Ollama gateway listening on {LISTEN_HOST}:{LISTEN_PORT} -> {UPSTREAM}")
+    print(f"   Cache: {MEMORY_CACHE_MB:g} MB memory, {DISK_CACHE_MB:g} MB disk in {CACHE_DIR}, TTL {CACHE_TTL:g}s")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
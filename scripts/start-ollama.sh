@@ -8,6 +8,9 @@ if ! command -v ollama &> /dev/null; then
     exit 1
 fi
 
+# Get the absolute path to the script directory
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+
 # Use default Ollama models directory if not already set
 if [ -z "$OLLAMA_DATA_DIR" ]; then
     OLLAMA_DATA_DIR="$HOME/.ollama"
@@ -24,7 +27,16 @@ export METAL_DEBUG_ERROR_MODE=1        # Show detailed Metal errors
 
 # Optional: Set number of threads based on CPU cores
 # Adjust these values based on your specific M2 Ultra configuration
-export OLLAMA_NUM_CPU=20
+export OLLAMA_NUM_CPU="${OLLAMA_NUM_CPU:-20}"
+
+# Tuned settings (e.g. written by benchmarking/autotune.py) override the defaults above
+OLLAMA_ENV_FILE="${OLLAMA_ENV_FILE:-$SCRIPT_DIR/ollama.env}"
+if [ -f "$OLLAMA_ENV_FILE" ]; then
+    echo "Loading Ollama settings from: $OLLAMA_ENV_FILE"
+    set -a
+    source "$OLLAMA_ENV_FILE"
+    set +a
+fi
 
 # Check if Ollama is already running
 if curl -s http://localhost:11434/api/tags &> /dev/null; then
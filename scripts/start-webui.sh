@@ -9,6 +9,13 @@ YELLOW='\033[1;33m'
 RED='\033[0;31m'
 NC='\033[0m' # No Color
 
+# --gateway puts the caching/coalescing gateway between Open WebUI and Ollama
+COMPOSE_ARGS=()
+if [ "$1" = "--gateway" ]; then
+    COMPOSE_ARGS=(--profile gateway)
+    export OLLAMA_BASE_URL="http://ollama-gateway:11435"
+fi
+
 echo -e "${GREEN}Starting Open WebUI in Docker with GPU support${NC}"
 echo "===================================================="
 
@@ -48,7 +55,7 @@ fi
 # Start Open WebUI with GPU support in Docker
 echo -e "${BLUE}Starting Open WebUI Docker container with GPU support...${NC}"
 cd "$(dirname "$0")/../docker"
-docker compose -f docker-compose-webui.yml up -d
+docker compose -f docker-compose-webui.yml "${COMPOSE_ARGS[@]}" up -d
 
 # Check if WebUI started successfully
 if docker ps | grep -q open-webui; then
@@ -63,6 +70,9 @@ fi
 echo ""
 echo -e "${GREEN}Open WebUI is now running with Apple Silicon GPU support!${NC}"
 echo -e "${BLUE}Access Open WebUI at:${NC} http://localhost:3000"
+if [ ${#COMPOSE_ARGS[@]} -gt 0 ]; then
+    echo -e "${BLUE}Gateway stats at:${NC} http://localhost:11435/gateway/stats"
+fi
 echo ""
 echo -e "${YELLOW}NOTE: This configuration uses the integrated Ollama container${NC}"
 echo -e "${YELLOW}with native Apple Silicon GPU acceleration.${NC}"